@@ -1,7 +1,14 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib import messages
-from .models import User, Candidate, HiringManager, Assessment, CodingQuestion
+from django.db import transaction
+from django.utils import timezone
+from .models import User, Candidate, CandidateSkill, HiringManager, Assessment, CodingQuestion, EvaluationCacheEntry
+from .models import DuplicateCandidateSuggestion, OutboundEmail, Skill, SourceRecord
+from .evaluation_cache import invalidate_question
+from .search import MIN_QUERY_LENGTH, search_candidates
+from .utils.candidate_dedup import merge_candidates
+from .utils.email_outbox import request_dispatch
 from .utils.email_utils import generate_random_password, send_candidate_credentials_email
 
 class CustomUserAdmin(UserAdmin):
@@ -66,12 +73,37 @@ class CustomUserAdmin(UserAdmin):
     create_and_email_candidate.short_description = "Generate & email credentials for candidates"
 
 
+class CandidateSkillInline(admin.TabularInline):
+    model = CandidateSkill
+    autocomplete_fields = ('skill',)
+    extra = 1
+
+
 class CandidateAdmin(admin.ModelAdmin):
     list_display = ('user', 'source', 'source_score', 'profile_completed', 'created_at')
     list_filter = ('source', 'profile_completed')
-    search_fields = ('user__username', 'user__email', 'user__full_name', 'skills')
+    search_fields = ('user__username', 'user__email', 'user__full_name', 'skills__name')
+    inlines = [CandidateSkillInline]
+
+    def save_related(self, request, form, formsets, change):
+        """
+        The skill inline saves CandidateSkill rows directly, which sends no
+        m2m_changed signal, so rebuild the candidate's search columns here.
+        """
+        super().save_related(request, form, formsets, change)
+        Candidate.refresh_search([form.instance.pk])
     actions = ['resend_credentials_email']
 
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Search through the indexed candidate search instead of ILIKE scans
+        over the joined user table. Terms too short for it fall back to the
+        default search.
+        """
+        if len(search_term.strip()) < MIN_QUERY_LENGTH:
+            return super().get_search_results(request, queryset, search_term)
+        return search_candidates(queryset, search_term), False
+
     def resend_credentials_email(self, request, queryset):
         """
         Admin action to resend credentials email for selected candidates
@@ -130,10 +162,108 @@ class CodingQuestionAdmin(admin.ModelAdmin):
             'fields': ('test_cases',)
         }),
     )
+    actions = ['invalidate_evaluation_cache']
+
+    def invalidate_evaluation_cache(self, request, queryset):
+        """
+        Admin action to drop cached evaluation results for the selected questions
+        """
+        removed = sum(invalidate_question(question) for question in queryset)
+        messages.success(request, f"Removed {removed} cached evaluation results.")
+
+    invalidate_evaluation_cache.short_description = "Invalidate cached evaluation results"
+
+
+class SkillAdmin(admin.ModelAdmin):
+    list_display = ('name', 'normalized_name')
+    search_fields = ('name',)
+
+
+class EvaluationCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ('cache_key', 'language', 'question', 'evaluation_score', 'hit_count', 'last_used_at')
+    list_filter = ('language',)
+    search_fields = ('cache_key', 'question__title')
+    readonly_fields = ('created_at',)
+
+
+class SourceRecordAdmin(admin.ModelAdmin):
+    list_display = ('source', 'external_id', 'candidate', 'imported_at', 'vanished_at')
+    list_filter = ('source', ('vanished_at', admin.EmptyFieldListFilter))
+    search_fields = ('external_id', 'candidate__user__username')
+    raw_id_fields = ('candidate',)
+    readonly_fields = ('fingerprint', 'imported_at')
+
+
+class DuplicateCandidateSuggestionAdmin(admin.ModelAdmin):
+    list_display = ('candidate', 'duplicate', 'similarity', 'status', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('candidate__user__username', 'duplicate__user__username')
+    raw_id_fields = ('candidate', 'duplicate')
+    actions = ['merge_duplicates', 'dismiss_suggestions']
+
+    def merge_duplicates(self, request, queryset):
+        """
+        Admin action to merge each selected pair into one candidate
+        """
+        merged_count = 0
+        # Candidates merged away by an earlier pair of the selection
+        removed = set()
+        for suggestion in queryset.filter(status='PENDING').select_related('candidate__user', 'duplicate__user'):
+            if suggestion.candidate_id in removed or suggestion.duplicate_id in removed:
+                continue
+            try:
+                kept = merge_candidates(suggestion.candidate, suggestion.duplicate)
+            except ValueError as e:
+                self.message_user(request, f"Could not merge {suggestion}: {e}", level=messages.WARNING)
+            else:
+                removed.add(suggestion.duplicate_id if kept.pk == suggestion.candidate_id
+                            else suggestion.candidate_id)
+                merged_count += 1
+
+        messages.success(request, f"Merged {merged_count} duplicate candidates.")
+
+    merge_duplicates.short_description = "Merge selected duplicate candidates"
+
+    def dismiss_suggestions(self, request, queryset):
+        """
+        Admin action to mark the selected pairs as different people
+        """
+        count = queryset.update(status='DISMISSED', reviewed_at=timezone.now())
+        messages.success(request, f"Dismissed {count} duplicate suggestions.")
+
+    dismiss_suggestions.short_description = "Dismiss selected suggestions"
+
+
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('to_email', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status', 'domain')
+    search_fields = ('to_email', 'subject')
+    # The bodies may carry login credentials
+    exclude = ('body', 'html_body')
+    readonly_fields = ('to_email', 'domain', 'subject', 'status', 'attempts', 'next_attempt_at', 'last_error',
+                       'created_at', 'claimed_at', 'sent_at')
+    actions = ['retry_emails']
+
+    def retry_emails(self, request, queryset):
+        """
+        Admin action to queue the selected failed emails again
+        """
+        count = queryset.filter(status='FAILED').update(status='PENDING', attempts=0,
+                                                        next_attempt_at=timezone.now())
+        if count:
+            transaction.on_commit(request_dispatch)
+        messages.success(request, f"Queued {count} failed emails for another attempt.")
+
+    retry_emails.short_description = "Retry selected failed emails"
 
 
 admin.site.register(User, CustomUserAdmin)
 admin.site.register(Candidate, CandidateAdmin)
 admin.site.register(HiringManager, HiringManagerAdmin)
 admin.site.register(Assessment, AssessmentAdmin)
-admin.site.register(CodingQuestion, CodingQuestionAdmin)
\ No newline at end of file
+admin.site.register(CodingQuestion, CodingQuestionAdmin)
+admin.site.register(EvaluationCacheEntry, EvaluationCacheEntryAdmin)
+admin.site.register(Skill, SkillAdmin)
+admin.site.register(SourceRecord, SourceRecordAdmin)
+admin.site.register(DuplicateCandidateSuggestion, DuplicateCandidateSuggestionAdmin)
+admin.site.register(OutboundEmail, OutboundEmailAdmin)
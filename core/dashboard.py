@@ -0,0 +1,328 @@
+import base64
+import binascii
+import datetime
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlencode
+
+from django.core.exceptions import ValidationError
+from django.db.models import Case, CharField, Exists, F, OuterRef, Q, QuerySet, Value, When
+from django.db.models.functions import Coalesce, NullIf
+from django.template.loader import render_to_string
+
+from .models import Candidate, CandidateSkill, Skill
+from .search import SEARCH_LIMIT, search_candidates
+from .utils import cache_utils
+
+# Candidates rendered per page of the dashboard table
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+STATUS_FILTERS = {
+    'INVITED': Q(latest_status='SENT'),
+    'IN_PROGRESS': Q(latest_status__in=['ACCEPTED', 'STARTED']),
+    'COMPLETED': Q(latest_status__in=['FINISHED', 'SCORING', 'SCORED']),
+    'SCORED': Q(latest_status='SCORED'),
+    'NO_ASSESSMENT': Q(latest_assessment__isnull=True),
+}
+
+# How a filter on several skills matches: candidates having all of them, or any
+SKILL_MATCHES = ('all', 'any')
+
+# Sort order -> (annotation holding the sort key, descending, where NULL keys go).
+# Every order is tie-broken on ascending id so that a (key, id) pair
+# identifies a position in the table exactly.
+SORT_ORDERS: Dict[str, Tuple[str, bool, str]] = {
+    'name': ('sort_name', False, 'last'),
+    'status': ('latest_status', False, 'last'),
+    'score': ('latest_score', True, 'last'),
+    'interview': ('interview_status', False, 'last'),
+    'date': ('latest_assessment_at', False, 'first'),
+    'source': ('source', False, 'last'),
+    'rank': ('normalized_score', True, 'last'),
+}
+DEFAULT_SORT = 'name'
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded for the requested sort."""
+
+
+def dashboard_candidates() -> QuerySet:
+    """
+    All candidates with the display fields the dashboard shows for the
+    state of their most recent assessment, cached on the candidate.
+    """
+    return (
+        Candidate.objects.select_related('user')
+        .annotate(
+            sort_name=Coalesce(NullIf('user__full_name', Value('')), 'user__username'),
+        )
+        .annotate(
+            status_display=Case(
+                When(latest_status='SENT', then=Value('Invitation Sent')),
+                When(latest_status='ACCEPTED', then=Value('Invitation Accepted')),
+                When(latest_status='STARTED', then=Value('Assessment In Progress')),
+                When(latest_status='FINISHED', latest_evaluation_status='EVALUATING',
+                     then=Value('Evaluation In Progress')),
+                When(latest_status='FINISHED', latest_evaluation_status='PENDING',
+                     then=Value('Awaiting Evaluation')),
+                When(latest_status='FINISHED', latest_evaluation_status='FAILED',
+                     then=Value('Evaluation Failed')),
+                When(latest_status='FINISHED', then=Value('Completed')),
+                When(latest_status='SCORING', then=Value('Scoring In Progress')),
+                When(latest_status='SCORED', then=Value('Evaluated')),
+                default=F('latest_status'),
+                output_field=CharField(),
+            ),
+            status_color=Case(
+                When(latest_status='SENT', then=Value('blue')),
+                When(latest_status='ACCEPTED', then=Value('green')),
+                When(latest_status='STARTED', then=Value('orange')),
+                When(latest_status='FINISHED', latest_evaluation_status='EVALUATING', then=Value('purple')),
+                When(latest_status='FINISHED', latest_evaluation_status='PENDING', then=Value('yellow')),
+                When(latest_status='FINISHED', latest_evaluation_status='FAILED', then=Value('red')),
+                When(latest_status='SCORING', then=Value('purple')),
+                When(latest_status='SCORED', then=Value('green')),
+                default=Value('gray'),
+                output_field=CharField(),
+            ),
+        )
+    )
+
+
+def filter_by_skills(candidates: QuerySet, skills: Sequence[str], skill_match: str = 'all') -> QuerySet:
+    """
+    Candidates having all, or with skill_match 'any' any, of the named
+    skills. Each skill is an EXISTS on the candidate skill table, which
+    its (skill, candidate) and (candidate, skill) indexes answer without a
+    scan whether the planner joins from the skills or probes per candidate.
+    """
+    names = {Skill.normalize(name) for name in skills} - {''}
+    if not names:
+        return candidates
+
+    skill_ids = list(Skill.objects.filter(normalized_name__in=names).values_list('id', flat=True))
+    if not skill_ids or (skill_match != 'any' and len(skill_ids) < len(names)):
+        return candidates.none()
+
+    candidate_skills = CandidateSkill.objects.filter(candidate=OuterRef('pk'))
+    if skill_match == 'any':
+        return candidates.filter(Exists(candidate_skills.filter(skill_id__in=skill_ids)))
+    return candidates.filter(*[Exists(candidate_skills.filter(skill_id=skill_id)) for skill_id in skill_ids])
+
+
+def filter_candidates(candidates: QuerySet, status_filter: str = '', interview_filter: str = '',
+                      source_filter: str = '', skills: Sequence[str] = (), skill_match: str = 'all') -> QuerySet:
+    """Apply the dashboard's status, interview status, source and skill filters."""
+    if status_filter in STATUS_FILTERS:
+        candidates = candidates.filter(STATUS_FILTERS[status_filter])
+    if interview_filter:
+        candidates = candidates.filter(interview_status=interview_filter)
+    if source_filter:
+        candidates = candidates.filter(source=source_filter)
+    if skills:
+        candidates = filter_by_skills(candidates, skills, skill_match)
+    return candidates
+
+
+def skill_filter_from(params) -> Tuple[List[str], str]:
+    """The skills and match mode of the skill filter in the request's query parameters."""
+    skills = [name for name in params.getlist('skills') if name.strip()]
+    skill_match = params.get('skill_match', 'all')
+    return skills, skill_match if skill_match in SKILL_MATCHES else 'all'
+
+
+def skill_filter_params(skills: Sequence[str], skill_match: str) -> str:
+    """Query string carrying the skill filter across the dashboard's links."""
+    if not skills:
+        return ''
+    return urlencode([('skills', name) for name in skills] + [('skill_match', skill_match)])
+
+
+def _skill_filter_key(skills: Sequence[str], skill_match: str) -> Tuple[Tuple[str, ...], str]:
+    """The skill filter as part of a cache key, the same for any spelling or order of the skills."""
+    names = tuple(sorted({Skill.normalize(name) for name in skills} - {''}))
+    return names, skill_match if names else ''
+
+
+def order_candidates(candidates: QuerySet, sort_by: str) -> QuerySet:
+    """Order by the sort key, with NULL keys placed per SORT_ORDERS, then by id."""
+    key, descending, nulls = SORT_ORDERS[sort_by]
+    expression = F(key).desc if descending else F(key).asc
+    if nulls == 'first':
+        return candidates.order_by(expression(nulls_first=True), 'id')
+    return candidates.order_by(expression(nulls_last=True), 'id')
+
+
+def encode_cursor(sort_by: str, candidate: Candidate) -> str:
+    """Opaque cursor pointing just past the given candidate in the sort order."""
+    value = getattr(candidate, SORT_ORDERS[sort_by][0])
+    if isinstance(value, datetime.datetime):
+        # Full precision: a truncated timestamp would repeat or skip rows
+        value = value.isoformat()
+    payload = json.dumps([sort_by, value, candidate.id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(candidates: QuerySet, sort_by: str, cursor: str) -> Tuple[Any, int]:
+    """
+    Return the (sort key, id) a cursor points at. The key is converted back
+    to the annotation's Python type, so dates and numbers compare correctly.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, value, last_id = json.loads(payload)
+    except (binascii.Error, ValueError, TypeError):
+        raise InvalidCursor("Malformed cursor")
+    if cursor_sort != sort_by or not isinstance(last_id, int):
+        raise InvalidCursor("Cursor does not match the requested sort order")
+
+    if value is not None:
+        key = SORT_ORDERS[sort_by][0]
+        if key in candidates.query.annotations:
+            field = candidates.query.annotations[key].output_field
+        else:
+            field = Candidate._meta.get_field(key)
+        try:
+            value = field.to_python(value)
+        except ValidationError:
+            raise InvalidCursor("Cursor value does not match the sort key")
+    return value, last_id
+
+
+def after_cursor(sort_by: str, value: Any, last_id: int) -> List[Q]:
+    """
+    Keyset conditions selecting the rows that follow (value, last_id) in
+    the sort order, as consecutive segments of that order: the rest of the
+    non-NULL keys and the NULL block, in whichever order NULLs sort.
+
+    Each segment bounds the sort key on its own, so the index on
+    (key, id) can seek straight to it; a single condition OR-ing the
+    segments together could only be applied as a filter while scanning
+    the index from its start.
+    """
+    key, descending, nulls = SORT_ORDERS[sort_by]
+    null_keys = Q(**{f'{key}__isnull': True})
+
+    if value is None:
+        # Inside the NULL block only the id moves forward; non-NULL keys
+        # come after it only when NULLs sort first
+        segments = [null_keys & Q(id__gt=last_id)]
+        if nulls == 'first':
+            segments.append(Q(**{f'{key}__isnull': False}))
+        return segments
+
+    # The inclusive bound is what the index seeks on; the rest only skips
+    # the rows sharing the key that were already shown
+    bound = Q(**{f'{key}__lte' if descending else f'{key}__gte': value})
+    beyond = Q(**{f'{key}__lt' if descending else f'{key}__gt': value})
+    segments = [bound & (beyond | Q(id__gt=last_id))]
+    if nulls == 'last':
+        segments.append(null_keys)
+    return segments
+
+
+def paginate_candidates(candidates: QuerySet, sort_by: str, cursor: Optional[str] = None,
+                        page_size: int = PAGE_SIZE) -> Tuple[List[Candidate], Optional[str]]:
+    """
+    Fetch one page of candidates in the sort order, starting after the
+    cursor. Returns the page and the cursor for the next page, or None
+    when this is the last page.
+
+    Seeking past the last seen (key, id) instead of using an OFFSET keeps
+    every page a bounded index range scan no matter how deep the manager
+    scrolls. A page that crosses into the NULL block takes a second query.
+    """
+    candidates = order_candidates(candidates, sort_by)
+    if cursor:
+        value, last_id = decode_cursor(candidates, sort_by, cursor)
+        segments = [candidates.filter(condition) for condition in after_cursor(sort_by, value, last_id)]
+    else:
+        segments = [candidates]
+
+    # One extra row tells whether another page follows
+    page = []
+    for segment in segments:
+        page.extend(segment[:page_size + 1 - len(page)])
+        if len(page) > page_size:
+            break
+
+    next_cursor = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        next_cursor = encode_cursor(sort_by, page[-1])
+    return page, next_cursor
+
+
+def page_size_from(value: Optional[str]) -> int:
+    """Page size requested by the client, clamped to 1..MAX_PAGE_SIZE."""
+    try:
+        return min(max(int(value), 1), MAX_PAGE_SIZE)
+    except (TypeError, ValueError):
+        return PAGE_SIZE
+
+
+# Candidate attributes the table rows show, and of those the user's
+ROW_FIELDS = ('id', 'status_display', 'status_color', 'interview_status', 'interview_date', 'latest_assessment_id',
+              'latest_status', 'latest_evaluation_status', 'latest_score', 'latest_created_by_id')
+ROW_USER_FIELDS = ('full_name', 'username', 'email')
+
+
+def dashboard_row(candidate: Candidate) -> Dict[str, Any]:
+    """
+    The display fields of a candidate's table row. Cached pages hold these
+    rather than model instances, which carry credentials and do not
+    survive a change to the models between deploys.
+    """
+    row = {field: getattr(candidate, field) for field in ROW_FIELDS}
+    row['source_display'] = candidate.get_source_display()
+    row['user'] = {field: getattr(candidate.user, field) for field in ROW_USER_FIELDS}
+    return row
+
+
+def render_rows(rows: Sequence[Dict[str, Any]], hiring_manager_id: int) -> str:
+    """Table rows for the candidates, with the actions open to the viewing hiring manager."""
+    return render_to_string('core/manager_dashboard_rows.html',
+                            {'candidates': rows, 'hiring_manager_id': hiring_manager_id})
+
+
+def render_candidate_page(hiring_manager_id: int, sort_by: str, status_filter: str = '',
+                          interview_filter: str = '', source_filter: str = '', cursor: Optional[str] = None,
+                          page_size: int = PAGE_SIZE, skills: Sequence[str] = (),
+                          skill_match: str = 'all') -> Tuple[str, int, Optional[str]]:
+    """
+    Rendered table rows for one page of candidates, with the row count and
+    the next page's cursor. The page's rows are cached per filter
+    combination, shared by all hiring managers, until something the
+    dashboard shows changes; only their HTML is rendered per manager.
+    """
+    def fetch_page():
+        candidates = filter_candidates(dashboard_candidates(), status_filter, interview_filter, source_filter,
+                                       skills, skill_match)
+        page, next_cursor = paginate_candidates(candidates, sort_by, cursor=cursor, page_size=page_size)
+        return [dashboard_row(candidate) for candidate in page], next_cursor
+
+    key = (sort_by, status_filter, interview_filter, source_filter, cursor, page_size,
+           _skill_filter_key(skills, skill_match))
+    page, next_cursor = cache_utils.get_or_set(cache_utils.DASHBOARD, key, fetch_page)
+    return render_rows(page, hiring_manager_id), len(page), next_cursor
+
+
+def render_search_results(hiring_manager_id: int, query: str, status_filter: str = '',
+                          interview_filter: str = '', source_filter: str = '', skills: Sequence[str] = (),
+                          skill_match: str = 'all') -> Tuple[str, int]:
+    """
+    Rendered table rows for the candidates best matching a search within
+    the dashboard's filters, with the row count. Cached like the pages, so
+    retyping a query while searching does not query again.
+    """
+    def fetch_results():
+        candidates = filter_candidates(dashboard_candidates(), status_filter, interview_filter, source_filter,
+                                       skills, skill_match)
+        return [dashboard_row(candidate) for candidate in search_candidates(candidates, query)[:SEARCH_LIMIT]]
+
+    key = ('search', query.strip().lower(), status_filter, interview_filter, source_filter,
+           _skill_filter_key(skills, skill_match))
+    results = cache_utils.get_or_set(cache_utils.DASHBOARD, key, fetch_results)
+    return render_rows(results, hiring_manager_id), len(results)
@@ -1,134 +1,111 @@
-import os
-import json
-import tempfile
 import time
-import shutil
-import uuid
 import logging
-import subprocess
-from django.conf import settings
 from django.utils import timezone
-from pathlib import Path
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Iterable, List, Optional
 
-from .models import Assessment, CodingQuestion
+from .evaluation_cache import build_cache_key, cached_results, get_cached_result, store_result
+from .evaluation_pool import get_evaluator_pool
+from .models import Assessment
+from .test_plans import get_test_plan
 
 logger = logging.getLogger(__name__)
 
+# Minimum seconds between writes of partial progress to the assessment
+PROGRESS_SAVE_INTERVAL = 1.0
 
-def prepare_test_data(question: CodingQuestion) -> Tuple[str, Dict[str, Any]]:
+
+class EvaluationAborted(Exception):
+    """Raised when an evaluator reports a fatal error or timeout mid-stream."""
+
+    def __init__(self, record: Dict[str, Any], test_results: List[Dict[str, Any]]):
+        super().__init__(record.get('message', 'Evaluation failed'))
+        self.record = record
+        self.test_results = test_results
+
+
+def count_test_cases(test_data: Dict[str, Any]) -> int:
+    """Number of test cases in the test data, whether flat or grouped."""
+    if 'test_groups' in test_data:
+        return sum(len(group.get('test_cases', [])) for group in test_data['test_groups'])
+    return len(test_data.get('test_cases', []))
+
+
+def summarize_resource_usage(test_results: List[Dict[str, Any]], max_rss_kb: Optional[int] = None) -> Dict[str, Any]:
     """
-    Prepare test data for the given coding question.
-    Returns a tuple of (test_data_file_path, test_data_dict)
+    Aggregate the per-test wall time, CPU time and peak memory reported by
+    the evaluator. Peak memory is the evaluating process's resident memory
+    high-water mark in KB for both languages, so the largest value is the
+    most any test needed. Figures an evaluator does not report are left out.
     """
-    # Create a temporary directory for test files
-    temp_dir = tempfile.mkdtemp(prefix="evaluation_")
-
-    # Determine the question type and prepare appropriate test data
-    if question.question_type == "BACKEND":
-        test_data = {
-            "function_name": "is_allowed",  # Assuming the rate limiter example
-            "test_cases": [
-                {"input": ["client1"], "expected_output": True},
-                {"input": ["client1"], "expected_output": True},
-                {"input": ["client1"], "expected_output": True},
-                {"input": ["client1"], "expected_output": False},
-                {"input": ["client2"], "expected_output": True},
-            ]
-        }
+    usage = {'timed_out_tests': sum(1 for test in test_results if test.get('timed_out'))}
 
-    elif question.question_type == "FRONTEND":
-        # For frontend, we might check if certain HTML elements exist
-        test_data = {
-            "html_required_elements": ["nav", "ul", "li", "button"],
-            "css_required_properties": ["display: flex", "media"],
-            "js_required_functionality": ["addEventListener", "toggle"]
-        }
+    for field in ('wall_time_ms', 'cpu_time_ms'):
+        values = [test[field] for test in test_results if test.get(field) is not None]
+        if values:
+            usage[f'total_{field}'] = round(sum(values), 3)
+            usage[f'max_{field}'] = round(max(values), 3)
 
-    elif question.question_type == "DATABASE":
-        # For SQL questions, we provide schema and expected query results
-        schema_file = os.path.join(temp_dir, "schema.sql")
-
-        # Create a sample schema for testing
-        with open(schema_file, "w") as f:
-            f.write("""
-            DROP TABLE IF EXISTS users CASCADE;
-            DROP TABLE IF EXISTS posts CASCADE;
-            DROP TABLE IF EXISTS comments CASCADE;
-            DROP TABLE IF EXISTS likes CASCADE;
-
-            CREATE TABLE users (
-                id SERIAL PRIMARY KEY,
-                name VARCHAR(100),
-                email VARCHAR(100) UNIQUE
-            );
-
-            CREATE TABLE posts (
-                id SERIAL PRIMARY KEY,
-                user_id INTEGER REFERENCES users(id),
-                content TEXT,
-                created_at TIMESTAMP DEFAULT NOW()
-            );
-
-            CREATE TABLE comments (
-                id SERIAL PRIMARY KEY,
-                post_id INTEGER REFERENCES posts(id),
-                user_id INTEGER REFERENCES users(id),
-                content TEXT,
-                created_at TIMESTAMP DEFAULT NOW()
-            );
-
-            CREATE TABLE likes (
-                id SERIAL PRIMARY KEY,
-                post_id INTEGER REFERENCES posts(id),
-                user_id INTEGER REFERENCES users(id),
-                created_at TIMESTAMP DEFAULT NOW()
-            );
-
-            -- Insert sample data
-            INSERT INTO users (name, email) VALUES 
-                ('User 1', 'user1@example.com'),
-                ('User 2', 'user2@example.com'),
-                ('User 3', 'user3@example.com');
-
-            INSERT INTO posts (user_id, content, created_at) VALUES 
-                (1, 'Post 1 content', NOW() - INTERVAL '5 days'),
-                (2, 'Post 2 content', NOW() - INTERVAL '3 days'),
-                (3, 'Post 3 content', NOW() - INTERVAL '1 day');
-
-            INSERT INTO comments (post_id, user_id, content, created_at) VALUES 
-                (1, 2, 'Comment on post 1', NOW() - INTERVAL '4 days'),
-                (1, 3, 'Another comment on post 1', NOW() - INTERVAL '3 days'),
-                (2, 1, 'Comment on post 2', NOW() - INTERVAL '2 days');
-
-            INSERT INTO likes (post_id, user_id, created_at) VALUES 
-                (1, 2, NOW() - INTERVAL '4 days'),
-                (1, 3, NOW() - INTERVAL '3 days'),
-                (2, 3, NOW() - INTERVAL '2 days');
-            """)
-
-        test_data = {
-            "schema_file": schema_file,
-            "test_cases": [
-                {
-                    "query": "SELECT p.* FROM posts p JOIN likes l ON p.id = l.post_id WHERE l.user_id = 3 ORDER BY p.created_at DESC;",
-                    "expected_result": [
-                        {"id": 2, "user_id": 2, "content": "Post 2 content"},
-                        {"id": 1, "user_id": 1, "content": "Post 1 content"}
-                    ]
-                }
-            ]
-        }
+    peaks = [test['peak_memory_kb'] for test in test_results if test.get('peak_memory_kb') is not None]
+    if peaks:
+        usage['peak_memory_kb'] = max(peaks)
+    if max_rss_kb is not None:
+        usage['max_rss_kb'] = max_rss_kb
 
-    else:
-        test_data = {"test_cases": []}
+    return usage
 
-    # Save the test data to a file
-    test_data_file = os.path.join(temp_dir, "test_data.json")
-    with open(test_data_file, "w") as f:
-        json.dump(test_data, f)
 
-    return test_data_file, test_data
+def consume_records(assessment: Assessment, records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Fold a stream of evaluator records into the final evaluation results.
+
+    Per-test records are collected as they arrive and partial progress is
+    written to the assessment at most every PROGRESS_SAVE_INTERVAL seconds,
+    so managers can follow long suites. An error or timeout record stops
+    consumption immediately and raises EvaluationAborted.
+    """
+    test_results = []
+    total_tests = None
+    complexity = None
+    profile = None
+    last_saved = 0.0
+
+    for record in records:
+        record_type = record.pop('type', None)
+
+        if record_type == 'start':
+            total_tests = record.get('total_tests')
+
+        elif record_type == 'test':
+            test_results.append(record)
+            if time.monotonic() - last_saved >= PROGRESS_SAVE_INTERVAL:
+                # Queryset update skips save signals for these interim writes
+                Assessment.objects.filter(pk=assessment.pk).update(evaluation_results={
+                    'status': 'running',
+                    'tests_completed': len(test_results),
+                    'total_tests': total_tests,
+                    'test_results': test_results,
+                })
+                last_saved = time.monotonic()
+
+        elif record_type == 'scaling':
+            complexity = record
+
+        elif record_type == 'profile':
+            profile = record
+
+        elif record_type == 'result':
+            record['test_results'] = test_results
+            if complexity is not None:
+                record['complexity'] = complexity
+            if profile is not None:
+                record['profile'] = profile
+            record['resource_usage'] = summarize_resource_usage(test_results, record.pop('max_rss_kb', None))
+            return record
+
+        elif record_type in ('error', 'timeout'):
+            raise EvaluationAborted(record, test_results)
+
+    raise EvaluationAborted({'status': 'error', 'message': 'Evaluator stream ended without a result'}, test_results)
 
 
 def evaluate_submission(assessment: Assessment) -> Dict[str, Any]:
@@ -147,44 +124,43 @@ def evaluate_submission(assessment: Assessment) -> Dict[str, Any]:
         code_language = assessment.code_language
         code_submission = assessment.code_submission
 
-        # Create temporary directory for evaluation
-        temp_dir = tempfile.mkdtemp(prefix="evaluation_")
-
-        # Save code submission to a file
-        code_file = os.path.join(temp_dir, f"submission.{code_language}")
-        with open(code_file, "w") as f:
-            f.write(code_submission)
-
-        # Prepare test data
-        test_data_file, _ = prepare_test_data(question)
-
-        # Prepare output file
-        output_file = os.path.join(temp_dir, "output.json")
-
-        # Set max execution time (in seconds)
-        timeout = 30
-
-        # Build the Docker command
-        docker_cmd = [
-            "docker", "run", "--rm",
-            "--network=none",  # Disable network access
-            "--cpus=0.5",  # Limit CPU usage
-            "--memory=512m",  # Limit memory usage
-            # "--volume", f"{temp_dir}:.\workspace",  # Mount the temp directory
-            "hushhushevaluator:latest",  # Docker image
-            f"./workspace/submission.{code_language}",  # Code file
-            code_language,  # Language
-            f"./workspace/{os.path.basename(test_data_file)}",  # Test data file
-            "./workspace/output.json",  # Output file
-            str(timeout)  # Timeout in seconds
-        ]
-
-        # Run the Docker container
-        subprocess.run(docker_cmd, check=True)
-
-        # Read the output
-        with open(output_file, "r") as f:
-            evaluation_results = json.load(f)
+        # The compiled test plan for the question's current suite, shared
+        # by every evaluation of that question
+        suite_version, test_data = get_test_plan(question)
+
+        # Reuse the result if this code was already scored against this test
+        # suite. A profile reports source lines, so it is only reused for the
+        # same source, not for a reformatted copy
+        cache_key = build_cache_key(code_language, code_submission, suite_version,
+                                    exact=bool(test_data.get('profile')))
+        cached = get_cached_result(cache_key)
+
+        if cached is not None:
+            logger.info(f"Evaluation cache hit for assessment {assessment.id}")
+            evaluation_results = cached_results(cached)
+        else:
+            # Overall limit (in seconds) is a backstop for the per-test limits,
+            # leaving room for loading the submission and the schema
+            timeout = 30 + test_data['test_timeout'] * count_test_cases(test_data)
+            if test_data.get('profile') and code_language == 'python':
+                # The profiled replay of the slowest test case
+                timeout += test_data['test_timeout']
+            if test_data.get('scaling'):
+                timeout += test_data['scaling'].get('time_budget', 10)
+
+            # Run the submission on a warm evaluator daemon from the pool,
+            # consuming its records as each test case completes
+            records = get_evaluator_pool().stream(
+                code_language,
+                code_submission,
+                test_data,
+                timeout,
+            )
+            try:
+                evaluation_results = consume_records(assessment, records)
+            finally:
+                records.close()
+            store_result(cache_key, code_language, question, suite_version, evaluation_results)
 
         # Update assessment with results
         assessment.evaluation_status = 'EVALUATED'
@@ -193,8 +169,18 @@ def evaluate_submission(assessment: Assessment) -> Dict[str, Any]:
         assessment.evaluation_completed_at = timezone.now()
         assessment.save()
 
-        # Clean up
-        shutil.rmtree(temp_dir)
+        return evaluation_results
+
+    except EvaluationAborted as e:
+        logger.warning(f"Evaluation of assessment {assessment.id} aborted: {e}")
+
+        # Keep whatever test cases completed before the failure
+        evaluation_results = dict(e.record, test_results=e.test_results)
+        evaluation_results.pop('type', None)
+        assessment.evaluation_status = 'FAILED'
+        assessment.evaluation_results = evaluation_results
+        assessment.evaluation_completed_at = timezone.now()
+        assessment.save()
 
         return evaluation_results
 
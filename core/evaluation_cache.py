@@ -0,0 +1,133 @@
+import ast
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import CodingQuestion, EvaluationCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_submission(language: str, code: str) -> str:
+    """
+    Normalize a submission so formatting-only edits map to the same cache key.
+
+    Python is reduced to its AST dump, which drops comments, blank lines and
+    layout. Other languages only have line endings and trailing whitespace
+    normalized, since their whitespace can be significant inside literals.
+    """
+    code = code or ''
+    if language == 'python':
+        try:
+            return ast.dump(ast.parse(code), annotate_fields=False, include_attributes=False)
+        except (SyntaxError, ValueError):
+            # Unparseable code still gets a stable key
+            pass
+
+    lines = [line.rstrip() for line in code.replace('\r\n', '\n').replace('\r', '\n').split('\n')]
+    return '\n'.join(lines).strip('\n')
+
+
+def test_suite_version(test_data: Dict[str, Any]) -> str:
+    """Content hash of the test data the submission is scored against."""
+    canonical = json.dumps(test_data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def build_cache_key(language: str, code: str, suite_version: str, exact: bool = False) -> str:
+    """
+    Cache key for a submission; the evaluator image is included so a rebuilt image starts cold.
+    With exact, the key is on the source as written rather than normalized, for results that point
+    at its lines, such as a line profile.
+    """
+    source = (code or '') if exact else normalize_submission(language, code)
+    submission_hash = hashlib.sha256(source.encode('utf-8')).hexdigest()
+    material = '\0'.join([settings.EVALUATOR_IMAGE, language, submission_hash, suite_version])
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+def get_cached_result(cache_key: str) -> Optional[EvaluationCacheEntry]:
+    """Return the cache entry for the key, recording the hit, or None."""
+    entry = EvaluationCacheEntry.objects.filter(cache_key=cache_key).first()
+    if entry is None:
+        return None
+
+    if entry.last_used_at < timezone.now() - timezone.timedelta(days=settings.EVALUATION_CACHE_TTL_DAYS):
+        entry.delete()
+        return None
+
+    EvaluationCacheEntry.objects.filter(pk=entry.pk).update(
+        hit_count=F('hit_count') + 1,
+        last_used_at=timezone.now(),
+    )
+    return entry
+
+
+def cached_results(entry: EvaluationCacheEntry) -> Dict[str, Any]:
+    """
+    The results of a cache entry for reuse by another submission. Test
+    tracebacks are dropped, since they quote the lines of the submission
+    that was evaluated and a hit may come from one only formatted alike.
+    """
+    evaluation_results = dict(entry.evaluation_results)
+    evaluation_results['test_results'] = [
+        {name: value for name, value in test.items() if name != 'traceback'}
+        for test in evaluation_results.get('test_results', [])
+    ]
+    return evaluation_results
+
+
+def store_result(cache_key: str, language: str, question: Optional[CodingQuestion], suite_version: str,
+                 evaluation_results: Dict[str, Any]) -> None:
+    """
+    Cache a successful evaluation and evict entries past the size or age limits.
+    Errors and timeouts are not cached since they may be transient.
+    """
+    if evaluation_results.get('status') != 'success':
+        return
+
+    EvaluationCacheEntry.objects.update_or_create(
+        cache_key=cache_key,
+        defaults={
+            'language': language,
+            'question': question,
+            'test_suite_version': suite_version,
+            'evaluation_results': evaluation_results,
+            'evaluation_score': evaluation_results.get('evaluation_score', 0),
+            'last_used_at': timezone.now(),
+        }
+    )
+    evict_entries()
+
+
+def evict_entries() -> int:
+    """
+    Drop entries unused for longer than the TTL, then the least recently
+    used entries beyond the size limit. Returns the number removed.
+    """
+    cutoff = timezone.now() - timezone.timedelta(days=settings.EVALUATION_CACHE_TTL_DAYS)
+    removed, _ = EvaluationCacheEntry.objects.filter(last_used_at__lt=cutoff).delete()
+
+    max_entries = settings.EVALUATION_CACHE_MAX_ENTRIES
+    oldest_kept = (EvaluationCacheEntry.objects.order_by('-last_used_at')
+                   .values_list('last_used_at', flat=True)[max_entries:max_entries + 1])
+    if oldest_kept:
+        trimmed, _ = EvaluationCacheEntry.objects.filter(last_used_at__lte=oldest_kept[0]).delete()
+        removed += trimmed
+
+    if removed:
+        logger.info(f"Evicted {removed} evaluation cache entries")
+    return removed
+
+
+def invalidate_question(question: CodingQuestion) -> int:
+    """Drop every cached result for a question. Returns the number removed."""
+    removed, _ = EvaluationCacheEntry.objects.filter(question=question).delete()
+    if removed:
+        logger.info(f"Invalidated {removed} evaluation cache entries for question {question.id}")
+    return removed
@@ -0,0 +1,317 @@
+import json
+import logging
+import os
+import select
+import threading
+import time
+import uuid
+import atexit
+import subprocess
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# Longest record line accepted from an evaluator daemon
+MAX_RECORD_BYTES = 2 * 1024 * 1024
+
+# Record types that end a job's stream
+TERMINAL_RECORD_TYPES = ('result', 'error', 'timeout')
+
+# Seconds a SQL container may take to build the templates of the known schemas
+PREPARE_TIMEOUT = 300
+
+
+class ContainerError(Exception):
+    """Raised when a pooled evaluator container cannot run a job."""
+
+
+class PooledContainer:
+    """
+    A pre-started, network-isolated evaluator container owned by the pool,
+    with its evaluator daemon attached over `docker exec -i`.
+    """
+
+    def __init__(self, container_id: str, language: str, server: subprocess.Popen):
+        self.container_id = container_id
+        self.language = language
+        self.server = server
+        self.created_at = time.monotonic()
+        self._buffer = b''
+
+    def send(self, message: Dict[str, Any]) -> None:
+        """Write one job line to the evaluator daemon."""
+        data = memoryview(json.dumps(message).encode('utf-8') + b'\n')
+        while data:
+            written = os.write(self.server.stdin.fileno(), data)
+            data = data[written:]
+
+    def receive(self, timeout: float) -> Dict[str, Any]:
+        """Read one record line from the evaluator daemon, waiting at most `timeout` seconds."""
+        deadline = time.monotonic() + timeout
+        while b'\n' not in self._buffer:
+            if len(self._buffer) > MAX_RECORD_BYTES:
+                raise ContainerError("Evaluator daemon sent an oversized record")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise ContainerError("Evaluator container did not respond in time")
+            ready, _, _ = select.select([self.server.stdout], [], [], remaining)
+            if not ready:
+                continue
+            chunk = os.read(self.server.stdout.fileno(), 65536)
+            if not chunk:
+                raise ContainerError("Evaluator daemon exited unexpectedly")
+            self._buffer += chunk
+
+        line, self._buffer = self._buffer.split(b'\n', 1)
+        return json.loads(line)
+
+    def is_stale(self, max_age: int) -> bool:
+        """Check if the container has waited idle past its age cap."""
+        return bool(max_age) and time.monotonic() - self.created_at >= max_age
+
+
+class EvaluatorContainerPool:
+    """
+    Keeps a small number of warm evaluator containers per language so a
+    submission does not pay container creation and service startup.
+
+    Each container runs the evaluator daemon for its language, already
+    initialised, so jobs also skip interpreter startup. A container runs a
+    single job and is removed when it is checked in: a submission can leave
+    processes or files behind that no cleanup inside the container can be
+    trusted to find, so candidates never share one. Idle containers older
+    than `max_age` seconds are replaced before use.
+
+    A language's idle containers are first started by its first checkout,
+    so processes that never evaluate a submission, such as workers that
+    only send email or import candidates, start none.
+
+    SQL containers build a template database for each schema returned by
+    `sql_schemas` before they join the idle set, so their job only clones
+    the template instead of loading the schema.
+    """
+
+    LANGUAGES = ('python', 'javascript', 'sql')
+
+    def __init__(self, image: str, size: int = 2, max_age: int = 1800, cpus: str = '2',
+                 memory: str = '512m', sql_schemas: Optional[Callable[[], List[str]]] = None):
+        self.image = image
+        self.size = size
+        self.max_age = max_age
+        self.cpus = cpus
+        self.memory = memory
+        self.sql_schemas = sql_schemas
+        self._idle: Dict[str, List[PooledContainer]] = {language: [] for language in self.LANGUAGES}
+        # Containers being started for the idle set, counted against its size
+        self._pending: Dict[str, int] = {language: 0 for language in self.LANGUAGES}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _start_container(self, language: str) -> PooledContainer:
+        """Start a detached container and attach its evaluator daemon."""
+        docker_cmd = [
+            "docker", "run", "-d", "--rm",
+            "--network=none",  # Disable network access
+            f"--cpus={self.cpus}",  # Limit CPU usage
+            f"--memory={self.memory}",  # Limit memory usage
+            "--pids-limit=256",
+            "--label", "hushhush.evaluator.pool=1",
+            self.image,
+            "idle", language,
+        ]
+        result = subprocess.run(docker_cmd, check=True, capture_output=True, text=True, timeout=60)
+        container_id = result.stdout.strip()
+        server = subprocess.Popen(
+            ["docker", "exec", "-i", container_id, "/entrypoint.sh", "serve", language],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0,
+        )
+        container = PooledContainer(container_id, language, server)
+        logger.info(f"Started pooled {language} evaluator container {container.container_id[:12]}")
+        return container
+
+    def _prepare(self, container: PooledContainer) -> None:
+        """Have a fresh SQL container build the templates of the known schemas."""
+        try:
+            schemas = self.sql_schemas()
+        finally:
+            # Runs on a pool thread, which would otherwise keep its connection open
+            connection.close()
+        if not schemas:
+            return
+
+        job_id = uuid.uuid4().hex
+        container.send({'id': job_id, 'prepare': schemas, 'timeout': PREPARE_TIMEOUT})
+        deadline = time.monotonic() + PREPARE_TIMEOUT + 15
+        while True:
+            record = container.receive(max(deadline - time.monotonic(), 0))['record']
+            if record.get('type') in TERMINAL_RECORD_TYPES:
+                break
+        if record.get('status') != 'success' or record.get('failed'):
+            logger.warning(f"SQL evaluator container {container.container_id[:12]} could not prepare every "
+                           f"schema template: {record.get('message', record.get('failed'))}")
+
+    def _destroy(self, container: PooledContainer) -> None:
+        """Remove a container, ignoring errors for containers that are already gone."""
+        container.server.kill()
+        subprocess.run(
+            ["docker", "rm", "-f", container.container_id],
+            capture_output=True, timeout=30,
+        )
+        logger.info(f"Removed {container.language} evaluator container {container.container_id[:12]}")
+
+    def _replenish(self, language: str) -> None:
+        """
+        Top up the idle containers for a language in the background. Each
+        slot is reserved under the lock before its container is started, so
+        concurrent top-ups never start more than the pool size.
+        """
+        def fill():
+            while True:
+                with self._lock:
+                    if self._closed or len(self._idle[language]) + self._pending[language] >= self.size:
+                        return
+                    self._pending[language] += 1
+                container = None
+                try:
+                    container = self._start_container(language)
+                    if language == 'sql' and self.sql_schemas:
+                        self._prepare(container)
+                except Exception:
+                    logger.exception(f"Failed to start {language} evaluator container")
+                    if container is not None:
+                        self._destroy(container)
+                    with self._lock:
+                        self._pending[language] -= 1
+                    return
+                with self._lock:
+                    self._pending[language] -= 1
+                    if not self._closed:
+                        self._idle[language].append(container)
+                        continue
+                self._destroy(container)
+                return
+
+        threading.Thread(target=fill, daemon=True).start()
+
+    def checkout(self, language: str) -> PooledContainer:
+        """Take a warm container for the language, starting one if none is idle."""
+        if language not in self._idle:
+            raise ContainerError(f"Unsupported language: {language}")
+
+        stale = []
+        container = None
+        with self._lock:
+            idle = self._idle[language]
+            while idle:
+                candidate = idle.pop()
+                if candidate.is_stale(self.max_age):
+                    stale.append(candidate)
+                else:
+                    container = candidate
+                    break
+
+        for candidate in stale:
+            self._destroy(candidate)
+
+        if container is None:
+            container = self._start_container(language)
+
+        self._replenish(language)
+        return container
+
+    def checkin(self, container: PooledContainer) -> None:
+        """Remove a container after its job, off the caller's thread, and start a fresh one in its place."""
+        threading.Thread(target=self._destroy, args=(container,), daemon=True).start()
+        self._replenish(container.language)
+
+    def stream(self, language: str, code: str, test_data: Dict[str, Any], timeout: int) -> Iterator[Dict[str, Any]]:
+        """
+        Evaluate a submission in a pooled container, yielding the evaluator's
+        records as they arrive. The last record yielded has a terminal type.
+
+        """
+        job_id = uuid.uuid4().hex
+        container = self.checkout(language)
+        finished = False
+        try:
+            container.send({
+                'id': job_id,
+                'code': code,
+                'test_data': test_data,
+                'timeout': timeout,
+            })
+            # Leave room for the daemon's own timeout to fire first
+            deadline = time.monotonic() + timeout + 15
+            while not finished:
+                message = container.receive(max(deadline - time.monotonic(), 0))
+                if message.get('id') != job_id:
+                    raise ContainerError("Evaluator daemon answered a different job")
+                record = message['record']
+                finished = record.get('type') in TERMINAL_RECORD_TYPES
+                yield record
+        finally:
+            self.checkin(container)
+
+    def shutdown(self) -> None:
+        """Stop all idle containers. Containers checked out at the time are removed on checkin."""
+        with self._lock:
+            self._closed = True
+            containers = [c for idle in self._idle.values() for c in idle]
+            for idle in self._idle.values():
+                idle.clear()
+        for container in containers:
+            self._destroy(container)
+
+
+def sql_schemas() -> List[str]:
+    """The schemas of the questions' current test plans."""
+    from .models import CodingQuestion
+    from .test_plans import get_test_plan
+
+    schemas = []
+    for question in CodingQuestion.objects.all():
+        try:
+            schema_sql = get_test_plan(question)[1].get('schema_sql')
+        except Exception:
+            # Its evaluations report the broken suite
+            logger.exception(f"Failed to compile the test plan of question {question.id}")
+            continue
+        if schema_sql and schema_sql not in schemas:
+            schemas.append(schema_sql)
+    return schemas
+
+
+_pool: Optional[EvaluatorContainerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_evaluator_pool() -> EvaluatorContainerPool:
+    """Return the process-wide evaluator container pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = EvaluatorContainerPool(
+                image=settings.EVALUATOR_IMAGE,
+                size=settings.EVALUATOR_POOL_SIZE,
+                max_age=settings.EVALUATOR_CONTAINER_MAX_AGE,
+                cpus=settings.EVALUATOR_CONTAINER_CPUS,
+                memory=settings.EVALUATOR_CONTAINER_MEMORY,
+                sql_schemas=sql_schemas,
+            )
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def shutdown_evaluator_pool() -> None:
+    """Stop the process-wide pool if one was created."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
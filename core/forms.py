@@ -1,6 +1,20 @@
 from django import forms
 from django.contrib.auth import get_user_model
-from .models import Candidate, User
+from .models import Candidate, Skill, User
+
+
+class SkillsField(forms.CharField):
+    """
+    Skills entered as comma separated names, cleaned to a list of distinct names.
+    """
+
+    def prepare_value(self, value):
+        if isinstance(value, (list, tuple)):
+            return ', '.join(value)
+        return value
+
+    def to_python(self, value):
+        return Skill.parse(super().to_python(value))
 
 
 class AddCandidateForm(forms.Form):
@@ -8,8 +22,8 @@ class AddCandidateForm(forms.Form):
     email = forms.EmailField()
     full_name = forms.CharField(max_length=255, required=False)
     source = forms.ChoiceField(choices=Candidate.SOURCE_CHOICES, required=True)
-    source_score = forms.IntegerField(min_value=0, required=False, initial=0)
-    skills = forms.CharField(widget=forms.Textarea, required=False)
+    source_score = forms.FloatField(min_value=0, required=False, initial=0)
+    skills = SkillsField(widget=forms.Textarea, required=False)
 
     def clean_username(self):
         username = self.cleaned_data['username']
@@ -25,9 +39,16 @@ class AddCandidateForm(forms.Form):
 
 
 class CandidateForm(forms.ModelForm):
+    skills = SkillsField(required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.initial['skills'] = [skill.name for skill in self.instance.skills.all()]
+
     class Meta:
         model = Candidate
-        fields = ['skills', 'resume_url', 'interview_status', 'interview_notes']
+        fields = ['resume_url', 'interview_status', 'interview_notes']
         widgets = {
             'interview_notes': forms.Textarea(attrs={'rows': 4}),
         }
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from core.utils.cache_utils import cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Show cache hit and miss counters per namespace"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after printing them')
+
+    def handle(self, *args, **options):
+        for namespace, stats in cache_stats().items():
+            ratio = 'n/a' if stats['hit_ratio'] is None else f"{stats['hit_ratio']:.1%}"
+            self.stdout.write(f"{namespace}: version {stats['version']}, {stats['hits']} hits, "
+                              f"{stats['misses']} misses, hit ratio {ratio}")
+
+        if options['reset']:
+            reset_cache_stats()
+            self.stdout.write(self.style.SUCCESS('Cache counters reset'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core.utils.candidate_dedup import SUGGEST_THRESHOLD, find_duplicates
+
+
+class Command(BaseCommand):
+    help = "Find candidates imported from different sources who are likely the same person"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=float, default=SUGGEST_THRESHOLD,
+                            help='Name similarity from which a pair is suggested for review')
+        parser.add_argument('--auto-merge-threshold', type=float, default=None,
+                            help='Name similarity from which a pair is merged without review')
+
+    def handle(self, *args, **options):
+        stats = find_duplicates(options['threshold'], options['auto_merge_threshold'])
+        for error in stats.merge_errors:
+            self.stdout.write(self.style.WARNING(f'Not merged: {error}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Compared {stats.pairs_compared} pairs from {stats.blocks} blocks of {stats.profiles} candidates '
+            f'in {stats.elapsed:.1f}s: {stats.suggested} suggested, {stats.merged} merged'
+        ))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Candidate, DashboardStats
+from core.utils import cache_utils
+
+
+class Command(BaseCommand):
+    help = "Rebuild the cached latest assessment columns on every candidate"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Candidates updated per transaction')
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        values = Candidate.latest_assessment_values()
+        total_updated = 0
+        last_id = 0
+
+        # Walk the table in id ranges so no single transaction locks every row
+        while True:
+            ids = list(Candidate.objects.filter(pk__gt=last_id).order_by('pk')
+                       .values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+
+            with transaction.atomic():
+                total_updated += Candidate.objects.filter(pk__in=ids).update(**values)
+            last_id = ids[-1]
+
+        # The bulk updates bypass the per-transition counter deltas
+        DashboardStats.reconcile()
+        cache_utils.invalidate(cache_utils.DASHBOARD)
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt latest assessment for {total_updated} candidates'))
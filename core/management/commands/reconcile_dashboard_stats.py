@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.models import DashboardStats
+
+
+class Command(BaseCommand):
+    help = "Recount the manager dashboard counters from the candidate table"
+
+    def handle(self, *args, **options):
+        counts = DashboardStats.reconcile()
+        for field, value in counts.items():
+            self.stdout.write(f'{field}: {value}')
+        self.stdout.write(self.style.SUCCESS('Dashboard stats reconciled'))
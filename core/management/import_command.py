@@ -0,0 +1,80 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.utils.candidate_dedup import find_duplicates
+from core.utils.candidate_import import BATCH_SIZE, import_candidates
+from core.utils.sharded_import import SHARD_SIZE, import_sharded
+
+
+class CandidateImportCommand(BaseCommand):
+    """
+    Base of the commands importing candidates from a CSV or Parquet export.
+    Subclasses set the default file and the CandidateSource reading it.
+    """
+    default_file = None
+    source = None
+
+    def progress(self, stats):
+        self.stdout.write(f"Imported {stats.rows} rows ({stats.rows_per_second:.0f} rows/s)...")
+
+    # adding via file name during testing
+    def add_arguments(self, parser):
+        parser.add_argument('--file', type=str, help='Path to the CSV or Parquet file')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='Rows written per transaction')
+        parser.add_argument('--incremental', action='store_true',
+                            help='Only write the rows that are new or changed since the last import')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Worker processes importing shards of the file in parallel; '
+                                 'a sharded import resumes from its last completed shard when rerun')
+        parser.add_argument('--shard-size', type=int, default=SHARD_SIZE // (1024 * 1024),
+                            help='Megabytes of the file per shard when importing with several workers')
+        parser.add_argument('--find-duplicates', action='store_true',
+                            help='Afterwards, suggest candidates from other sources who are likely the same people')
+
+    def handle(self, *args, **options):
+        file_path = options.get('file')
+        if not file_path:
+            # Default path if not specified
+            file_path = os.path.join(settings.BASE_DIR, 'candidate_data', self.default_file)
+
+        if not os.path.exists(file_path):
+            self.stdout.write(self.style.ERROR(f'File not found: {file_path}'))
+            return
+
+        batch_size = max(options['batch_size'], 1)
+        if options['workers'] > 1:
+            stats = import_sharded(
+                self.source, file_path, options['workers'],
+                shard_size=max(options['shard_size'], 1) * 1024 * 1024,
+                batch_size=batch_size, progress=self.progress, incremental=options['incremental'],
+            )
+            if stats.resumed_shards:
+                self.stdout.write(f'Resumed an earlier run: {stats.resumed_shards} of {stats.shards} '
+                                  f'shards were already imported')
+        else:
+            stats = import_candidates(self.source.read(file_path), batch_size=batch_size, progress=self.progress,
+                                      incremental=options['incremental'])
+
+        for source, external_ids in stats.vanished.items():
+            shown = external_ids if options['verbosity'] > 1 else external_ids[:10]
+            self.stdout.write(self.style.WARNING(
+                f'{len(external_ids)} {source} records are no longer in the export: '
+                f'{", ".join(shown)}{", ..." if len(shown) < len(external_ids) else ""}'
+            ))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully imported {stats.rows - stats.skipped} candidates '
+            f'({stats.candidates_created} new, {stats.candidates_updated} updated, '
+            f'{stats.unchanged} unchanged, {stats.skipped} skipped) '
+            f'in {stats.elapsed:.1f}s, {stats.rows_per_second:.0f} rows/s'
+        ))
+
+        if options['find_duplicates']:
+            dedup = find_duplicates()
+            self.stdout.write(self.style.SUCCESS(
+                f'Found {dedup.suggested} likely duplicate candidates among {dedup.profiles} '
+                f'in {dedup.elapsed:.1f}s; review them in the admin'
+            ))
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-18 06:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_remove_candidate_years_of_experience'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EvaluationCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cache_key', models.CharField(max_length=64, unique=True)),
+                ('language', models.CharField(max_length=50)),
+                ('test_suite_version', models.CharField(max_length=64)),
+                ('evaluation_results', models.JSONField()),
+                ('evaluation_score', models.FloatField(blank=True, null=True)),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('question', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='evaluation_cache_entries', to='core.codingquestion')),
+            ],
+            options={
+                'ordering': ['-last_used_at'],
+            },
+        ),
+    ]
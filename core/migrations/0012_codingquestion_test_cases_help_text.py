@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 06:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_evaluationcacheentry'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='codingquestion',
+            name='test_cases',
+            field=models.JSONField(blank=True, help_text='Test suite for this question: a list of test cases, or an object with function_name, test_cases or test_groups, schema_sql/schema_file and scaling. Leave empty to use the default suite for the question type.', null=True),
+        ),
+    ]
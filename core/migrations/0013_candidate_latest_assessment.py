@@ -0,0 +1,55 @@
+# Generated by Django 5.1.6 on 2026-10-18 06:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def populate_latest_assessment(apps, schema_editor):
+    Assessment = apps.get_model('core', 'Assessment')
+    Candidate = apps.get_model('core', 'Candidate')
+
+    latest = Assessment.objects.filter(candidate=OuterRef('pk')).order_by('-created_at', '-id')
+    Candidate.objects.update(
+        latest_assessment=Subquery(latest.values('id')[:1]),
+        latest_status=Subquery(latest.values('status')[:1]),
+        latest_evaluation_status=Subquery(latest.values('evaluation_status')[:1]),
+        latest_score=Subquery(latest.values('score')[:1]),
+        latest_assessment_at=Subquery(latest.values('created_at')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_codingquestion_test_cases_help_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidate',
+            name='latest_assessment',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.assessment'),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='latest_assessment_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='latest_evaluation_status',
+            field=models.CharField(blank=True, max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='latest_score',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='latest_status',
+            field=models.CharField(blank=True, db_index=True, max_length=20, null=True),
+        ),
+        migrations.RunPython(populate_latest_assessment, migrations.RunPython.noop),
+    ]
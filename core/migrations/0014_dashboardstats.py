@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-18 06:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_candidate_latest_assessment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_candidates', models.IntegerField(default=0)),
+                ('invited_candidates', models.IntegerField(default=0)),
+                ('in_progress_assessments', models.IntegerField(default=0)),
+                ('completed_assessments', models.IntegerField(default=0)),
+                ('scored_assessments', models.IntegerField(default=0)),
+                ('accepted_for_interview', models.IntegerField(default=0)),
+                ('rejected_candidates', models.IntegerField(default=0)),
+                ('reconciled_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'dashboard stats',
+            },
+        ),
+    ]
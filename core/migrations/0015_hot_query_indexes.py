@@ -0,0 +1,64 @@
+# Generated by Django 5.1.6 on 2026-10-18 06:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_dashboardstats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='candidate',
+            name='latest_assessment_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='candidate',
+            name='latest_score',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='candidate',
+            name='latest_status',
+            field=models.CharField(blank=True, max_length=20, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='assessment',
+            index=models.Index(models.F('candidate'), models.OrderBy(models.F('created_at'), descending=True), models.OrderBy(models.F('id'), descending=True), name='assessment_latest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assessment',
+            index=models.Index(condition=models.Q(('status__in', ['DRAFT', 'SENT', 'ACCEPTED', 'STARTED'])), fields=['candidate'], name='assessment_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidate',
+            index=models.Index(fields=['latest_status', 'id'], name='candidate_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidate',
+            index=models.Index(models.OrderBy(models.F('latest_score'), descending=True, nulls_last=True), models.F('id'), name='candidate_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidate',
+            index=models.Index(models.OrderBy(models.F('latest_assessment_at'), nulls_first=True), models.F('id'), name='candidate_assessed_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidate',
+            index=models.Index(fields=['interview_status', 'id'], name='candidate_interview_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidate',
+            index=models.Index(fields=['source', 'id'], name='candidate_source_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidate',
+            index=models.Index(condition=models.Q(('latest_assessment__isnull', True)), fields=['id'], name='candidate_unassessed_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='assessment',
+            constraint=models.UniqueConstraint(fields=('assessment_url_token',), name='assessment_url_token_unique'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.1.6 on 2026-10-18 06:44
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+from django.db.models import Func, OuterRef, Subquery, Value
+from django.db.models.functions import Concat, Lower
+
+
+def populate_search(apps, schema_editor):
+    Candidate = apps.get_model('core', 'Candidate')
+    User = apps.get_model('core', 'User')
+
+    user = User.objects.filter(pk=OuterRef('user_id'))
+    full_name = Subquery(user.values('full_name')[:1])
+    username = Subquery(user.values('username')[:1])
+    email = Subquery(user.values('email')[:1])
+
+    def words(expression):
+        return Func(expression, Value('[^[:alnum:]]+'), Value(' '), Value('g'),
+                    function='REGEXP_REPLACE', output_field=models.TextField())
+
+    Candidate.objects.update(
+        search_document=Lower(Concat(full_name, Value(' '), username, Value(' '), email,
+                                     Value(' '), 'skills', output_field=models.TextField())),
+        search_vector=(
+            SearchVector(words(full_name), words(username), weight='A', config='simple')
+            + SearchVector(words(email), weight='B', config='simple')
+            + SearchVector(words('skills'), weight='C', config='simple')
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_hot_query_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='candidate',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        # Filled before the indexes are built, which is faster than
+        # maintaining them row by row
+        migrations.RunPython(populate_search, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='candidate',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='candidate_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidate',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_document'], name='candidate_search_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 5.1.6 on 2026-10-18 06:48
+
+import django.db.models.deletion
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+from django.db.models import Func, OuterRef, Subquery, Value
+from django.db.models.functions import Concat, Lower
+
+PLACEHOLDER_NAMES = {'none', 'n/a'}
+BATCH_SIZE = 5000
+
+
+def normalize(name):
+    return ' '.join(name.split()).lower()
+
+
+def convert_skills_to_tags(apps, schema_editor):
+    Candidate = apps.get_model('core', 'Candidate')
+    CandidateSkill = apps.get_model('core', 'CandidateSkill')
+    Skill = apps.get_model('core', 'Skill')
+
+    # Parse every comma joined skills value, keeping the oldest spelling of each skill
+    candidate_skills = []
+    names = {}
+    for candidate_id, text in Candidate.objects.exclude(skills='').order_by('id').values_list('id', 'skills').iterator():
+        keys = []
+        for name in text.split(','):
+            name = ' '.join(name.split())[:100]
+            key = normalize(name)
+            if key and key not in PLACEHOLDER_NAMES and key not in keys:
+                keys.append(key)
+                names.setdefault(key, name)
+        candidate_skills.extend((candidate_id, key) for key in keys)
+
+    Skill.objects.bulk_create([Skill(name=name, normalized_name=key) for key, name in names.items()],
+                              batch_size=BATCH_SIZE)
+    skill_ids = dict(Skill.objects.values_list('normalized_name', 'id'))
+    CandidateSkill.objects.bulk_create(
+        [CandidateSkill(candidate_id=candidate_id, skill_id=skill_ids[key]) for candidate_id, key in candidate_skills],
+        batch_size=BATCH_SIZE,
+    )
+
+    # Rebuild the search columns from the tags, which drop the placeholders
+    User = apps.get_model('core', 'User')
+    user = User.objects.filter(pk=OuterRef('user_id'))
+    full_name = Subquery(user.values('full_name')[:1])
+    username = Subquery(user.values('username')[:1])
+    email = Subquery(user.values('email')[:1])
+    skills = Subquery(
+        CandidateSkill.objects.filter(candidate=OuterRef('pk')).order_by().values('candidate')
+        .annotate(names=StringAgg('skill__name', ' ')).values('names')[:1]
+    )
+
+    def words(expression):
+        return Func(expression, Value('[^[:alnum:]]+'), Value(' '), Value('g'),
+                    function='REGEXP_REPLACE', output_field=models.TextField())
+
+    Candidate.objects.update(
+        search_document=Lower(Concat(full_name, Value(' '), username, Value(' '), email,
+                                     Value(' '), skills, output_field=models.TextField())),
+        search_vector=(
+            SearchVector(words(full_name), words(username), weight='A', config='simple')
+            + SearchVector(words(email), weight='B', config='simple')
+            + SearchVector(words(skills), weight='C', config='simple')
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_candidate_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('normalized_name', models.CharField(editable=False, max_length=100, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CandidateSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('candidate', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.candidate')),
+                ('skill', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.skill')),
+            ],
+        ),
+        migrations.RunPython(convert_skills_to_tags, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='candidate',
+            name='skills',
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='skills',
+            field=models.ManyToManyField(blank=True, related_name='candidates', through='core.CandidateSkill', to='core.skill'),
+        ),
+        migrations.AddIndex(
+            model_name='candidateskill',
+            index=models.Index(fields=['skill', 'candidate'], name='candidate_skill_lookup_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='candidateskill',
+            constraint=models.UniqueConstraint(fields=('candidate', 'skill'), name='candidate_skill_unique'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-18 07:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_skill_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SourceRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('GITHUB', 'GitHub'), ('STACK_OVERFLOW', 'Stack Overflow'), ('OTHER', 'Other')], max_length=50)),
+                ('external_id', models.CharField(max_length=100)),
+                ('fingerprint', models.CharField(max_length=32)),
+                ('imported_at', models.DateTimeField()),
+                ('vanished_at', models.DateTimeField(blank=True, null=True)),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='source_records', to='core.candidate')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('source', 'external_id'), name='source_record_unique')],
+            },
+        ),
+    ]
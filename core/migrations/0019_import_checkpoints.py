@@ -0,0 +1,34 @@
+# Generated by Django 5.1.6 on 2026-10-18 07:03
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_source_records'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('GITHUB', 'GitHub'), ('STACK_OVERFLOW', 'Stack Overflow'), ('OTHER', 'Other')], max_length=50)),
+                ('path', models.CharField(max_length=500)),
+                ('import_key', models.CharField(max_length=64)),
+                ('shard', models.PositiveIntegerField()),
+                ('rows', models.PositiveIntegerField(default=0)),
+                ('skipped', models.PositiveIntegerField(default=0)),
+                ('users_created', models.PositiveIntegerField(default=0)),
+                ('candidates_created', models.PositiveIntegerField(default=0)),
+                ('candidates_updated', models.PositiveIntegerField(default=0)),
+                ('unchanged', models.PositiveIntegerField(default=0)),
+                ('completed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('import_key', 'shard'), name='import_checkpoint_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-18 07:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_import_checkpoints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DuplicateCandidateSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('similarity', models.FloatField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending Review'), ('DISMISSED', 'Dismissed')], default='PENDING', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.candidate')),
+                ('duplicate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.candidate')),
+            ],
+            options={
+                'ordering': ['-similarity', 'id'],
+                'constraints': [models.UniqueConstraint(fields=('candidate', 'duplicate'), name='duplicate_suggestion_unique')],
+            },
+        ),
+    ]
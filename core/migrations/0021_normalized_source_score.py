@@ -0,0 +1,45 @@
+# Generated by Django 5.1.6 on 2026-10-18 07:28
+
+from django.db import migrations, models
+
+
+def populate_normalized_scores(apps, schema_editor):
+    schema_editor.execute(
+        'UPDATE core_candidate SET normalized_score = ranked.percentile '
+        'FROM (SELECT id, PERCENT_RANK() OVER (PARTITION BY source ORDER BY source_score) AS percentile '
+        'FROM core_candidate) AS ranked '
+        'WHERE core_candidate.id = ranked.id'
+    )
+
+
+def reset_source_fingerprints(apps, schema_editor):
+    # GitHub scores were truncated to integers, so the next incremental
+    # import must write every row again, unchanged or not
+    SourceRecord = apps.get_model('core', 'SourceRecord')
+    SourceRecord.objects.update(fingerprint='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_duplicate_suggestions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidate',
+            name='normalized_score',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='candidate',
+            name='source_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='candidate',
+            index=models.Index(models.OrderBy(models.F('normalized_score'), descending=True, nulls_last=True), models.F('id'), name='candidate_source_rank_idx'),
+        ),
+        migrations.RunPython(populate_normalized_scores, migrations.RunPython.noop),
+        migrations.RunPython(reset_source_fingerprints, migrations.RunPython.noop),
+    ]
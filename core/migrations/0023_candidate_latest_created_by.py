@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-18 07:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def populate_latest_created_by(apps, schema_editor):
+    Assessment = apps.get_model('core', 'Assessment')
+    Candidate = apps.get_model('core', 'Candidate')
+
+    latest = Assessment.objects.filter(candidate=OuterRef('pk')).order_by('-created_at', '-id')
+    Candidate.objects.update(latest_created_by=Subquery(latest.values('created_by')[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_outbound_emails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidate',
+            name='latest_created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.hiringmanager'),
+        ),
+        migrations.RunPython(populate_latest_created_by, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,20 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
-from django.db import models
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import connection, models, transaction
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 import json
+from typing import Iterable, List, Optional
 from django.core.exceptions import ValidationError
-from django.db.models import signals
+from collections import Counter
+from django.db.models import Count, F, Func, OuterRef, Q, Subquery, Value, signals
+from django.db.models.functions import Concat, Lower
 from django.dispatch import receiver
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class CustomUserManager(BaseUserManager):
@@ -60,9 +69,82 @@ class User(AbstractUser):
 
     objects = CustomUserManager()
 
+    # Shown for candidates on the manager dashboard
+    DASHBOARD_FIELDS = ('username', 'full_name', 'email')
+
     def __str__(self):
         return self.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_dashboard_state = instance._dashboard_state()
+        return instance
+
+    def _dashboard_state(self):
+        return {name: self.__dict__.get(name) for name in self.DASHBOARD_FIELDS}
+
+    def save(self, *args, **kwargs):
+        # Read by the post_save signal that invalidates cached dashboard pages
+        self._dashboard_changed = (self._state.adding
+                                   or getattr(self, '_loaded_dashboard_state', None) != self._dashboard_state())
+        super().save(*args, **kwargs)
+        self._loaded_dashboard_state = self._dashboard_state()
+
+
+class Skill(models.Model):
+    """
+    A skill candidates are tagged with. Names are matched case-insensitively
+    through normalized_name, so "Python" and "python " are the same skill.
+    """
+    # Placeholders the importers wrote into the former free-text skills column
+    PLACEHOLDER_NAMES = {'none', 'n/a'}
+
+    name = models.CharField(max_length=100)
+    normalized_name = models.CharField(max_length=100, unique=True, editable=False)
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        self.normalized_name = self.normalize(self.name)
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        return ' '.join(name.split()).lower()
+
+    @classmethod
+    def parse(cls, text: str) -> List[str]:
+        """
+        Distinct skill names in a comma separated string, in their order,
+        without blanks and placeholders.
+        """
+        names = {}
+        for name in (text or '').split(','):
+            name = ' '.join(name.split())[:100]
+            key = cls.normalize(name)
+            if key and key not in cls.PLACEHOLDER_NAMES and key not in names:
+                names[key] = name
+        return list(names.values())
+
+    @classmethod
+    def for_names(cls, names: Iterable[str]) -> List['Skill']:
+        """
+        Skills with the given names, creating the ones that do not exist yet
+        with the first spelling given.
+        """
+        spellings = {}
+        for name in names:
+            spellings.setdefault(cls.normalize(name), ' '.join(name.split()))
+        spellings.pop('', None)
+        cls.objects.bulk_create([cls(name=name, normalized_name=key) for key, name in spellings.items()],
+                                ignore_conflicts=True)
+        return list(cls.objects.filter(normalized_name__in=spellings))
+
+    class Meta:
+        ordering = ['name']
+
 
 class Candidate(models.Model):
     """
@@ -76,10 +158,15 @@ class Candidate(models.Model):
 
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='candidate_profile')
     source = models.CharField(max_length=50, choices=SOURCE_CHOICES, default='DIRECT')
-    source_score = models.IntegerField(default=0)
+    source_score = models.FloatField(default=0)
+    # Percentile rank of source_score among the candidates of the same
+    # source, from 0 to 1, so scores on each source's own scale compare.
+    # Kept current by refresh_normalized_scores, which a save changing a
+    # score has run for the candidate's source once it commits.
+    normalized_score = models.FloatField(null=True, blank=True, editable=False)
     resume_url = models.URLField(blank=True, null=True)
     profile_completed = models.BooleanField(default=False)
-    skills = models.TextField(blank=True)
+    skills = models.ManyToManyField(Skill, through='CandidateSkill', related_name='candidates', blank=True)
     generated_password = models.CharField(max_length=255, blank=True, null=True, help_text=_(
         'Temporary storage for generated password. Clear after first login.'))
     created_at = models.DateTimeField(auto_now_add=True)
@@ -111,11 +198,312 @@ class Candidate(models.Model):
         default='ACTIVE',
     )
 
+    # Cached from the candidate's most recent assessment and kept current
+    # by Assessment.save, so the dashboard can filter and sort on columns
+    latest_assessment = models.ForeignKey('Assessment', on_delete=models.SET_NULL, null=True, blank=True,
+                                          related_name='+')
+    latest_status = models.CharField(max_length=20, null=True, blank=True)
+    latest_evaluation_status = models.CharField(max_length=20, null=True, blank=True)
+    latest_score = models.PositiveIntegerField(null=True, blank=True)
+    latest_assessment_at = models.DateTimeField(null=True, blank=True)
+    # Who created it; only they may act on it from the dashboard
+    latest_created_by = models.ForeignKey('HiringManager', on_delete=models.SET_NULL, null=True, blank=True,
+                                          related_name='+')
+
+    LATEST_ASSESSMENT_FIELDS = ('latest_assessment', 'latest_status', 'latest_evaluation_status',
+                                'latest_score', 'latest_assessment_at', 'latest_created_by')
+
+    # Search text over the user's name, username and email and the skills,
+    # kept current by refresh_search: lowercased for trigram matching and
+    # as a weighted tsvector for full-text matching
+    search_document = models.TextField(blank=True, default='', editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    SEARCH_FIELDS = ('search_document', 'search_vector')
+    RANK_FIELDS = ('normalized_score',)
+    # The candidate's own columns the manager dashboard shows, filters or sorts on
+    DASHBOARD_FIELDS = ('source', 'interview_status', 'interview_date', 'normalized_score')
+
     def __str__(self):
         return f"Candidate: {self.user.username}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_interview_status = instance.__dict__.get('interview_status')
+        instance._loaded_score = (instance.__dict__.get('source'), instance.__dict__.get('source_score'))
+        instance._loaded_dashboard_state = instance._dashboard_state()
+        return instance
+
+    def _dashboard_state(self):
+        return {name: self.__dict__.get(name) for name in self.DASHBOARD_FIELDS}
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+
+        refresh_search = kwargs.get('update_fields') is None
+        rescore = refresh_search and (adding or getattr(self, '_loaded_score', None)
+                                      != (self.source, self.source_score))
+        if rescore:
+            # Every percentile of the source moves, not just this one
+            sources = {self.source, getattr(self, '_loaded_score', (self.source, None))[0]}
+            transaction.on_commit(lambda: Candidate.request_rank_refresh(sources))
+
+        # The latest assessment, search and rank columns are only written by
+        # their refresh methods; a stale instance must not overwrite them
+        if not adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.LATEST_ASSESSMENT_FIELDS + self.SEARCH_FIELDS + self.RANK_FIELDS
+            ]
+
+        # Read by the post_save signal that invalidates cached dashboard pages
+        self._dashboard_changed = adding or getattr(self, '_loaded_dashboard_state', None) != self._dashboard_state()
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if refresh_search:
+                Candidate.refresh_search([self.pk])
+            if adding:
+                DashboardStats.record_transition(None, (self.latest_status, self.interview_status))
+            elif (hasattr(self, '_loaded_interview_status')
+                  and self._loaded_interview_status != self.interview_status):
+                DashboardStats.record_transition((None, self._loaded_interview_status),
+                                                 (None, self.interview_status))
+        self._loaded_interview_status = self.interview_status
+        self._loaded_score = (self.source, self.source_score)
+        self._loaded_dashboard_state = self._dashboard_state()
+
+    @staticmethod
+    def request_rank_refresh(sources: Iterable[str]) -> None:
+        """
+        Have a worker recompute the normalized scores of the given sources.
+        The publish is not retried, so a broker outage does not hold up the
+        request; the periodic refresh catches up on the sources it missed.
+        """
+        from core.tasks import refresh_normalized_scores
+        try:
+            refresh_normalized_scores.apply_async(args=[sorted(sources)], retry=False)
+        except Exception as e:
+            logger.warning(f"Could not start the normalized score refresh, leaving it to the periodic run: {str(e)}")
+
+    @classmethod
+    def refresh_normalized_scores(cls, sources: Optional[Iterable[str]] = None) -> int:
+        """
+        Recompute the normalized_score of every candidate, or of those of the
+        given sources, as the PERCENT_RANK of its source_score within its
+        source, in a single statement, writing only the rows whose rank
+        moved. Returns the number of rows written.
+        """
+        table = cls._meta.db_table
+        where, params = '', []
+        if sources is not None:
+            where, params = 'WHERE source = ANY(%s)', [list(sources)]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET normalized_score = ranked.percentile '
+                f'FROM (SELECT id, PERCENT_RANK() OVER (PARTITION BY source ORDER BY source_score) AS percentile '
+                f'FROM {table} {where}) AS ranked '
+                f'WHERE {table}.id = ranked.id AND {table}.normalized_score IS DISTINCT FROM ranked.percentile',
+                params
+            )
+            return cursor.rowcount
+
+    @staticmethod
+    def latest_assessment_values():
+        """
+        Subqueries computing the cached latest assessment columns from each
+        candidate's assessments, for use in a queryset update.
+        """
+        latest = Assessment.objects.filter(candidate=OuterRef('pk')).order_by('-created_at', '-id')
+        return {
+            'latest_assessment': Subquery(latest.values('id')[:1]),
+            'latest_status': Subquery(latest.values('status')[:1]),
+            'latest_evaluation_status': Subquery(latest.values('evaluation_status')[:1]),
+            'latest_score': Subquery(latest.values('score')[:1]),
+            'latest_assessment_at': Subquery(latest.values('created_at')[:1]),
+            'latest_created_by': Subquery(latest.values('created_by')[:1]),
+        }
+
+    def set_skills(self, names: Iterable[str]):
+        """
+        Replace the candidate's skills with the named ones, creating the
+        skills that do not exist yet.
+        """
+        self.skills.set(Skill.for_names(names))
+
+    @staticmethod
+    def search_values():
+        """
+        Expressions computing the search columns from the candidate's user
+        and skills, for use in a queryset update. Punctuation is turned into
+        spaces before building the tsvector, so the parts of an email or a
+        dotted username are separate words matching the search's prefixes.
+        """
+        user = User.objects.filter(pk=OuterRef('user_id'))
+        full_name = Subquery(user.values('full_name')[:1])
+        username = Subquery(user.values('username')[:1])
+        email = Subquery(user.values('email')[:1])
+        skills = Subquery(
+            CandidateSkill.objects.filter(candidate=OuterRef('pk')).order_by().values('candidate')
+            .annotate(names=StringAgg('skill__name', ' ')).values('names')[:1]
+        )
+
+        def words(expression):
+            return Func(expression, Value('[^[:alnum:]]+'), Value(' '), Value('g'),
+                        function='REGEXP_REPLACE', output_field=models.TextField())
+
+        return {
+            'search_document': Lower(Concat(full_name, Value(' '), username, Value(' '), email,
+                                            Value(' '), skills, output_field=models.TextField())),
+            'search_vector': (
+                SearchVector(words(full_name), words(username), weight='A', config='simple')
+                + SearchVector(words(email), weight='B', config='simple')
+                + SearchVector(words(skills), weight='C', config='simple')
+            ),
+        }
+
+    @classmethod
+    def refresh_search(cls, candidate_ids):
+        """
+        Recompute the search columns of the given candidates, from a list of
+        ids or a queryset of them.
+        """
+        cls.objects.filter(pk__in=candidate_ids).update(**cls.search_values())
+
+    @classmethod
+    def refresh_latest_assessment(cls, candidate_id):
+        """
+        Recompute the cached latest assessment columns of one candidate.
+        """
+        state = cls.objects.filter(pk=candidate_id).values_list('latest_status', 'interview_status')
+        with transaction.atomic():
+            # Lock the candidate row so concurrent assessment writes are
+            # applied one at a time, each seeing the others' committed rows
+            before = state.select_for_update().first()
+            if before is None:
+                return
+            cls.objects.filter(pk=candidate_id).update(**cls.latest_assessment_values())
+            DashboardStats.record_transition(before, state.first())
+
     class Meta:
         ordering = ['-created_at']
+        # One index per dashboard filter and sort order, each ending in the
+        # id tie-break and matching the order's NULL placement so a keyset
+        # page is a range scan
+        indexes = [
+            models.Index(fields=['latest_status', 'id'], name='candidate_status_idx'),
+            models.Index(F('latest_score').desc(nulls_last=True), F('id'), name='candidate_score_idx'),
+            models.Index(F('latest_assessment_at').asc(nulls_first=True), F('id'), name='candidate_assessed_at_idx'),
+            models.Index(fields=['interview_status', 'id'], name='candidate_interview_idx'),
+            models.Index(fields=['source', 'id'], name='candidate_source_idx'),
+            models.Index(F('normalized_score').desc(nulls_last=True), F('id'), name='candidate_source_rank_idx'),
+            models.Index(fields=['id'], condition=Q(latest_assessment__isnull=True),
+                         name='candidate_unassessed_idx'),
+            GinIndex(fields=['search_vector'], name='candidate_search_vector_idx'),
+            GinIndex(fields=['search_document'], opclasses=['gin_trgm_ops'], name='candidate_search_trgm_idx'),
+        ]
+
+
+class CandidateSkill(models.Model):
+    """
+    A skill of a candidate. Indexed both ways round, so the skills of a
+    candidate and the candidates having a set of skills are each read from
+    an index alone; those indexes also serve the foreign keys.
+    """
+    candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE, db_index=False)
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, db_index=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['candidate', 'skill'], name='candidate_skill_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['skill', 'candidate'], name='candidate_skill_lookup_idx'),
+        ]
+
+
+class SourceRecord(models.Model):
+    """
+    A row of a candidate source export as last imported, identified by the
+    source's own id. The fingerprint hashes the values the row was imported
+    with, so an incremental import writes only the rows that changed;
+    vanished_at marks rows missing from the latest export.
+    """
+    source = models.CharField(max_length=50, choices=Candidate.SOURCE_CHOICES)
+    external_id = models.CharField(max_length=100)
+    candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE, related_name='source_records')
+    fingerprint = models.CharField(max_length=32)
+    imported_at = models.DateTimeField()
+    vanished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.source} record {self.external_id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'external_id'], name='source_record_unique'),
+        ]
+
+
+class ImportCheckpoint(models.Model):
+    """
+    A shard of a sharded candidate import that has been fully written. A
+    rerun of the same import skips the shards checkpointed here, so a
+    crashed import resumes where it stopped; the checkpoints are removed
+    once the whole file is in.
+    """
+    source = models.CharField(max_length=50, choices=Candidate.SOURCE_CHOICES)
+    path = models.CharField(max_length=500)
+    # Identifies the file contents and the way it was split into shards
+    import_key = models.CharField(max_length=64)
+    shard = models.PositiveIntegerField()
+    rows = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    users_created = models.PositiveIntegerField(default=0)
+    candidates_created = models.PositiveIntegerField(default=0)
+    candidates_updated = models.PositiveIntegerField(default=0)
+    unchanged = models.PositiveIntegerField(default=0)
+    completed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.source} import of {self.path}, shard {self.shard}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['import_key', 'shard'], name='import_checkpoint_unique'),
+        ]
+
+
+class DuplicateCandidateSuggestion(models.Model):
+    """
+    Two candidates from different sources whose names suggest they are the
+    same person, found by the deduplication stage of the imports. The pair
+    is stored once, with the lower candidate id first; merging the pair
+    deletes the duplicate and with it the suggestion, while a dismissed
+    suggestion is kept so the pair is not suggested again.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending Review'),
+        ('DISMISSED', 'Dismissed'),
+    ]
+
+    candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE, related_name='+')
+    duplicate = models.ForeignKey(Candidate, on_delete=models.CASCADE, related_name='+')
+    similarity = models.FloatField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    created_at = models.DateTimeField(auto_now_add=True)
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Possible duplicate: {self.candidate_id} and {self.duplicate_id} ({self.similarity:.2f})"
+
+    class Meta:
+        ordering = ['-similarity', 'id']
+        constraints = [
+            models.UniqueConstraint(fields=['candidate', 'duplicate'], name='duplicate_suggestion_unique'),
+        ]
 
 
 class HiringManager(models.Model):
@@ -173,7 +561,12 @@ class CodingQuestion(models.Model):
     starter_code_css = models.TextField(blank=True)
 
     # Testing functions or expected results
-    test_cases = models.JSONField(blank=True, null=True)
+    test_cases = models.JSONField(
+        blank=True, null=True,
+        help_text="Test suite for this question: a list of test cases, or an object with "
+                  "function_name, test_cases or test_groups, schema_sql/schema_file and scaling. "
+                  "Leave empty to use the default suite for the question type."
+    )
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -197,6 +590,10 @@ class CodingQuestion(models.Model):
             return self.starter_code_css
         return ""
 
+# Statuses of an assessment the candidate can still work on
+OPEN_ASSESSMENT_STATUSES = ['DRAFT', 'SENT', 'ACCEPTED', 'STARTED']
+
+
 class Assessment(models.Model):
     """
     Model representing a coding assessment instance.
@@ -286,6 +683,8 @@ class Assessment(models.Model):
     evaluation_started_at = models.DateTimeField(null=True, blank=True)
     evaluation_completed_at = models.DateTimeField(null=True, blank=True)
 
+    OPEN_STATUSES = OPEN_ASSESSMENT_STATUSES
+
     def __str__(self):
         return f"Assessment for {self.candidate.user.username} - {self.status}"
 
@@ -305,6 +704,18 @@ class Assessment(models.Model):
         remaining_seconds = (self.time_limit_minutes * 60) - elapsed.total_seconds()
         return max(0, int(remaining_seconds / 60))  # Return minutes remaining
 
+    # Fields copied onto the candidate while this is their latest assessment
+    CANDIDATE_CACHED_FIELDS = ('status', 'evaluation_status', 'score', 'created_at', 'created_by_id')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._cached_state = instance._candidate_cached_state()
+        return instance
+
+    def _candidate_cached_state(self):
+        return {name: self.__dict__.get(name) for name in self.CANDIDATE_CACHED_FIELDS}
+
     def save(self, *args, **kwargs):
         # Generate a unique token for assessment URL when created
         if not self.assessment_url_token:
@@ -319,7 +730,24 @@ class Assessment(models.Model):
         if self.status == 'STARTED' and self.start_time and not self.end_time:
             self.end_time = self.start_time + timezone.timedelta(hours=24)
 
-        super().save(*args, **kwargs)
+        # Saves that leave the cached fields alone, such as code autosaves,
+        # do not touch the candidate
+        refresh_candidate = (self._state.adding
+                             or getattr(self, '_cached_state', None) != self._candidate_cached_state())
+        # Read by the post_save signal that invalidates cached dashboard
+        # pages, which only show the candidate's latest assessment: a new
+        # one, or a change to the one the candidate points at
+        self._dashboard_changed = refresh_candidate and (
+            self._state.adding
+            or getattr(self, '_cached_state', {}).get('created_at') != self.created_at
+            or Candidate.objects.filter(pk=self.candidate_id, latest_assessment=self.pk).exists()
+        )
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if refresh_candidate:
+                Candidate.refresh_latest_assessment(self.candidate_id)
+        self._cached_state = self._candidate_cached_state()
 
     def is_invite_expired(self):
         """Check if the assessment invitation has expired."""
@@ -368,4 +796,187 @@ class Assessment(models.Model):
         return round(percentage, 1)
 
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            # A candidate's assessments newest first: the latest assessment
+            # refresh and the candidate assessment lists
+            models.Index(F('candidate'), F('created_at').desc(), F('id').desc(), name='assessment_latest_idx'),
+            # invite_assessment's check for an assessment still in progress
+            models.Index(fields=['candidate'], condition=Q(status__in=OPEN_ASSESSMENT_STATUSES),
+                         name='assessment_open_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['assessment_url_token'], name='assessment_url_token_unique'),
+        ]
+
+
+class EvaluationCacheEntry(models.Model):
+    """
+    Evaluation results cached by language, normalized submission and test suite version.
+    """
+    cache_key = models.CharField(max_length=64, unique=True)
+    language = models.CharField(max_length=50)
+    question = models.ForeignKey(
+        CodingQuestion,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='evaluation_cache_entries'
+    )
+    test_suite_version = models.CharField(max_length=64)
+    evaluation_results = models.JSONField()
+    evaluation_score = models.FloatField(null=True, blank=True)
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"Evaluation cache {self.cache_key[:12]} ({self.language})"
+
+    class Meta:
+        ordering = ['-last_used_at']
+
+
+class DashboardStats(models.Model):
+    """
+    Pipeline counters shown in the manager dashboard header, kept current
+    by applying deltas on every candidate status transition. A single row
+    holds the platform-wide numbers; reconcile() recounts them from the
+    candidate table to correct any drift.
+    """
+    GLOBAL_ID = 1
+
+    # Counters a candidate contributes to, by their latest assessment status
+    STAGE_COUNTERS = {
+        'SENT': ('invited_candidates',),
+        'ACCEPTED': ('in_progress_assessments',),
+        'STARTED': ('in_progress_assessments',),
+        'FINISHED': ('completed_assessments',),
+        'SCORING': ('completed_assessments',),
+        'SCORED': ('completed_assessments', 'scored_assessments'),
+    }
+    # ... and by their interview status
+    INTERVIEW_COUNTERS = {
+        'ACCEPTED': ('accepted_for_interview',),
+        'REJECTED': ('rejected_candidates',),
+    }
+    COUNTER_FIELDS = ('total_candidates', 'invited_candidates', 'in_progress_assessments',
+                      'completed_assessments', 'scored_assessments', 'accepted_for_interview',
+                      'rejected_candidates')
+
+    total_candidates = models.IntegerField(default=0)
+    invited_candidates = models.IntegerField(default=0)
+    in_progress_assessments = models.IntegerField(default=0)
+    completed_assessments = models.IntegerField(default=0)
+    scored_assessments = models.IntegerField(default=0)
+    accepted_for_interview = models.IntegerField(default=0)
+    rejected_candidates = models.IntegerField(default=0)
+    reconciled_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = 'dashboard stats'
+
+    def __str__(self):
+        return f"Dashboard stats ({self.total_candidates} candidates)"
+
+    @classmethod
+    def counters_for(cls, state):
+        """Counters a candidate in the given (latest status, interview status) state is counted in."""
+        if state is None:
+            return []
+        latest_status, interview_status = state
+        return (['total_candidates']
+                + list(cls.STAGE_COUNTERS.get(latest_status, ()))
+                + list(cls.INTERVIEW_COUNTERS.get(interview_status, ())))
+
+    @classmethod
+    def record_transition(cls, before, after):
+        """
+        Apply the counter deltas for a candidate moving from the `before` to
+        the `after` state; None stands for a candidate that does not exist.
+        """
+        deltas = Counter(cls.counters_for(after))
+        deltas.subtract(cls.counters_for(before))
+        changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+        if not changes:
+            return
+        if not cls.objects.filter(pk=cls.GLOBAL_ID).update(**changes):
+            # No counters yet: count everything, this transition included
+            cls.reconcile()
+
+    @classmethod
+    def reconcile(cls):
+        """Recount every counter from the candidate table and return the counts."""
+        with transaction.atomic():
+            # Transitions that commit after the recount wait on this lock
+            # and apply their deltas on top of it
+            cls.objects.get_or_create(pk=cls.GLOBAL_ID)
+            stats = cls.objects.select_for_update().get(pk=cls.GLOBAL_ID)
+
+            aggregates = {'total_candidates': Count('id')}
+            for counter in cls.COUNTER_FIELDS[1:]:
+                stages = [status for status, counters in cls.STAGE_COUNTERS.items() if counter in counters]
+                decisions = [status for status, counters in cls.INTERVIEW_COUNTERS.items() if counter in counters]
+                aggregates[counter] = Count('id', filter=Q(latest_status__in=stages)
+                                                         | Q(interview_status__in=decisions))
+            counts = Candidate.objects.aggregate(**aggregates)
+
+            for field, value in counts.items():
+                setattr(stats, field, value)
+            stats.reconciled_at = timezone.now()
+            stats.save()
+        return counts
+
+    @classmethod
+    def current(cls):
+        """The current counters, read with a single primary key lookup."""
+        counts = cls.objects.filter(pk=cls.GLOBAL_ID).values(*cls.COUNTER_FIELDS).first()
+        if counts is None:
+            counts = cls.reconcile()
+        return counts
+
+
+class OutboundEmail(models.Model):
+    """
+    An email waiting in the outbox or already handed to the mail server.
+    Views queue emails here and a Celery task sends them in batches, so a
+    request never waits on SMTP; failed sends are retried with backoff.
+    The bodies are cleared once sent, as some carry login credentials.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('SENDING', 'Sending'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'),
+    ]
+
+    to_email = models.EmailField()
+    # Lowercased domain of to_email, the unit of the send rate limit
+    domain = models.CharField(max_length=255)
+    subject = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    html_body = models.TextField(blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.subject} to {self.to_email} ({self.status})"
+
+    def save(self, *args, **kwargs):
+        self.domain = self.to_email.rpartition('@')[2].lower()
+        super().save(*args, **kwargs)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # The dispatcher's scan for due emails, oldest first
+            models.Index(fields=['next_attempt_at', 'id'], name='outbound_email_due_idx',
+                         condition=Q(status='PENDING')),
+            # Emails in flight, for stale claims and the per-domain rate
+            models.Index(fields=['domain', 'claimed_at'], name='outbound_email_domain_idx'),
+        ]
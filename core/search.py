@@ -0,0 +1,46 @@
+import re
+from typing import List
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import F, Q, QuerySet
+
+# Candidates shown for one search on the dashboard
+SEARCH_LIMIT = 20
+# Shorter queries match too much of the table to rank interactively
+MIN_QUERY_LENGTH = 2
+MAX_QUERY_LENGTH = 100
+
+
+def search_words(query: str) -> List[str]:
+    """
+    Words of a search query, split the way Candidate.search_values splits
+    the searched text: on anything that is not a letter or a digit.
+    """
+    return re.findall(r'[^\W_]+', query.lower())
+
+
+def search_candidates(candidates: QuerySet, query: str) -> QuerySet:
+    """
+    Candidates matching the query, best match first. A candidate matches
+    when every word of the query starts a word of their name, username,
+    email or skills, or when the query is close to a word of those by
+    trigram similarity, which tolerates typos.
+
+    Both conditions are answered from the candidate's GIN indexes. The
+    rank adds the full-text rank, which weighs name and username over
+    email over skills, to the trigram similarity.
+    """
+    term = query.strip().lower()[:MAX_QUERY_LENGTH]
+    words = search_words(term)
+    if len(term) < MIN_QUERY_LENGTH or not words:
+        return candidates.none()
+
+    # The words only hold letters and digits, so they are safe in a raw query
+    text_query = SearchQuery(' & '.join(f'{word}:*' for word in words), search_type='raw', config='simple')
+    return (
+        candidates
+        .filter(Q(search_vector=text_query) | Q(search_document__trigram_word_similar=term))
+        .annotate(search_rank=SearchRank(F('search_vector'), text_query)
+                  + TrigramWordSimilarity(term, 'search_document'))
+        .order_by('-search_rank', 'id')
+    )
@@ -1,6 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
-from .models import User, Candidate, HiringManager
+from .models import User, Candidate, CandidateSkill, HiringManager, CodingQuestion, Assessment, DashboardStats, Skill
+from .evaluation_cache import invalidate_question
+from .utils import cache_utils
 from .utils.email_utils import generate_random_password, send_candidate_credentials_email
 import logging
 
@@ -28,8 +30,127 @@ def save_user_profile(sender, instance, **kwargs):
     if instance.is_hiring_manager and not hasattr(instance, 'hiring_manager_profile'):
         HiringManager.objects.create(user=instance, company_name="Doodle Gmbh")
 
+    # A login only touches last_login, which no profile depends on
+    if kwargs.get('update_fields') == frozenset({'last_login'}):
+        return
+
     # Update existing profiles
     if hasattr(instance, 'candidate_profile'):
         instance.candidate_profile.save()
     if hasattr(instance, 'hiring_manager_profile'):
-        instance.hiring_manager_profile.save()
\ No newline at end of file
+        instance.hiring_manager_profile.save()
+
+
+@receiver(pre_save, sender=CodingQuestion)
+def invalidate_evaluation_cache(sender, instance, **kwargs):
+    """
+    Signal to drop cached evaluation results when a question's tests change.
+    """
+    if not instance.pk:
+        return
+
+    previous = CodingQuestion.objects.filter(pk=instance.pk).values('test_cases', 'question_type').first()
+    if previous and (previous['test_cases'] != instance.test_cases
+                     or previous['question_type'] != instance.question_type):
+        invalidate_question(instance)
+
+
+@receiver(post_delete, sender=Assessment)
+def refresh_candidate_latest_assessment(sender, instance, **kwargs):
+    """
+    Signal to point the candidate at their next most recent assessment
+    when an assessment is deleted.
+    """
+    Candidate.refresh_latest_assessment(instance.candidate_id)
+
+
+@receiver(post_delete, sender=Candidate)
+def remove_candidate_from_dashboard_stats(sender, instance, **kwargs):
+    """
+    Signal to take a deleted candidate out of the dashboard counters. Their
+    assessments are deleted first, which already cleared the stage counters.
+    """
+    DashboardStats.record_transition((None, instance.interview_status), None)
+
+
+@receiver(post_save, sender=Assessment)
+@receiver(post_save, sender=Candidate)
+@receiver(post_save, sender=User)
+def invalidate_dashboard_on_save(sender, instance, **kwargs):
+    """
+    Signal to drop cached dashboard pages when a save changes what the
+    dashboard shows: a candidate's name, email, source, interview status
+    or rank, or their latest assessment. Such a change can move the row
+    between the pages of any sort order and filter, so the whole namespace
+    goes; saves that change nothing shown, such as password resets and
+    code autosaves, leave the pages cached.
+    """
+    if sender is User and not instance.is_candidate:
+        return
+    if getattr(instance, '_dashboard_changed', True):
+        cache_utils.invalidate(cache_utils.DASHBOARD)
+
+
+@receiver(post_delete, sender=Candidate)
+@receiver(post_delete, sender=Assessment)
+def invalidate_dashboard(sender, instance, **kwargs):
+    """
+    Signal to drop cached dashboard pages when a candidate or assessment
+    is deleted.
+    """
+    cache_utils.invalidate(cache_utils.DASHBOARD)
+
+
+@receiver(post_save, sender=CodingQuestion)
+@receiver(post_delete, sender=CodingQuestion)
+def invalidate_question_catalogue(sender, instance, **kwargs):
+    """
+    Signal to drop the cached question catalogue when a question changes.
+    """
+    cache_utils.invalidate(cache_utils.QUESTIONS)
+
+
+@receiver(post_save, sender=HiringManager)
+@receiver(post_delete, sender=HiringManager)
+def invalidate_company_names(sender, instance, **kwargs):
+    """
+    Signal to drop the cached company list when a hiring manager changes.
+    """
+    cache_utils.invalidate(cache_utils.COMPANIES)
+
+
+@receiver(m2m_changed, sender=CandidateSkill)
+def refresh_search_on_skills_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Signal to rebuild the search columns of candidates whose skills were
+    set, added or removed, and drop the dashboard pages filtered by them.
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    candidate_ids = pk_set if reverse else [instance.pk]
+    if candidate_ids:
+        Candidate.refresh_search(candidate_ids)
+    cache_utils.invalidate(cache_utils.DASHBOARD)
+    # Skills created for the relation are bulk inserted, without a post_save
+    if action == 'post_add':
+        cache_utils.invalidate(cache_utils.SKILLS)
+
+
+@receiver(post_save, sender=Skill)
+def refresh_search_on_skill_rename(sender, instance, created, **kwargs):
+    """
+    Signal to rebuild the search columns of the candidates with a skill
+    when the skill is renamed.
+    """
+    if not created:
+        Candidate.refresh_search(CandidateSkill.objects.filter(skill=instance).values('candidate'))
+        cache_utils.invalidate(cache_utils.DASHBOARD)
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+def invalidate_skill_names(sender, instance, **kwargs):
+    """
+    Signal to drop the cached skill list when a skill changes.
+    """
+    cache_utils.invalidate(cache_utils.SKILLS)
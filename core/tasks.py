@@ -1,13 +1,24 @@
 from celery import shared_task
+from celery.signals import worker_process_shutdown
 import logging
 from django.utils import timezone
 
-from .models import Assessment
+from .models import Assessment, Candidate, DashboardStats
 from .evaluation import evaluate_submission
+from .evaluation_pool import shutdown_evaluator_pool
+from .utils import cache_utils, email_outbox
 
 logger = logging.getLogger(__name__)
 
 
+@worker_process_shutdown.connect
+def stop_evaluator_pool(**kwargs):
+    """
+    Remove the pooled containers when a worker process exits.
+    """
+    shutdown_evaluator_pool()
+
+
 @shared_task
 def evaluate_assessment(assessment_id: int):
     """
@@ -63,4 +74,51 @@ def evaluate_assessment(assessment_id: int):
         return {
             'status': 'error',
             'message': str(e)
-        }
\ No newline at end of file
+        }
+
+
+@shared_task
+def reconcile_dashboard_stats():
+    """
+    Periodic Celery task recounting the dashboard counters, correcting any
+    drift from writes that bypass the per-transition updates (bulk imports,
+    raw SQL, failed transactions).
+    """
+    counts = DashboardStats.reconcile()
+    logger.info(f"Reconciled dashboard stats: {counts}")
+    return counts
+
+
+@shared_task(ignore_result=True)
+def refresh_normalized_scores(sources=None):
+    """
+    Celery task recomputing the source percentiles, of the given sources
+    after a save changed a score in them, or of every source when run
+    periodically to catch up on refreshes that could not be queued.
+    """
+    updated = Candidate.refresh_normalized_scores(sources)
+    if updated:
+        # The rank sort of the dashboard orders on them
+        cache_utils.invalidate(cache_utils.DASHBOARD)
+    return updated
+
+
+@shared_task(ignore_result=True)
+def dispatch_outbound_emails():
+    """
+    Celery task sending the due emails of the outbox, queued on commit by
+    every request that sends email and run periodically for the retries.
+    Nothing waits on its result, so none is stored and sending it does not
+    touch the result backend.
+    """
+    return email_outbox.dispatch_emails().counts()
+
+
+@shared_task
+def purge_sent_emails():
+    """
+    Periodic Celery task deleting sent emails past their retention.
+    """
+    deleted = email_outbox.purge_sent_emails()
+    logger.info(f"Purged {deleted} sent emails")
+    return deleted
@@ -0,0 +1,172 @@
+import copy
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+from django.conf import settings
+
+from .evaluation_cache import test_suite_version
+from .models import CodingQuestion
+
+logger = logging.getLogger(__name__)
+
+# Compiled plans kept in memory per worker process
+MEMORY_CACHE_SIZE = 256
+
+# Suites used for questions that do not define their own `test_cases`
+DEFAULT_SUITES: Dict[str, Dict[str, Any]] = {
+    'BACKEND': {
+        "function_name": "is_allowed",  # Assuming the rate limiter example
+        "test_cases": [
+            {"input": ["client1"], "expected_output": True},
+            {"input": ["client1"], "expected_output": True},
+            {"input": ["client1"], "expected_output": True},
+            {"input": ["client1"], "expected_output": False},
+            {"input": ["client2"], "expected_output": True},
+        ],
+        # Growth of the total time for n calls from distinct clients
+        "scaling": {
+            "generator": "call_sequence",
+            "args": ["client{i}"],
+            "sizes": [100, 200, 400, 800, 1600, 3200],
+            "repeat": 3,
+            "time_budget": 10
+        }
+    },
+    'FRONTEND': {
+        # For frontend, we might check if certain HTML elements exist
+        "html_required_elements": ["nav", "ul", "li", "button"],
+        "css_required_properties": ["display: flex", "media"],
+        "js_required_functionality": ["addEventListener", "toggle"]
+    },
+    'DATABASE': {
+        # For SQL questions, we provide schema and expected query results
+        "schema_file": "sample_db.sql",
+        "test_cases": [
+            {
+                "query": "SELECT p.* FROM posts p JOIN likes l ON p.id = l.post_id WHERE l.user_id = 3 ORDER BY p.created_at DESC;",
+                "expected_result": [
+                    {"id": 2, "user_id": 2, "content": "Post 2 content"},
+                    {"id": 1, "user_id": 1, "content": "Post 1 content"}
+                ]
+            }
+        ]
+    },
+}
+
+_memory_cache: "OrderedDict[str, Tuple[str, Dict[str, Any]]]" = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+def question_suite(question: CodingQuestion) -> Dict[str, Any]:
+    """
+    The test suite a question is scored against: its own `test_cases` when
+    set and not empty, otherwise the default suite for its type.
+
+    `test_cases` may be a full suite (a dict with `test_cases` or
+    `test_groups`, plus `function_name`, `schema_sql`/`schema_file`,
+    `scaling`, ...) or just a list of test cases.
+    """
+    suite = question.test_cases
+    if isinstance(suite, list) and suite:
+        default = DEFAULT_SUITES.get(question.question_type, {})
+        suite = {key: value for key, value in default.items() if key not in ('test_cases', 'test_groups')}
+        suite['test_cases'] = question.test_cases
+    if not suite:
+        suite = DEFAULT_SUITES.get(question.question_type, {"test_cases": []})
+    return suite
+
+
+def compile_test_plan(suite: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Turn a suite into the self-contained test data sent to the evaluators:
+    schema files are inlined as `schema_sql` and platform defaults such as
+    the per-test time limit and profiling are filled in.
+    """
+    plan = copy.deepcopy(suite)
+
+    schema_file = plan.pop('schema_file', None)
+    if schema_file and not plan.get('schema_sql'):
+        path = Path(schema_file)
+        if not path.is_absolute():
+            path = Path(settings.TEST_SUITE_DATA_DIR) / path
+        plan['schema_sql'] = path.read_text()
+
+    # Every test case gets its own time limit inside the evaluator
+    plan.setdefault('test_timeout', settings.EVALUATOR_TEST_TIMEOUT)
+
+    # When enabled, Python submissions get a hotspot report from a profiled
+    # replay of their slowest test case; the other evaluators ignore the flag
+    plan.setdefault('profile', settings.EVALUATOR_PROFILE_SUBMISSIONS)
+
+    return plan
+
+
+def _plan_path(source_version: str) -> Path:
+    return Path(settings.TEST_PLAN_DIR) / f"{source_version}.json"
+
+
+def _load_plan(source_version: str):
+    try:
+        with open(_plan_path(source_version)) as f:
+            artifact = json.load(f)
+        return artifact['version'], artifact['plan']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _store_plan(source_version: str, version: str, plan: Dict[str, Any]) -> None:
+    """Write the compiled plan atomically, so concurrent workers never read a partial file."""
+    directory = Path(settings.TEST_PLAN_DIR)
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.plan_', suffix='.json')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'version': version, 'plan': plan}, f)
+        os.replace(temp_path, _plan_path(source_version))
+    except OSError:
+        logger.exception("Failed to write compiled test plan")
+
+
+def get_test_plan(question: CodingQuestion) -> Tuple[str, Dict[str, Any]]:
+    """
+    Return (version, plan) for the question's current test suite.
+
+    Plans are keyed by a hash of the suite and the settings that shape it,
+    so editing a question's tests yields a new plan without any explicit
+    invalidation. A compiled plan is reused from memory, then from disk,
+    and only compiled when neither has it. The version is the content hash
+    of the compiled plan. The returned plan is shared and must not be
+    modified.
+    """
+    suite = question_suite(question)
+    source_version = test_suite_version({
+        'suite': suite,
+        'test_timeout': settings.EVALUATOR_TEST_TIMEOUT,
+        'profile': settings.EVALUATOR_PROFILE_SUBMISSIONS,
+    })
+
+    with _memory_lock:
+        cached = _memory_cache.get(source_version)
+        if cached is not None:
+            _memory_cache.move_to_end(source_version)
+            return cached
+
+    cached = _load_plan(source_version)
+    if cached is None:
+        plan = compile_test_plan(suite)
+        version = test_suite_version(plan)
+        _store_plan(source_version, version, plan)
+        cached = (version, plan)
+        logger.info(f"Compiled test plan {version[:12]} for question {question.id}")
+
+    with _memory_lock:
+        _memory_cache[source_version] = cached
+        while len(_memory_cache) > MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+    return cached
@@ -1,3 +1,234 @@
-from django.test import TestCase
+import csv
+import os
+import tempfile
+import uuid
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from .dashboard import SORT_ORDERS, STATUS_FILTERS, after_cursor, dashboard_candidates, filter_candidates
+from .dashboard import PAGE_SIZE, order_candidates
+from .models import Assessment, Candidate, CandidateSkill, DashboardStats, HiringManager, Skill, SourceRecord, User
+from .search import SEARCH_LIMIT, search_candidates
+from .utils.candidate_dedup import merge_candidates
+from .utils.candidate_import import CandidateRecord, import_candidates
+from .utils.candidate_sources import StackOverflowSource, shards
+
+
+@skipUnless(connection.vendor == 'postgresql', "EXPLAIN plans are checked against PostgreSQL")
+class IndexCoverageTests(TestCase):
+    """
+    Runs EXPLAIN on the main queries of the hot views against a seeded
+    dataset and fails if any of them needs a sequential scan of a large
+    table. Sequential scans are disabled for the check, so the planner
+    only falls back to one when no index can serve the query.
+    """
+    LARGE_TABLES = ('core_user', 'core_candidate', 'core_assessment', 'core_candidateskill')
+    CANDIDATES = 2000
+    STATUSES = ['SENT', 'ACCEPTED', 'STARTED', 'FINISHED', 'SCORING', 'SCORED', 'EXPIRED']
+
+    @classmethod
+    def setUpTestData(cls):
+        manager_user = User.objects.create_user('manager', 'manager@example.com', is_hiring_manager=True)
+        cls.hiring_manager = HiringManager.objects.get(user=manager_user)
+
+        users = User.objects.bulk_create([
+            User(username=f'candidate{i}', email=f'candidate{i}@example.com', is_candidate=True,
+                 full_name=f'Candidate {i}' if i % 3 else '')
+            for i in range(cls.CANDIDATES)
+        ])
+        candidates = Candidate.objects.bulk_create([
+            Candidate(user=user, source=['GITHUB', 'STACK_OVERFLOW', 'OTHER'][i % 3],
+                      interview_status=['PENDING', 'ACCEPTED', 'REJECTED'][i % 3],
+                      source_score=(i * 13) % 1000 / 10)
+            for i, user in enumerate(users)
+        ])
+        Candidate.refresh_normalized_scores()
+
+        Assessment.objects.bulk_create([
+            Assessment(candidate=candidate, created_by=cls.hiring_manager, title='Assessment',
+                       status=cls.STATUSES[(i + round_) % len(cls.STATUSES)],
+                       score=(i * 7) % 100 if i % 2 else None,
+                       assessment_url_token=uuid.uuid4().hex)
+            for i, candidate in enumerate(candidates) if i % 5
+            for round_ in range(2)
+        ])
+        Candidate.objects.update(**Candidate.latest_assessment_values())
+
+        skills = Skill.for_names(['Python', 'JavaScript', 'Java', 'C#', 'PHP'])
+        CandidateSkill.objects.bulk_create([
+            CandidateSkill(candidate=candidate, skill=skill)
+            for i, candidate in enumerate(candidates)
+            for j, skill in enumerate(skills) if (i + j) % 3 == 0
+        ])
+
+        with connection.cursor() as cursor:
+            for table in cls.LARGE_TABLES:
+                cursor.execute(f'ANALYZE {table}')
+
+        cls.candidate = Candidate.objects.filter(latest_assessment__isnull=False).order_by('id').first()
+        cls.assessment = cls.candidate.latest_assessment
+
+    def assertNoSequentialScan(self, queryset):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        for table in self.LARGE_TABLES:
+            self.assertNotIn(f'Seq Scan on {table}', plan, msg=f"\n{plan}")
+        return plan
+
+    def test_assessment_by_token(self):
+        # view_assessment, start_assessment, choose_assessment_question,
+        # submit_assessment and save_code
+        self.assertNoSequentialScan(Assessment.objects.filter(
+            assessment_url_token=self.assessment.assessment_url_token,
+            candidate=self.candidate,
+            status='STARTED',
+        ))
+
+    def test_open_assessment_for_candidate(self):
+        # invite_assessment
+        self.assertNoSequentialScan(Assessment.objects.filter(
+            candidate=self.candidate,
+            status__in=Assessment.OPEN_STATUSES,
+        )[:1])
+
+    def test_candidate_assessments(self):
+        # view_candidate, the candidate dashboard and the latest assessment refresh
+        self.assertNoSequentialScan(
+            Assessment.objects.filter(candidate=self.candidate).order_by('-created_at', '-id')[:1]
+        )
+
+    def test_dashboard_pages(self):
+        # The name order sorts on a value spanning the user and candidate
+        # tables, which no single index can provide
+        candidates = dashboard_candidates()
+        for sort_by in SORT_ORDERS:
+            if sort_by == 'name':
+                continue
+            key = SORT_ORDERS[sort_by][0]
+            last = order_candidates(candidates, sort_by)[PAGE_SIZE]
+            with self.subTest(sort=sort_by):
+                self.assertNoSequentialScan(order_candidates(candidates, sort_by)[:PAGE_SIZE + 1])
+            for number, condition in enumerate(after_cursor(sort_by, getattr(last, key), last.id)):
+                with self.subTest(sort=sort_by, page='next', segment=number):
+                    self.assertNoSequentialScan(
+                        order_candidates(candidates, sort_by).filter(condition)[:PAGE_SIZE + 1]
+                    )
+
+    def test_dashboard_filters(self):
+        filters = [{'status_filter': status} for status in STATUS_FILTERS]
+        filters += [{'interview_filter': 'ACCEPTED'}, {'source_filter': 'GITHUB'}]
+        filters += [{'skills': ['Python', 'JavaScript'], 'skill_match': match} for match in ('all', 'any')]
+        for options in filters:
+            with self.subTest(**options):
+                candidates = filter_candidates(dashboard_candidates(), **options)
+                self.assertNoSequentialScan(order_candidates(candidates, 'date')[:PAGE_SIZE + 1])
+
+    def test_candidate_search(self):
+        # manager_dashboard_search and the candidate admin search. A full
+        # scan of another index would also avoid a Seq Scan, so check that
+        # both match conditions are answered from their GIN index
+        for query in ['candidate 12', 'cand', 'candidat12@exmple']:
+            with self.subTest(query=query):
+                plan = self.assertNoSequentialScan(search_candidates(dashboard_candidates(), query)[:SEARCH_LIMIT])
+                self.assertIn('candidate_search_vector_idx', plan, msg=f"\n{plan}")
+                self.assertIn('candidate_search_trgm_idx', plan, msg=f"\n{plan}")
+
+
+class CandidateMergeTests(TestCase):
+    """
+    A merged duplicate has to stay merged through later imports of the
+    rows it was imported from, and leave the dashboard counters right.
+    """
+    RECORDS = [
+        CandidateRecord(username='JaneDoe', full_name='JaneDoe', source='GITHUB', source_score=12.5,
+                        external_id='101'),
+        CandidateRecord(username='jane-doe', full_name='Jane Doe', source='STACK_OVERFLOW', source_score=40,
+                        skills=['Python'], external_id='202'),
+    ]
+
+    def setUp(self):
+        import_candidates(self.RECORDS)
+        self.github = Candidate.objects.get(user__username='JaneDoe')
+        self.stack_overflow = Candidate.objects.get(user__username='jane-doe')
+
+    def test_reimport_after_merge(self):
+        # The GitHub user has logged in, so its profile is kept
+        User.objects.filter(pk=self.github.user_id).update(last_login='2024-01-01T00:00:00Z')
+        self.github.refresh_from_db()
+        kept = merge_candidates(self.github, self.stack_overflow)
+        self.assertEqual(kept.pk, self.github.pk)
+        self.assertFalse(User.objects.filter(username='jane-doe').exists())
+
+        for incremental in (False, True):
+            with self.subTest(incremental=incremental):
+                stats = import_candidates([
+                    self.RECORDS[0],
+                    CandidateRecord(username='jane-doe', full_name='Jane Doe', source='STACK_OVERFLOW',
+                                    source_score=41, skills=['Python', 'Java'], external_id='202'),
+                ], incremental=incremental)
+                self.assertEqual(stats.users_created, 0)
+                self.assertEqual(stats.candidates_created, 0)
+                # The Stack Overflow row leaves the kept GitHub profile alone
+                self.assertEqual(stats.candidates_updated, 0 if incremental else 1)
+                self.assertFalse(User.objects.filter(username='jane-doe').exists())
+                self.assertEqual(Candidate.objects.count(), 1)
+                self.assertEqual(set(SourceRecord.objects.values_list('candidate_id', flat=True)), {kept.pk})
+
+                kept.refresh_from_db()
+                # The kept profile's own source and score are left alone
+                self.assertEqual((kept.source, kept.source_score), ('GITHUB', 12.5))
+                self.assertEqual(set(kept.skills.values_list('name', flat=True)), {'Python', 'Java'})
+
+    def test_merge_keeps_dashboard_counters(self):
+        # The duplicate's assessment moves to the kept profile, which takes
+        # over its stage counter
+        User.objects.filter(pk=self.github.user_id).update(last_login='2024-01-01T00:00:00Z')
+        self.github.refresh_from_db()
+        Assessment.objects.create(candidate=self.stack_overflow, title='Assessment', status='SCORED', score=80)
+        DashboardStats.reconcile()
+        merge_candidates(self.github, self.stack_overflow)
+        counts = DashboardStats.objects.values(*DashboardStats.COUNTER_FIELDS).get()
+        self.assertEqual(counts, DashboardStats.reconcile())
+
+    def test_merge_refused_for_two_accounts(self):
+        User.objects.filter(pk__in=[self.github.user_id, self.stack_overflow.user_id]).update(
+            last_login='2024-01-01T00:00:00Z')
+        self.github.refresh_from_db()
+        self.stack_overflow.refresh_from_db()
+        with self.assertRaises(ValueError):
+            merge_candidates(self.github, self.stack_overflow)
+        self.assertEqual(Candidate.objects.count(), 2)
+
+
+class CandidateSourceTests(SimpleTestCase):
+    """
+    The numeric columns of a CSV export read as floats in every block,
+    whatever the values of the first block look like.
+    """
+    ROWS = 2000
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(['user_id', 'display_name', 'weighted_score', 'total_python_tags'])
+            for i in range(self.ROWS):
+                # Integers only until the last rows, well past the first block
+                decimal = i >= self.ROWS - 10
+                writer.writerow([i, f'User {i}', f'{i}.5' if decimal else i, '0.5' if decimal else 0])
+        self.addCleanup(os.remove, self.path)
+
+    @mock.patch('core.utils.candidate_sources.CSV_BLOCK_SIZE', 4096)
+    def test_decimal_after_first_block(self):
+        source = StackOverflowSource()
+        whole = list(source.read(self.path))
+        self.assertEqual(len(whole), self.ROWS)
+        self.assertEqual((whole[0].source_score, whole[0].skills), (0.0, []))
+        self.assertEqual((whole[-1].source_score, whole[-1].skills), (self.ROWS - 0.5, ['Python']))
+
+        # The shards of an import read the same records
+        sharded = [record for shard in shards(self.path, 16 * 1024) for record in source.read(self.path, shard)]
+        self.assertEqual(sharded, whole)
@@ -10,6 +10,8 @@ urlpatterns = [
     path('manager-login/', views.manager_login, name='manager_login'),
     path('candidate-dashboard/', views.candidate_dashboard, name='candidate_dashboard'),
     path('manager-dashboard/', views.manager_dashboard, name='manager_dashboard'),
+    path('api/manager-dashboard/candidates/', views.manager_dashboard_candidates, name='manager_dashboard_candidates'),
+    path('api/manager-dashboard/search/', views.manager_dashboard_search, name='manager_dashboard_search'),
     path('add-candidate/', views.add_candidate, name='add_candidate'),
     path('invite-assessment/<int:candidate_id>/', views.invite_assessment, name='invite_assessment'),
     path('candidate/assessment/accept/<int:assessment_id>/', views.accept_assessment_invite, name='accept_assessment_invite'),
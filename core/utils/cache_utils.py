@@ -0,0 +1,128 @@
+import hashlib
+import logging
+from typing import Any, Callable, Dict, Optional
+
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import transaction
+
+from core.models import CodingQuestion, HiringManager, Skill
+
+logger = logging.getLogger(__name__)
+
+# Namespaces of cached data, each invalidated as a whole by bumping its version
+DASHBOARD = 'dashboard'
+QUESTIONS = 'questions'
+COMPANIES = 'companies'
+SKILLS = 'skills'
+NAMESPACES = (DASHBOARD, QUESTIONS, COMPANIES, SKILLS)
+
+
+def _version_key(namespace: str) -> str:
+    return f'cache-version:{namespace}'
+
+
+def _counter_key(namespace: str, outcome: str) -> str:
+    return f'cache-stats:{namespace}:{outcome}'
+
+
+def _increment(key: str) -> None:
+    """Increment a counter kept in the cache, creating it on first use."""
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Missing key; if another process created it meanwhile, count again
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def namespace_version(namespace: str) -> int:
+    """Current version of a namespace; keys built from older versions are never read again."""
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        cache.add(_version_key(namespace), 1, timeout=None)
+        version = cache.get(_version_key(namespace), 1)
+    return version
+
+
+def make_key(namespace: str, *parts: Any) -> str:
+    """Versioned cache key for the given parts within a namespace."""
+    digest = hashlib.sha256('\0'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'{namespace}:v{namespace_version(namespace)}:{digest}'
+
+
+def get_or_set(namespace: str, parts: tuple, producer: Callable[[], Any], timeout: Optional[int] = DEFAULT_TIMEOUT) -> Any:
+    """
+    Return the cached value for the key parts, or compute it with the
+    producer and cache it. Hits and misses are counted per namespace. If
+    the cache backend is unreachable the value is computed uncached.
+    """
+    try:
+        key = make_key(namespace, *parts)
+        value = cache.get(key)
+        _increment(_counter_key(namespace, 'misses' if value is None else 'hits'))
+    except Exception:
+        logger.warning(f"Cache unavailable, computing {namespace} value uncached", exc_info=True)
+        return producer()
+
+    if value is None:
+        value = producer()
+        try:
+            cache.set(key, value, timeout=timeout)
+        except Exception:
+            logger.warning(f"Failed to cache {namespace} value", exc_info=True)
+    return value
+
+
+def invalidate(namespace: str) -> None:
+    """
+    Drop everything cached in a namespace by bumping its version. Inside a
+    transaction the bump waits for the commit, so a concurrent reader
+    cannot cache the old rows under the new version.
+    """
+    def bump():
+        try:
+            _increment(_version_key(namespace))
+        except Exception:
+            logger.exception(f"Failed to invalidate cache namespace {namespace}")
+
+    transaction.on_commit(bump)
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Version, hits, misses and hit ratio of every namespace."""
+    stats = {}
+    for namespace in NAMESPACES:
+        hits = cache.get(_counter_key(namespace, 'hits'), 0)
+        misses = cache.get(_counter_key(namespace, 'misses'), 0)
+        lookups = hits + misses
+        stats[namespace] = {
+            'version': cache.get(_version_key(namespace)),
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / lookups, 3) if lookups else None,
+        }
+    return stats
+
+
+def reset_cache_stats() -> None:
+    """Zero the hit and miss counters of every namespace."""
+    cache.delete_many([_counter_key(namespace, outcome)
+                       for namespace in NAMESPACES for outcome in ('hits', 'misses')])
+
+
+def company_names():
+    """Distinct company names of all hiring managers, in order."""
+    return get_or_set(COMPANIES, ('names',), lambda: list(
+        HiringManager.objects.order_by('company_name').values_list('company_name', flat=True).distinct()
+    ))
+
+
+def question_catalogue():
+    """Every coding question, as offered when an assessment has no specific questions assigned."""
+    return get_or_set(QUESTIONS, ('all',), lambda: list(CodingQuestion.objects.all()))
+
+
+def skill_names():
+    """Names of all skills, in order, as offered by the dashboard skill filter."""
+    return get_or_set(SKILLS, ('names',), lambda: list(Skill.objects.values_list('name', flat=True)))
@@ -0,0 +1,256 @@
+import itertools
+import logging
+import re
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+from django.db import transaction
+
+from core.models import Assessment, Candidate, CandidateSkill, DuplicateCandidateSuggestion, SourceRecord
+
+logger = logging.getLogger(__name__)
+
+# Names are compared as sets of character trigrams of their letters and
+# digits; shorter names say too little to be matched
+SHINGLE_SIZE = 3
+MIN_KEY_LENGTH = 5
+# Jaccard similarity of two names from which they are suggested as duplicates
+SUGGEST_THRESHOLD = 0.7
+
+# MinHash signatures of NUM_BANDS bands of BAND_ROWS hashes. Two names land
+# in a common block with probability 1 - (1 - J^BAND_ROWS)^NUM_BANDS for a
+# similarity J: about 0.99 at the suggestion threshold, 0.12 at J = 0.3.
+NUM_BANDS = 16
+BAND_ROWS = 4
+NUM_HASHES = NUM_BANDS * BAND_ROWS
+# Blocks larger than this hold a name pattern, not a person, and are not compared
+MAX_BLOCK_SIZE = 50
+# Pairs whose similarity estimated from their signatures is this far below
+# the threshold are dropped without computing it; with 64 hashes that is
+# over three standard deviations of the estimate
+ESTIMATE_MARGIN = 0.2
+# Profiles hashed at a time, which bounds the working arrays
+SIGNATURE_CHUNK = 20000
+# Fixed, so signatures are the same from one run to the next
+HASH_SEED = 20240601
+
+
+@dataclass
+class DedupStats:
+    """
+    Counters of a deduplication run.
+    """
+    profiles: int = 0
+    blocks: int = 0
+    pairs_compared: int = 0
+    suggested: int = 0
+    merged: int = 0
+    merge_errors: List[str] = field(default_factory=list)
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+
+def name_key(name: str) -> str:
+    """
+    A name reduced to its lowercase letters and digits, so a GitHub
+    "JaneDoe" and a Stack Overflow "Jane Doe" ("jane-doe") share a key.
+    """
+    return ''.join(re.findall(r'[^\W_]+', (name or '').lower()))
+
+
+def shingles(key: str) -> Set[str]:
+    return {key[i:i + SHINGLE_SIZE] for i in range(len(key) - SHINGLE_SIZE + 1)}
+
+
+def similarity(key: str, other: str) -> float:
+    """Jaccard similarity of the trigram sets of two name keys."""
+    first, second = shingles(key), shingles(other)
+    return len(first & second) / len(first | second)
+
+
+def minhash_signatures(keys: List[str]) -> np.ndarray:
+    """
+    MinHash signatures of the trigram sets of the keys, one row of
+    NUM_HASHES values per key. Each hash is a multiply-shift hash of the
+    trigram's CRC32, computed for a chunk of keys at a time.
+    """
+    random = np.random.default_rng(HASH_SEED)
+    multipliers = random.integers(1, 2 ** 63, NUM_HASHES, dtype=np.uint64) | np.uint64(1)
+    increments = random.integers(0, 2 ** 63, NUM_HASHES, dtype=np.uint64)
+
+    signatures = np.empty((len(keys), NUM_HASHES), dtype=np.uint64)
+    for start in range(0, len(keys), SIGNATURE_CHUNK):
+        chunk = keys[start:start + SIGNATURE_CHUNK]
+        hashes = []
+        offsets = []
+        for key in chunk:
+            offsets.append(len(hashes))
+            hashes.extend(zlib.crc32(shingle.encode()) for shingle in shingles(key))
+        # uint64 arithmetic wraps, which is the modulus of the hash
+        permuted = (np.array(hashes, dtype=np.uint64)[:, None] * multipliers + increments) >> np.uint64(32)
+        signatures[start:start + len(chunk)] = np.minimum.reduceat(permuted, offsets, axis=0)
+    return signatures
+
+
+def blocks(signatures: np.ndarray) -> Iterator[np.ndarray]:
+    """
+    Indexes of the profiles sharing a band of their signatures, for each
+    band and each group of two to MAX_BLOCK_SIZE profiles.
+    """
+    band_weights = np.random.default_rng(HASH_SEED + 1).integers(1, 2 ** 63, BAND_ROWS, dtype=np.uint64)
+    for band in range(NUM_BANDS):
+        rows = signatures[:, band * BAND_ROWS:(band + 1) * BAND_ROWS]
+        band_keys = (rows * band_weights).sum(axis=1, dtype=np.uint64)
+        order = np.argsort(band_keys, kind='stable')
+        boundaries = np.flatnonzero(np.diff(band_keys[order])) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(order)]))
+        sizes = ends - starts
+        compared = (sizes >= 2) & (sizes <= MAX_BLOCK_SIZE)
+        for start, end in zip(starts[compared], ends[compared]):
+            yield order[start:end]
+
+
+def likely_pairs(signatures: np.ndarray, pairs: Set[int], minimum: float,
+                 chunk_size: int = 100000) -> Iterator[Tuple[int, int]]:
+    """
+    The pairs of profile indexes, given as first * profiles + second, whose
+    similarity estimated as the share of equal values in their signatures
+    is at least minimum.
+    """
+    pairs = np.fromiter(pairs, dtype=np.int64, count=len(pairs))
+    for start in range(0, len(pairs), chunk_size):
+        first, second = np.divmod(pairs[start:start + chunk_size], len(signatures))
+        matches = np.count_nonzero(signatures[first] == signatures[second], axis=1)
+        likely = matches >= minimum * NUM_HASHES
+        yield from zip(first[likely].tolist(), second[likely].tolist())
+
+
+def find_duplicates(threshold: float = SUGGEST_THRESHOLD,
+                    auto_merge_threshold: Optional[float] = None) -> DedupStats:
+    """
+    Find candidates from different sources with similar names and store
+    each new pair as a DuplicateCandidateSuggestion, or merge it when its
+    similarity reaches auto_merge_threshold.
+
+    Rather than comparing every pair of profiles, the names are blocked
+    with MinHash locality sensitive hashing and only the pairs sharing a
+    block are compared, which keeps the run linear in the number of
+    profiles. Dismissed pairs are skipped, and pending ones are only
+    merged, not suggested again.
+    """
+    stats = DedupStats()
+    ids, sources, keys = [], [], []
+    profiles = (Candidate.objects.filter(data_cleanup_status='ACTIVE')
+                .values_list('id', 'source', 'user__full_name', 'user__username')
+                .iterator(chunk_size=10000))
+    for candidate_id, source, full_name, username in profiles:
+        key = name_key(full_name.strip() or username)
+        if len(key) >= MIN_KEY_LENGTH:
+            ids.append(candidate_id)
+            sources.append(source)
+            keys.append(key)
+    stats.profiles = len(ids)
+    if not ids:
+        return stats
+
+    suggested = {(candidate_id, duplicate_id): status for candidate_id, duplicate_id, status
+                 in DuplicateCandidateSuggestion.objects.values_list('candidate_id', 'duplicate_id', 'status')}
+    signatures = minhash_signatures(keys)
+    # A pair of profile indexes is held as first * profiles + second
+    blocked: Set[int] = set()
+    for block in blocks(signatures):
+        stats.blocks += 1
+        for first, second in itertools.combinations(sorted(block.tolist()), 2):
+            if sources[first] != sources[second]:
+                blocked.add(first * len(ids) + second)
+    stats.pairs_compared = len(blocked)
+
+    pairs: Dict[Tuple[int, int], float] = {}
+    for first, second in likely_pairs(signatures, blocked, threshold - ESTIMATE_MARGIN):
+        pair = (min(ids[first], ids[second]), max(ids[first], ids[second]))
+        if suggested.get(pair) != 'DISMISSED':
+            pairs[pair] = similarity(keys[first], keys[second])
+
+    suggestions = []
+    merged: Set[int] = set()
+    for pair, score in sorted(pairs.items(), key=lambda item: -item[1]):
+        candidate_id, duplicate_id = pair
+        if score < threshold:
+            continue
+        if auto_merge_threshold is not None and score >= auto_merge_threshold:
+            if candidate_id in merged or duplicate_id in merged:
+                continue
+            try:
+                kept = merge_candidates(Candidate.objects.get(pk=candidate_id),
+                                        Candidate.objects.get(pk=duplicate_id))
+            except ValueError as e:
+                stats.merge_errors.append(str(e))
+            else:
+                merged.add(duplicate_id if kept.pk == candidate_id else candidate_id)
+                stats.merged += 1
+                continue
+        if pair in suggested:
+            continue
+        suggestions.append(DuplicateCandidateSuggestion(candidate_id=candidate_id, duplicate_id=duplicate_id,
+                                                        similarity=score))
+
+    suggestions = [suggestion for suggestion in suggestions
+                   if suggestion.candidate_id not in merged and suggestion.duplicate_id not in merged]
+    DuplicateCandidateSuggestion.objects.bulk_create(suggestions, batch_size=1000, ignore_conflicts=True)
+    stats.suggested = len(suggestions)
+    logger.info(f"Deduplicated {stats.profiles} candidates in {stats.elapsed:.1f}s: {stats.blocks} blocks, "
+                f"{stats.pairs_compared} pairs compared, {stats.suggested} suggested, {stats.merged} merged")
+    return stats
+
+
+def merge_candidates(candidate: Candidate, other: Candidate) -> Candidate:
+    """
+    Merge two candidates that are the same person and return the one kept.
+    The kept candidate is the one whose user has logged in, else the one
+    with assessments, else the older one. It takes over the other's
+    assessments, skills and source records and the notes and resume it
+    lacks; the other's user is then deleted along with its candidate.
+
+    Raises ValueError when both users have logged in, as each is then a
+    real account rather than an imported placeholder.
+    """
+    if candidate.user.last_login and other.user.last_login:
+        raise ValueError(f"{candidate.user.username} and {other.user.username} both have accounts in use")
+
+    def precedence(profile):
+        return (profile.user.last_login is not None, profile.latest_assessment_id is not None, -profile.pk)
+
+    keep, duplicate = sorted([candidate, other], key=precedence, reverse=True)
+    with transaction.atomic():
+        Assessment.objects.filter(candidate=duplicate).update(candidate=keep)
+        SourceRecord.objects.filter(candidate=duplicate).update(candidate=keep)
+        CandidateSkill.objects.bulk_create(
+            [CandidateSkill(candidate=keep, skill_id=skill_id)
+             for skill_id in duplicate.skills.values_list('id', flat=True)],
+            ignore_conflicts=True,
+        )
+
+        update_fields = [name for name in ('resume_url', 'interview_notes')
+                         if not getattr(keep, name) and getattr(duplicate, name)]
+        for name in update_fields:
+            setattr(keep, name, getattr(duplicate, name))
+        if update_fields:
+            keep.save(update_fields=update_fields + ['updated_at'])
+
+        # The duplicate's stage counter goes with its assessments; deleting
+        # it then only takes it out of the total and interview counters
+        Candidate.refresh_latest_assessment(duplicate.pk)
+        duplicate_name = duplicate.user.username
+        duplicate.user.delete()
+        Candidate.refresh_latest_assessment(keep.pk)
+        Candidate.refresh_search([keep.pk])
+
+    logger.info(f"Merged candidate {duplicate_name} into {keep.user.username}")
+    return keep
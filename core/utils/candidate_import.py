@@ -0,0 +1,387 @@
+import hashlib
+import itertools
+import json
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.models import Candidate, CandidateSkill, DashboardStats, Skill, SourceRecord, User
+from core.utils import cache_utils
+
+logger = logging.getLogger(__name__)
+
+# Rows written per transaction
+BATCH_SIZE = 1000
+
+# Values every imported candidate is given, new or existing
+IMPORTED_CANDIDATE_VALUES = {
+    'profile_completed': True,
+    'generated_password': 'default',
+    'data_cleanup_status': 'ACTIVE',
+    'interview_status': 'PENDING',
+}
+
+
+@dataclass
+class CandidateRecord:
+    """
+    One candidate read from an import source.
+    """
+    username: str
+    full_name: str
+    source: str
+    source_score: float
+    # None leaves the skills of an existing candidate as they are
+    skills: Optional[List[str]] = None
+    # Id of the row in its source; rows without one are written on every run
+    external_id: Optional[str] = None
+
+    @property
+    def email(self) -> str:
+        # Placeholder address, so imported profiles are never emailed by accident
+        return f"{self.username}@gmail.com"
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        Hash of the values the record is imported with. The full name is
+        left out: it is only written when the user is created, so a row
+        whose name alone changed has nothing to update.
+        """
+        values = [self.username, self.source, float(self.source_score),
+                  None if self.skills is None else sorted(self.skills)]
+        return hashlib.blake2b(json.dumps(values).encode(), digest_size=16).hexdigest()
+
+
+@dataclass
+class ImportStats:
+    """
+    Counters of an import run.
+    """
+    COUNTERS = ('rows', 'skipped', 'users_created', 'candidates_created', 'candidates_updated', 'unchanged')
+
+    rows: int = 0
+    skipped: int = 0
+    users_created: int = 0
+    candidates_created: int = 0
+    candidates_updated: int = 0
+    unchanged: int = 0
+    # External ids, by source, of the records missing from this run's export
+    vanished: Dict[str, List[str]] = field(default_factory=dict)
+    # Shards of a sharded import, and those done by an earlier run
+    shards: int = 0
+    resumed_shards: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    def counts(self) -> Dict[str, int]:
+        return {counter: getattr(self, counter) for counter in self.COUNTERS}
+
+    def add(self, other) -> None:
+        """Add the counters of another run, or of an ImportCheckpoint."""
+        for counter in self.COUNTERS:
+            setattr(self, counter, getattr(self, counter) + getattr(other, counter))
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.rows / elapsed if elapsed else 0.0
+
+
+def import_candidates(records: Iterable[Optional[CandidateRecord]], batch_size: int = BATCH_SIZE,
+                      progress: Optional[Callable[[ImportStats], None]] = None,
+                      incremental: bool = False) -> ImportStats:
+    """
+    Create or update the candidates of an import source, batch_size rows
+    per transaction. A None record counts as a skipped row. progress is
+    called with the running counters after every batch.
+
+    Every record with an external id is stored as a SourceRecord with its
+    fingerprint. An incremental import leaves out the records whose
+    fingerprint has not changed since they were last written, so its
+    writes are proportional to the changes in the export. Either way, the
+    source records missing from the export are marked as vanished.
+
+    The rows are written with bulk queries, which send no model signals,
+    so the work the signals and Candidate.save would do is done here for
+    the whole batch or, for the dashboard counters, once for the whole run.
+    """
+    stats = ImportStats()
+    seen = import_records(records, stats, batch_size, progress, incremental)
+    stats.vanished = mark_vanished(seen)
+    finish_import()
+    return stats
+
+
+def import_records(records: Iterable[Optional[CandidateRecord]], stats: ImportStats, batch_size: int = BATCH_SIZE,
+                   progress: Optional[Callable[[ImportStats], None]] = None,
+                   incremental: bool = False) -> Dict[str, Set[str]]:
+    """
+    Write the records batch by batch, counting them in stats, and return
+    the external ids seen by source. Leaves the end of run work to the
+    caller, so a sharded import does it once for all of its shards.
+    """
+    seen: Dict[str, Set[str]] = defaultdict(set)
+    records = iter(records)
+    while True:
+        batch = list(itertools.islice(records, batch_size))
+        if not batch:
+            break
+        for record in batch:
+            if record is not None and record.external_id:
+                seen[record.source].add(record.external_id)
+        import_batch(batch, stats, incremental=incremental)
+        if progress:
+            progress(stats)
+    return seen
+
+
+def import_batch(batch: List[Optional[CandidateRecord]], stats: ImportStats, incremental: bool = False) -> None:
+    """
+    Write one batch of records in a single transaction: one query each to
+    resolve the existing source records, users and candidates, then bulk
+    inserts and updates. When incremental, the unchanged records are left
+    out first.
+    """
+    # A username seen twice in a batch takes the values of its last row
+    records: Dict[str, CandidateRecord] = {}
+    for record in batch:
+        stats.rows += 1
+        if record is None:
+            stats.skipped += 1
+        else:
+            records[record.username] = record
+
+    if incremental and records:
+        unchanged = unchanged_records(records.values())
+        stats.unchanged += len(unchanged)
+        records = {username: record for username, record in records.items() if username not in unchanged}
+
+    if not records:
+        return
+
+    now = timezone.now()
+    with transaction.atomic():
+        lock_usernames(records)
+        # Rows imported before belong to the candidate their source record
+        # points at, which after a merge is no longer the one named by the
+        # username; only the other rows are resolved by username
+        linked = linked_candidates(records.values())
+        unlinked = [username for username in records if username not in linked]
+        user_ids = dict(User.objects.filter(username__in=unlinked).values_list('username', 'id'))
+
+        new_users = [
+            User(username=username, password='default', email=records[username].email,
+                 full_name=records[username].full_name, is_candidate=True, first_name=' ', last_name=' ',
+                 date_joined=now)
+            for username in unlinked if username not in user_ids
+        ]
+        if new_users:
+            # Rows whose email belongs to another user are left out and skipped below
+            User.objects.bulk_create(new_users, ignore_conflicts=True)
+            created = dict(User.objects.filter(username__in=[user.username for user in new_users])
+                           .values_list('username', 'id'))
+            stats.users_created += len(created)
+            user_ids.update(created)
+
+        missing = [username for username in unlinked if username not in user_ids]
+        if missing:
+            logger.warning(f"Skipped {len(missing)} imported candidates whose user could not be created, "
+                           f"e.g. {missing[0]}")
+            stats.skipped += len(missing)
+
+        by_user = dict(Candidate.objects.filter(user_id__in=user_ids.values()).values_list('user_id', 'id'))
+        new_candidates = []
+        for username, user_id in user_ids.items():
+            if user_id not in by_user:
+                record = records[username]
+                new_candidates.append(Candidate(user_id=user_id, source=record.source,
+                                                source_score=record.source_score, **IMPORTED_CANDIDATE_VALUES))
+        for candidate in Candidate.objects.bulk_create(new_candidates):
+            by_user[candidate.user_id] = candidate.id
+        stats.candidates_created += len(new_candidates)
+
+        # Candidate id of each record written
+        candidate_ids = {username: by_user[user_id] for username, user_id in user_ids.items()}
+        candidate_ids.update({username: candidate_id for username, (candidate_id, _) in linked.items()})
+        new_ids = {candidate.id for candidate in new_candidates}
+        updated_candidates = {}
+        for username, candidate_id in candidate_ids.items():
+            record = records[username]
+            # A merged candidate kept from another source keeps that source and
+            # its score, which would otherwise flip with every import of each
+            if candidate_id in new_ids or linked.get(username, (candidate_id, record.source))[1] != record.source:
+                continue
+            updated_candidates[candidate_id] = record
+        # In id order, so concurrent batches lock the rows they share in the same order
+        stats.candidates_updated += update_candidates(sorted(updated_candidates.items()), now)
+
+        skills = {candidate_ids[username]: record.skills
+                  for username, record in records.items()
+                  if username in candidate_ids and record.skills is not None}
+        if skills:
+            replace_skills(skills)
+
+        # What Candidate.save and the skill signals would have refreshed
+        Candidate.refresh_search(list(set(candidate_ids.values())))
+
+        source_records = {
+            (record.source, record.external_id): SourceRecord(
+                source=record.source, external_id=record.external_id,
+                candidate_id=candidate_ids[username], fingerprint=record.fingerprint, imported_at=now)
+            for username, record in records.items() if username in candidate_ids and record.external_id
+        }
+        SourceRecord.objects.bulk_create(
+            source_records.values(), update_conflicts=True, unique_fields=['source', 'external_id'],
+            update_fields=['candidate', 'fingerprint', 'imported_at', 'vanished_at'],
+        )
+
+
+def linked_candidates(records: Iterable[CandidateRecord]) -> Dict[str, Tuple[int, str]]:
+    """
+    The candidate id and source of the records that have a source record,
+    by username, read with one query per source of the records.
+    """
+    by_source: Dict[str, Dict[str, CandidateRecord]] = defaultdict(dict)
+    for record in records:
+        if record.external_id:
+            by_source[record.source][record.external_id] = record
+
+    linked = {}
+    for source, by_id in by_source.items():
+        rows = SourceRecord.objects.filter(source=source, external_id__in=by_id).values_list(
+            'external_id', 'candidate_id', 'candidate__source')
+        linked.update({by_id[external_id].username: (candidate_id, candidate_source)
+                       for external_id, candidate_id, candidate_source in rows})
+    return linked
+
+
+def lock_usernames(usernames: Iterable[str]) -> None:
+    """
+    Take a transaction level advisory lock per username, in a fixed order,
+    so batches importing the same usernames at the same time, from other
+    shards or another import, run one after the other instead of racing
+    to create the same users and candidates or deadlocking on their rows.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT pg_advisory_xact_lock(lock_key) FROM ('
+            'SELECT DISTINCT hashtext(username) AS lock_key FROM unnest(%s::text[]) AS username '
+            'ORDER BY lock_key) AS lock_keys',
+            [list(usernames)],
+        )
+
+
+def unchanged_records(records: Iterable[CandidateRecord]) -> Set[str]:
+    """
+    Usernames of the records imported before with the same values, read
+    with one query per source of the records.
+    """
+    by_source: Dict[str, Dict[str, CandidateRecord]] = defaultdict(dict)
+    for record in records:
+        if record.external_id:
+            by_source[record.source][record.external_id] = record
+
+    unchanged = set()
+    for source, by_id in by_source.items():
+        fingerprints = SourceRecord.objects.filter(
+            source=source, external_id__in=by_id, vanished_at__isnull=True,
+        ).values_list('external_id', 'fingerprint')
+        unchanged.update(by_id[external_id].username for external_id, fingerprint in fingerprints
+                         if by_id[external_id].fingerprint == fingerprint)
+    return unchanged
+
+
+def mark_vanished(seen: Dict[str, Set[str]]) -> Dict[str, List[str]]:
+    """
+    Mark the source records missing from an export as vanished, given the
+    external ids seen in it by source, and return the missing ids. Only
+    sources with rows in the export are checked, so an empty file does
+    not mark a whole source as vanished. Their candidates are kept.
+    """
+    now = timezone.now()
+    vanished = {}
+    for source, external_ids in seen.items():
+        missing = [
+            (pk, external_id)
+            for pk, external_id in SourceRecord.objects.filter(source=source, vanished_at__isnull=True)
+            .values_list('id', 'external_id').iterator(chunk_size=BATCH_SIZE * 10)
+            if external_id not in external_ids
+        ]
+        for start in range(0, len(missing), BATCH_SIZE):
+            ids = [pk for pk, _ in missing[start:start + BATCH_SIZE]]
+            SourceRecord.objects.filter(pk__in=ids).update(vanished_at=now)
+        if missing:
+            logger.info(f"{len(missing)} {source} records are no longer in the export")
+            vanished[source] = [external_id for _, external_id in missing]
+    return vanished
+
+
+def update_candidates(candidates: List[Tuple[int, CandidateRecord]], now) -> int:
+    """
+    Write the imported values over existing candidates, given as (candidate
+    id, record) pairs, with a single UPDATE ... FROM (VALUES ...), and
+    return the number of candidates updated. Django's bulk_update builds a
+    CASE expression per row and field, which costs far more to compile
+    than the update takes to run.
+    """
+    if not candidates:
+        return 0
+
+    source = Candidate._meta.get_field('source')
+    source_score = Candidate._meta.get_field('source_score')
+    constants = {Candidate._meta.get_field(name): value for name, value in IMPORTED_CANDIDATE_VALUES.items()}
+    constants[Candidate._meta.get_field('updated_at')] = now
+
+    assignments = [f'{source.column} = batch.{source.column}',
+                   f'{source_score.column} = batch.{source_score.column}']
+    assignments += [f'{field.column} = %s' for field in constants]
+    params = [field.get_db_prep_save(value, connection) for field, value in constants.items()]
+    for candidate_id, record in candidates:
+        params += [candidate_id, source.get_db_prep_save(record.source, connection),
+                   source_score.get_db_prep_save(record.source_score, connection)]
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {Candidate._meta.db_table} SET {", ".join(assignments)} '
+            f'FROM (VALUES {", ".join(["(%s, %s, %s)"] * len(candidates))}) '
+            f'AS batch (id, {source.column}, {source_score.column}) '
+            f'WHERE {Candidate._meta.db_table}.id = batch.id',
+            params,
+        )
+        return cursor.rowcount
+
+
+def replace_skills(skills: Dict[int, List[str]]) -> None:
+    """
+    Set the skills of several candidates, from candidate id to skill names,
+    with one delete and one insert.
+    """
+    skill_ids = {Skill.normalize(skill.name): skill.id
+                 for skill in Skill.for_names(itertools.chain.from_iterable(skills.values()))}
+    CandidateSkill.objects.filter(candidate_id__in=skills).delete()
+    CandidateSkill.objects.bulk_create([
+        CandidateSkill(candidate_id=candidate_id, skill_id=skill_id)
+        for candidate_id, names in skills.items()
+        for skill_id in {skill_ids[Skill.normalize(name)] for name in names}
+    ])
+
+
+def finish_import() -> None:
+    """
+    Bring the state the bulk writes bypassed up to date at the end of a
+    run: the dashboard counters, the source percentiles and the cached
+    pages and skill list.
+    """
+    DashboardStats.reconcile()
+    Candidate.refresh_normalized_scores()
+    cache_utils.invalidate(cache_utils.DASHBOARD)
+    cache_utils.invalidate(cache_utils.SKILLS)
@@ -0,0 +1,203 @@
+import csv
+import logging
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from core.utils.candidate_import import CandidateRecord
+
+logger = logging.getLogger(__name__)
+
+# Bytes of CSV parsed into each record batch, and rows per Parquet batch.
+# Only the needed columns are converted and batches are read as they are
+# consumed, so memory stays bounded whatever the size of the file. The CSV
+# reader reads a few dozen blocks ahead, so the block size sets the budget.
+CSV_BLOCK_SIZE = 1024 * 1024
+PARQUET_BATCH_ROWS = 50000
+
+
+@dataclass(frozen=True)
+class Shard:
+    """
+    Part of a source file imported on its own: a byte range of a CSV file
+    from one line start to another, or a range of Parquet row groups.
+    """
+    index: int
+    start: int
+    end: int
+
+
+class CandidateSource:
+    """
+    Export format of a candidate source: the columns read from it and how a
+    batch of them becomes candidate records. Scores and skill flags are
+    computed on whole columns; only building the records is per row.
+    """
+    source = None
+    # The source's own id of a row, kept to detect changed and vanished rows
+    id_column = None
+    name_column = None
+    score_column = None
+    # Skills a candidate is tagged with when the column is above zero
+    skill_columns: Dict[str, str] = {}
+
+    @property
+    def columns(self) -> List[str]:
+        return [self.id_column, self.name_column, self.score_column, *self.skill_columns]
+
+    def read(self, path: str, shard: Optional[Shard] = None) -> Iterator[Optional[CandidateRecord]]:
+        """Records of a CSV or Parquet export, None for rows without a name."""
+        for batch in read_batches(path, self.columns, string_columns=[self.id_column, self.name_column],
+                                  float_columns=[self.score_column, *self.skill_columns], shard=shard):
+            yield from self.records(batch)
+
+    def external_ids(self, path: str, shard: Optional[Shard] = None) -> Iterator[str]:
+        """Ids of the rows of an export, reading no other column."""
+        for batch in read_batches(path, [self.id_column], string_columns=[self.id_column], shard=shard):
+            yield from filter(None, batch.column(0).to_pylist())
+
+    def usernames(self, names: pa.Array) -> pa.Array:
+        return names
+
+    def records(self, batch: pa.RecordBatch) -> Iterator[Optional[CandidateRecord]]:
+        names = batch.column(self.name_column)
+        usernames = self.usernames(names).to_pylist()
+        external_ids = batch.column(self.id_column).to_pylist()
+        scores = numeric(batch.column(self.score_column)).to_pylist()
+        skill_flags = [(skill, pc.greater(numeric(batch.column(column)), 0).to_pylist())
+                       for column, skill in self.skill_columns.items()]
+
+        for i, name in enumerate(names.to_pylist()):
+            if not name:
+                yield None
+                continue
+            yield CandidateRecord(
+                username=usernames[i],
+                full_name=name,
+                source=self.source,
+                source_score=scores[i],
+                skills=[skill for skill, flags in skill_flags if flags[i]] if self.skill_columns else None,
+                external_id=external_ids[i] or None,
+            )
+
+
+class GitHubSource(CandidateSource):
+    source = 'GITHUB'
+    id_column = 'Git_Contributor_ID'
+    name_column = 'Git_UserName'
+    score_column = 'combined_score'
+
+
+class StackOverflowSource(CandidateSource):
+    source = 'STACK_OVERFLOW'
+    id_column = 'user_id'
+    name_column = 'display_name'
+    score_column = 'weighted_score'
+    skill_columns = {
+        'total_python_tags': 'Python',
+        'total_javascript_tags': 'JavaScript',
+        'total_java_tags': 'Java',
+        'total_csharp_tags': 'C#',
+        'total_php_tags': 'PHP',
+    }
+
+    def usernames(self, names: pa.Array) -> pa.Array:
+        # Format username (lowercase with hyphens)
+        return pc.replace_substring(pc.utf8_lower(names), ' ', '-')
+
+
+def numeric(column: pa.Array) -> pa.Array:
+    """A column as floats, with missing values as zero."""
+    return pc.fill_null(pc.cast(column, pa.float64()), 0.0)
+
+
+def read_batches(path: str, columns: List[str], string_columns: List[str] = (), float_columns: List[str] = (),
+                 shard: Optional[Shard] = None) -> Iterator[pa.RecordBatch]:
+    """
+    Stream the given columns of a CSV or Parquet file, or of one shard of
+    it, as record batches. Columns missing from the file come back as
+    nulls; string_columns are read as text even when every value looks
+    like a number, and float_columns as floats. The CSV reader would
+    otherwise fix a column's type from the first block, and fail on a
+    later block with a decimal in a column that started out as integers.
+    """
+    if path.endswith('.parquet'):
+        parquet_file = pq.ParquetFile(path)
+        present = [column for column in columns if column in parquet_file.schema_arrow.names]
+        row_groups = range(shard.start, shard.end) if shard else None
+        for batch in parquet_file.iter_batches(batch_size=PARQUET_BATCH_ROWS, row_groups=row_groups,
+                                               columns=present):
+            yield with_columns(batch, columns, string_columns, float_columns)
+        return
+
+    convert_options = pa_csv.ConvertOptions(
+        include_columns=columns,
+        include_missing_columns=True,
+        column_types={**{column: pa.string() for column in string_columns},
+                      **{column: pa.float64() for column in float_columns}},
+    )
+    if shard is None:
+        yield from pa_csv.open_csv(path, read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_SIZE),
+                                   convert_options=convert_options)
+        return
+
+    # A shard starts after the header, so its column names are read apart
+    with open(path, newline='', encoding='utf-8-sig') as csv_file:
+        column_names = next(csv.reader(csv_file), [])
+    with pa.OSFile(path) as source_file:
+        yield from pa_csv.open_csv(
+            source_file.get_stream(shard.start, shard.end - shard.start),
+            read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_SIZE, column_names=column_names),
+            convert_options=convert_options,
+        )
+
+
+def shards(path: str, shard_size: int) -> List[Shard]:
+    """
+    Split a CSV or Parquet file into shards of about shard_size bytes: CSV
+    byte ranges ending on a line boundary, or runs of whole row groups.
+    """
+    if path.endswith('.parquet'):
+        metadata = pq.ParquetFile(path).metadata
+        bounds = [0]
+        size = 0
+        for row_group in range(metadata.num_row_groups):
+            size += metadata.row_group(row_group).total_byte_size
+            if size >= shard_size:
+                bounds.append(row_group + 1)
+                size = 0
+        if bounds[-1] != metadata.num_row_groups:
+            bounds.append(metadata.num_row_groups)
+    else:
+        file_size = os.path.getsize(path)
+        with open(path, 'rb') as csv_file:
+            csv_file.readline()
+            bounds = [csv_file.tell()]
+            while bounds[-1] < file_size:
+                # Move on to the start of the line after the shard's end
+                csv_file.seek(bounds[-1] + shard_size)
+                csv_file.readline()
+                bounds.append(min(csv_file.tell(), file_size))
+
+    return [Shard(index, start, end) for index, (start, end) in enumerate(zip(bounds, bounds[1:]))]
+
+
+def with_columns(batch: pa.RecordBatch, columns: List[str], string_columns: List[str] = (),
+                 float_columns: List[str] = ()) -> pa.RecordBatch:
+    """
+    The batch with a null column for each of the columns it lacks, the
+    string_columns cast to text and the float_columns to floats, as the
+    CSV reader returns them.
+    """
+    arrays = [batch.column(column) if column in batch.schema.names else pa.nulls(batch.num_rows)
+              for column in columns]
+    types = {**{column: pa.string() for column in string_columns},
+             **{column: pa.float64() for column in float_columns}}
+    arrays = [pc.cast(array, types[column]) if column in types else array
+              for column, array in zip(columns, arrays)]
+    return pa.RecordBatch.from_arrays(arrays, names=columns)
@@ -0,0 +1,262 @@
+import logging
+import smtplib
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection as db_connection, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from core.models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DispatchStats:
+    """
+    Counters of a dispatch run.
+    """
+    batches: int = 0
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+    deferred: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def counts(self) -> Dict[str, int]:
+        counts = asdict(self)
+        del counts['started_at']
+        return counts
+
+
+def queue_email(to_email: str, subject: str, body: str, html_body: str = '') -> OutboundEmail:
+    """
+    Put an email in the outbox and have it sent once the current
+    transaction commits. The request only pays for an INSERT; the
+    dispatcher task opens the SMTP connection.
+    """
+    email = OutboundEmail.objects.create(to_email=to_email, subject=subject[:255], body=body, html_body=html_body)
+    transaction.on_commit(request_dispatch)
+    return email
+
+
+def request_dispatch() -> None:
+    """
+    Start the dispatcher task. The publish is not retried, so a broker
+    outage fails it within seconds instead of holding up the request; the
+    email stays queued and the periodic dispatch picks it up.
+    """
+    from core.tasks import dispatch_outbound_emails
+    try:
+        dispatch_outbound_emails.apply_async(retry=False)
+    except Exception as e:
+        logger.warning(f"Could not start the email dispatcher, leaving it to the periodic run: {str(e)}")
+
+
+def dispatch_emails(batch_size: Optional[int] = None, time_limit: Optional[float] = None) -> DispatchStats:
+    """
+    Send the due emails of the outbox, a batch at a time over one SMTP
+    connection per batch, until none are left or time_limit seconds have
+    passed. Several dispatchers can run at once: each claims its batch
+    with SKIP LOCKED and never sees the others' emails.
+
+    Delivery is at least once. A dispatcher that dies, or stalls past
+    EMAIL_OUTBOX_CLAIM_TIMEOUT, after the server accepted an email but
+    before recording it, loses its claim and the email is sent again.
+    A dispatcher checks that it still holds an email's claim before
+    sending it and when recording the outcome, which keeps such repeats
+    to the email in flight.
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    time_limit = time_limit or settings.EMAIL_OUTBOX_DISPATCH_TIME
+    stats = DispatchStats()
+    while stats.elapsed < time_limit:
+        emails, deferred = claim_batch(batch_size)
+        stats.deferred += deferred
+        if not emails and not deferred:
+            break
+        # A batch held back whole by rate limits still moved those emails
+        # out of the way of the ones queued behind them
+        if emails:
+            stats.batches += 1
+            send_batch(emails, stats)
+
+    if stats.batches or stats.deferred:
+        logger.info(f"Dispatched {stats.batches} email batches in {stats.elapsed:.1f}s: {stats.sent} sent, "
+                    f"{stats.retried} to retry, {stats.failed} failed, {stats.deferred} deferred")
+    return stats
+
+
+def claim_batch(batch_size: int) -> Tuple[List[OutboundEmail], int]:
+    """
+    Mark up to batch_size due emails as sending and return them, with the
+    number deferred for their domain's rate limit. Claims older than
+    EMAIL_OUTBOX_CLAIM_TIMEOUT belong to a dispatcher that died mid-batch
+    and are released first.
+    """
+    with transaction.atomic():
+        now = timezone.now()
+        stale = now - timedelta(seconds=settings.EMAIL_OUTBOX_CLAIM_TIMEOUT)
+        OutboundEmail.objects.filter(status='SENDING', claimed_at__lt=stale).update(status='PENDING')
+
+        due = list(OutboundEmail.objects.select_for_update(skip_locked=True)
+                   .filter(status='PENDING', next_attempt_at__lte=now)
+                   .order_by('next_attempt_at', 'id')[:batch_size])
+        if not due:
+            return [], 0
+
+        domains = {email.domain for email in due}
+        lock_domains(domains)
+        # Read after the locks, so claims committed while waiting count
+        now = timezone.now()
+        budgets = domain_budgets(domains, now)
+        claimed, deferred = [], []
+        for email in due:
+            if email.domain in budgets and budgets[email.domain] <= 0:
+                deferred.append(email.id)
+                continue
+            if email.domain in budgets:
+                budgets[email.domain] -= 1
+            claimed.append(email)
+
+        OutboundEmail.objects.filter(id__in=[email.id for email in claimed]).update(status='SENDING',
+                                                                                   claimed_at=now)
+        for email in claimed:
+            email.status, email.claimed_at = 'SENDING', now
+        if deferred:
+            # Out of the way of the other domains' emails until the window moves on
+            window = timedelta(seconds=settings.EMAIL_DOMAIN_RATE_WINDOW)
+            OutboundEmail.objects.filter(id__in=deferred).update(next_attempt_at=now + window)
+    return claimed, len(deferred)
+
+
+def lock_domains(domains) -> None:
+    """
+    Take a transaction-level advisory lock per domain, in a fixed order, so
+    dispatchers running at the same time spend a domain's rate budget one
+    after the other and the limit holds across them. Nothing to lock when
+    there is no limit.
+    """
+    if not settings.EMAIL_DOMAIN_RATE_LIMIT:
+        return
+    with db_connection.cursor() as cursor:
+        for domain in sorted(domains):
+            cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', [f'email-domain:{domain}'])
+
+
+def domain_budgets(domains, now) -> Dict[str, int]:
+    """
+    Emails each domain can still take in the current rate window, from
+    the emails claimed for it within the window. Empty when there is no
+    limit. Callers hold the domains' locks (see lock_domains).
+    """
+    limit = settings.EMAIL_DOMAIN_RATE_LIMIT
+    if not limit:
+        return {}
+    window_start = now - timedelta(seconds=settings.EMAIL_DOMAIN_RATE_WINDOW)
+    used = dict(OutboundEmail.objects.filter(domain__in=domains, claimed_at__gte=window_start)
+                .values_list('domain').annotate(Count('id')))
+    return {domain: limit - used.get(domain, 0) for domain in domains}
+
+
+def send_batch(emails: List[OutboundEmail], stats: DispatchStats) -> None:
+    """
+    Send claimed emails over a single SMTP connection and record the
+    outcome of each. A failed send closes the connection, and the next
+    email opens a fresh one, so one broken session does not fail the
+    rest of the batch. An email whose claim was released meanwhile, and
+    may be with another dispatcher, is left alone.
+    """
+    connection = get_connection(fail_silently=False, username=settings.EMAIL_HOST_USER,
+                                password=settings.EMAIL_HOST_PASSWORD)
+    sent = []
+    failures: Dict[int, Exception] = {}
+    try:
+        for email in emails:
+            if not claimed(email).exists():
+                logger.warning(f"Lost the claim on email {email.id}, leaving it to its new dispatcher")
+                continue
+            message = EmailMultiAlternatives(email.subject, email.body, settings.DEFAULT_FROM_EMAIL,
+                                             [email.to_email], connection=connection)
+            if email.html_body:
+                message.attach_alternative(email.html_body, 'text/html')
+            try:
+                connection.open()
+                connection.send_messages([message])
+            except Exception as e:
+                failures[email.id] = e
+                connection.close()
+            else:
+                sent.append(email.id)
+    finally:
+        connection.close()
+
+    now = timezone.now()
+    # The bodies are not needed once sent and some carry passwords
+    # A batch is claimed at one time, so one update covers the claims still held
+    OutboundEmail.objects.filter(id__in=sent, status='SENDING', claimed_at=emails[0].claimed_at).update(
+        status='SENT', sent_at=now, body='', html_body='', last_error='', attempts=F('attempts') + 1)
+    stats.sent += len(sent)
+
+    outcomes = Counter()
+    for email in emails:
+        if email.id in failures:
+            outcomes[record_failure(email, failures[email.id], now)] += 1
+    stats.retried += outcomes['PENDING']
+    stats.failed += outcomes['FAILED']
+
+
+def claimed(email: OutboundEmail):
+    """The email's row, as long as the claim this dispatcher made on it still holds."""
+    return OutboundEmail.objects.filter(pk=email.pk, status='SENDING', claimed_at=email.claimed_at)
+
+
+def record_failure(email: OutboundEmail, error: Exception, now) -> str:
+    """
+    Schedule a failed email for another attempt after an exponentially
+    growing delay, or give up on it after EMAIL_OUTBOX_MAX_ATTEMPTS or
+    when the server refused the recipient for good. Returns its new status.
+    """
+    email.attempts += 1
+    email.last_error = str(error)
+    if is_permanent(error) or email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = 'FAILED'
+        logger.error(f"Giving up on email {email.id} to {email.to_email} after {email.attempts} attempts: "
+                     f"{email.last_error}")
+    else:
+        email.status = 'PENDING'
+        delay = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (email.attempts - 1)
+        email.next_attempt_at = now + timedelta(seconds=delay)
+        logger.warning(f"Email {email.id} to {email.to_email} failed, retrying in {delay}s: {email.last_error}")
+    claimed(email).update(attempts=email.attempts, last_error=email.last_error, status=email.status,
+                          next_attempt_at=email.next_attempt_at)
+    return email.status
+
+
+def is_permanent(error: Exception) -> bool:
+    """
+    Whether the server rejected the recipient or the message itself with
+    a permanent (5xx) reply, which no retry will change. Authentication and
+    sender errors are left to retry, as they come from configuration.
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return isinstance(error, smtplib.SMTPDataError) and error.smtp_code >= 500
+
+
+def purge_sent_emails(days: Optional[int] = None) -> int:
+    """Delete the emails sent more than days ago and return how many there were."""
+    days = days or settings.EMAIL_OUTBOX_RETENTION_DAYS
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = OutboundEmail.objects.filter(status='SENT', sent_at__lt=cutoff).delete()
+    return deleted
@@ -1,13 +1,12 @@
 import random
 import string
-from django.core.mail import send_mail
-from django.conf import settings
 import logging
-from django.core.mail import send_mail
 from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils import timezone
 
+from core.utils.email_outbox import queue_email
+
 logger = logging.getLogger(__name__)
 
 
@@ -50,7 +49,7 @@ def send_candidate_credentials_email(candidate_username, candidate_email, candid
     - candidate_name: Optional name of the candidate for personalization
 
     Returns:
-    - Boolean indicating if the email was sent successfully
+    - Boolean indicating if the email was queued successfully
     """
 
     subject = "Your Recruiter Platform Credentials"
@@ -75,19 +74,11 @@ The Recruiter Platform Team
 """
 
     try:
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[candidate_email],
-            fail_silently=False,
-            auth_user=settings.EMAIL_HOST_USER,
-            auth_password=settings.EMAIL_HOST_PASSWORD,
-        )
-        logger.info(f"Credentials email sent to candidate: {candidate_email}")
+        queue_email(candidate_email, subject, message)
+        logger.info(f"Credentials email queued for candidate: {candidate_email}")
         return True
     except Exception as e:
-        logger.error(f"Failed to send credentials email to {candidate_email}: {str(e)}")
+        logger.error(f"Failed to queue credentials email to {candidate_email}: {str(e)}")
         return False
 
 
@@ -99,7 +90,7 @@ def send_assessment_invitation_email(assessment):
     - assessment: Assessment object with candidate and details
 
     Returns:
-    - Boolean indicating if the email was sent successfully
+    - Boolean indicating if the email was queued successfully
     """
     subject = "Your Coding Assessment Invitation"
 
@@ -127,19 +118,11 @@ The Recruiter Platform Team
 """
 
     try:
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[candidate_email],
-            fail_silently=False,
-            auth_user=settings.EMAIL_HOST_USER,
-            auth_password=settings.EMAIL_HOST_PASSWORD,
-        )
-        logger.info(f"Assessment invitation sent to candidate: {candidate_username}")
+        queue_email(candidate_email, subject, message)
+        logger.info(f"Assessment invitation queued for candidate: {candidate_username}")
         return True
     except Exception as e:
-        logger.error(f"Failed to send assessment invitation to {candidate_username}: {str(e)}")
+        logger.error(f"Failed to queue assessment invitation to {candidate_username}: {str(e)}")
         return False
 
 
@@ -151,7 +134,7 @@ def send_assessment_acceptance_email(assessment):
     - assessment: Assessment object with candidate and details
 
     Returns:
-    - Boolean indicating if the email was sent successfully
+    - Boolean indicating if the email was queued successfully
     """
     subject = "Your Assessment is Ready to Start"
 
@@ -179,19 +162,11 @@ The Recruiter Platform Team
 """
 
     try:
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[candidate_email],
-            fail_silently=False,
-            auth_user=settings.EMAIL_HOST_USER,
-            auth_password=settings.EMAIL_HOST_PASSWORD,
-        )
-        logger.info(f"Assessment start link sent to candidate: {candidate_username}")
+        queue_email(candidate_email, subject, message)
+        logger.info(f"Assessment start link queued for candidate: {candidate_username}")
         return True
     except Exception as e:
-        logger.error(f"Failed to send assessment start link to {candidate_username}: {str(e)}")
+        logger.error(f"Failed to queue assessment start link to {candidate_username}: {str(e)}")
         return False
 
 
@@ -215,16 +190,7 @@ def send_interview_invitation_email(candidate, interview_date):
     html_message = render_to_string('emails/interview_invitation.html', context)
     plain_message = render_to_string('emails/interview_invitation_plain.txt', context)
 
-    send_mail(
-        subject=subject,
-        message=plain_message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[candidate.user.email],
-        html_message=html_message,
-        fail_silently=False,
-        auth_user=settings.EMAIL_HOST_USER,
-        auth_password=settings.EMAIL_HOST_PASSWORD,
-    )
+    queue_email(candidate.user.email, subject, plain_message, html_message)
 
     return True
 
@@ -247,15 +213,6 @@ def send_rejection_email(candidate):
     html_message = render_to_string('emails/rejection_notice.html', context)
     plain_message = render_to_string('emails/rejection_notice_plain.txt', context)
 
-    send_mail(
-        subject=subject,
-        message=plain_message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[candidate.user.email],
-        html_message=html_message,
-        fail_silently=False,
-        auth_user=settings.EMAIL_HOST_USER,
-        auth_password=settings.EMAIL_HOST_PASSWORD,
-    )
+    queue_email(candidate.user.email, subject, plain_message, html_message)
 
     return True
\ No newline at end of file
@@ -0,0 +1,101 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Optional, Set, Tuple
+
+import django
+
+from core.models import ImportCheckpoint
+from core.utils.candidate_import import BATCH_SIZE, ImportStats, finish_import, import_records, mark_vanished
+from core.utils.candidate_sources import CandidateSource, Shard, shards
+
+logger = logging.getLogger(__name__)
+
+# Bytes of the source file per shard, the unit of work and of resumption
+SHARD_SIZE = 64 * 1024 * 1024
+
+
+def import_key(source: CandidateSource, path: str, shard_size: int) -> str:
+    """
+    Key of an import of a file: the same until the file is modified or the
+    shard size changes, either of which invalidates its checkpoints.
+    """
+    stat = os.stat(path)
+    identity = f'{source.source}:{path}:{stat.st_size}:{stat.st_mtime_ns}:{shard_size}'
+    return hashlib.sha256(identity.encode()).hexdigest()
+
+
+def import_sharded(source: CandidateSource, path: str, workers: int, shard_size: int = SHARD_SIZE,
+                   batch_size: int = BATCH_SIZE, progress: Optional[Callable[[ImportStats], None]] = None,
+                   incremental: bool = False) -> ImportStats:
+    """
+    Import a source file split into shards, parsed and written in parallel
+    by a pool of worker processes, each with its own database connection.
+    A shard commits batch by batch like a single process import and is
+    checkpointed once complete, so a rerun after a crash skips the shards
+    already in and redoes at most the ones that were in progress, whose
+    writes are idempotent. progress is called after every shard.
+    """
+    path = os.path.abspath(path)
+    key = import_key(source, path, shard_size)
+    stats = ImportStats()
+
+    # Checkpoints of an earlier version of the file no longer apply
+    ImportCheckpoint.objects.filter(source=source.source, path=path).exclude(import_key=key).delete()
+    checkpoints = {checkpoint.shard: checkpoint for checkpoint in ImportCheckpoint.objects.filter(import_key=key)}
+
+    file_shards = shards(path, shard_size)
+    stats.shards = len(file_shards)
+    pending = [shard for shard in file_shards if shard.index not in checkpoints]
+    for checkpoint in checkpoints.values():
+        stats.add(checkpoint)
+    stats.resumed_shards = len(checkpoints)
+    if checkpoints:
+        logger.info(f"Resuming the import of {path}: {len(checkpoints)} of {len(file_shards)} shards already done")
+
+    seen: Dict[str, Set[str]] = defaultdict(set)
+    # Spawned workers set Django up afresh instead of sharing this
+    # process's database connection
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=django.setup) as pool:
+        futures = [pool.submit(import_shard, source, path, key, shard, batch_size, incremental)
+                   for shard in pending]
+        try:
+            # The vanished check needs every id in the file, including
+            # those of the shards a previous run imported
+            for shard in file_shards:
+                if shard.index in checkpoints:
+                    seen[source.source].update(source.external_ids(path, shard))
+
+            for future in as_completed(futures):
+                shard_stats, shard_seen = future.result()
+                stats.add(shard_stats)
+                for record_source, external_ids in shard_seen.items():
+                    seen[record_source].update(external_ids)
+                if progress:
+                    progress(stats)
+        except BaseException:
+            # Let the shards in progress finish and checkpoint, but start no more
+            pool.shutdown(cancel_futures=True)
+            raise
+
+    stats.vanished = mark_vanished(seen)
+    finish_import()
+    ImportCheckpoint.objects.filter(import_key=key).delete()
+    return stats
+
+
+def import_shard(source: CandidateSource, path: str, key: str, shard: Shard, batch_size: int,
+                 incremental: bool) -> Tuple[ImportStats, Dict[str, Set[str]]]:
+    """
+    Import one shard in a worker process and checkpoint it. Returns its
+    counters and the external ids it saw.
+    """
+    stats = ImportStats()
+    seen = import_records(source.read(path, shard), stats, batch_size=batch_size, incremental=incremental)
+    ImportCheckpoint.objects.create(source=source.source, path=path, import_key=key, shard=shard.index,
+                                    **stats.counts())
+    return stats, dict(seen)
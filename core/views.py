@@ -1,5 +1,4 @@
 import json
-from datetime import datetime
 
 from django.contrib import messages
 from django.contrib.auth import authenticate, login
@@ -12,11 +11,15 @@ from django.shortcuts import render, get_object_or_404
 from django.utils import timezone
 from django.views.decorators.http import require_POST
 
+from .dashboard import DEFAULT_SORT, SORT_ORDERS, InvalidCursor
+from .dashboard import page_size_from, render_candidate_page, render_search_results
+from .dashboard import skill_filter_from, skill_filter_params
 from .evaluation import evaluate_submission, logger
 from .forms import AddCandidateForm, CandidateForm, UserForm
 from .models import Assessment, Candidate
-from .models import HiringManager, CodingQuestion
+from .models import CodingQuestion, DashboardStats
 from .tasks import evaluate_assessment
+from .utils import cache_utils
 from .utils.email_utils import generate_random_password, send_candidate_credentials_email
 from .utils.email_utils import send_interview_invitation_email, send_rejection_email
 from .utils.gdpr_utils import cleanup_candidate_data
@@ -74,71 +77,10 @@ def manager_dashboard(request):
     if not request.user.is_hiring_manager:
         return HttpResponseForbidden("Access Denied: You must be a hiring manager to view this page.")
 
-    hiring_manager = request.user.hiring_manager_profile
-    candidates = Candidate.objects.all().select_related('user')
-    assessments = Assessment.objects.filter(created_by=hiring_manager).select_related('candidate__user')
+    # Maintained incrementally, so the header costs one primary key read
+    stats = DashboardStats.current()
 
-    candidate_assessments = {}
-    for assessment in assessments:
-        candidate_id = assessment.candidate.id
-        if candidate_id not in candidate_assessments or assessment.created_at > candidate_assessments[
-            candidate_id].created_at:
-            candidate_assessments[candidate_id] = assessment
-
-    for candidate in candidates:
-        if candidate.id in candidate_assessments:
-            candidate.latest_assessment = candidate_assessments[candidate.id]
-
-            status = candidate.latest_assessment.status
-            evaluation_status = candidate.latest_assessment.evaluation_status
-
-            if status == 'SENT':
-                candidate.status_display = 'Invitation Sent'
-                candidate.status_color = 'blue'
-            elif status == 'ACCEPTED':
-                candidate.status_display = 'Invitation Accepted'
-                candidate.status_color = 'green'
-            elif status == 'STARTED':
-                candidate.status_display = 'Assessment In Progress'
-                candidate.status_color = 'orange'
-            elif status == 'FINISHED':
-                if evaluation_status == 'EVALUATING':
-                    candidate.status_display = 'Evaluation In Progress'
-                    candidate.status_color = 'purple'
-                elif evaluation_status == 'PENDING':
-                    candidate.status_display = 'Awaiting Evaluation'
-                    candidate.status_color = 'yellow'
-                elif evaluation_status == 'FAILED':
-                    candidate.status_display = 'Evaluation Failed'
-                    candidate.status_color = 'red'
-                else:
-                    candidate.status_display = 'Completed'
-                    candidate.status_color = 'gray'
-            elif status == 'SCORING':
-                candidate.status_display = 'Scoring In Progress'
-                candidate.status_color = 'purple'
-            elif status == 'SCORED':
-                candidate.status_display = 'Evaluated'
-                candidate.status_color = 'green'
-            else:
-                candidate.status_display = status
-                candidate.status_color = 'gray'
-        else:
-            candidate.latest_assessment = None
-
-    total_candidates = candidates.count()
-    invited_candidates = sum(1 for c in candidates if c.latest_assessment and c.latest_assessment.status == 'SENT')
-    in_progress_assessments = sum(
-        1 for c in candidates if c.latest_assessment and c.latest_assessment.status in ['ACCEPTED', 'STARTED'])
-    completed_assessments = sum(1 for c in candidates if
-                                c.latest_assessment and c.latest_assessment.status in ['FINISHED', 'SCORING', 'SCORED'])
-    scored_assessments = sum(1 for c in candidates if c.latest_assessment and c.latest_assessment.status == 'SCORED')
-
-    accepted_for_interview = sum(1 for c in candidates if c.interview_status == 'ACCEPTED')
-    rejected_candidates = sum(1 for c in candidates if c.interview_status == 'REJECTED')
-
-    companies = HiringManager.objects.values('company_name').distinct()
-    company_names = [company['company_name'] for company in companies]
+    companies = cache_utils.company_names()
 
     # Get all candidate sources from the model
     source_choices = dict(Candidate.SOURCE_CHOICES)
@@ -147,59 +89,32 @@ def manager_dashboard(request):
     status_filter = request.GET.get('status', '')
     interview_filter = request.GET.get('interview_status', '')
     source_filter = request.GET.get('source', '')  # Add source filter
+    skills, skill_match = skill_filter_from(request.GET)
 
-    if status_filter:
-        if status_filter == 'INVITED':
-            candidates = [c for c in candidates if c.latest_assessment and c.latest_assessment.status == 'SENT']
-        elif status_filter == 'IN_PROGRESS':
-            candidates = [c for c in candidates if
-                          c.latest_assessment and c.latest_assessment.status in ['ACCEPTED', 'STARTED']]
-        elif status_filter == 'COMPLETED':
-            candidates = [c for c in candidates if
-                          c.latest_assessment and c.latest_assessment.status in ['FINISHED', 'SCORING', 'SCORED']]
-        elif status_filter == 'SCORED':
-            candidates = [c for c in candidates if c.latest_assessment and c.latest_assessment.status == 'SCORED']
-        elif status_filter == 'NO_ASSESSMENT':
-            candidates = [c for c in candidates if not c.latest_assessment]
-
-    if interview_filter:
-        candidates = [c for c in candidates if c.interview_status == interview_filter]
-
-    # Apply source filter if provided
-    if source_filter:
-        candidates = [c for c in candidates if c.source == source_filter]
-
-    sort_by = request.GET.get('sort', 'name')
-    if sort_by == 'name':
-        candidates = sorted(candidates, key=lambda c: c.user.full_name or c.user.username)
-    elif sort_by == 'status':
-        candidates = sorted(candidates, key=lambda c: c.latest_assessment.status if c.latest_assessment else 'ZZZZ')
-    elif sort_by == 'score':
-        candidates = sorted(candidates, key=lambda
-            c: c.latest_assessment.score if c.latest_assessment and c.latest_assessment.score else -1, reverse=True)
-    elif sort_by == 'interview':
-        candidates = sorted(candidates, key=lambda c: c.interview_status)
-    elif sort_by == 'date':
-        candidates = sorted(candidates, key=lambda
-            c: c.latest_assessment.created_at if c.latest_assessment else timezone.make_aware(datetime.min))
-    elif sort_by == 'source':  # Add sorting by source
-        candidates = sorted(candidates, key=lambda c: c.source)
+    sort_by = request.GET.get('sort', DEFAULT_SORT)
+    if sort_by not in SORT_ORDERS:
+        sort_by = DEFAULT_SORT
+
+    # Only the first page is rendered; the table fetches the rest on demand
+    candidate_rows, candidate_count, next_cursor = render_candidate_page(
+        request.user.hiring_manager_profile.id, sort_by, status_filter, interview_filter, source_filter,
+        skills=skills, skill_match=skill_match)
 
     context = {
-        'candidates': candidates,
-        'total_candidates': total_candidates,
-        'invited_candidates': invited_candidates,
-        'in_progress_assessments': in_progress_assessments,
-        'completed_assessments': completed_assessments,
-        'scored_assessments': scored_assessments,
-        'accepted_for_interview': accepted_for_interview,
-        'rejected_candidates': rejected_candidates,
-        'companies': company_names,
+        'candidate_rows': candidate_rows,
+        'candidate_count': candidate_count,
+        'next_cursor': next_cursor,
+        **stats,
+        'companies': companies,
         'current_sort': sort_by,
         'current_filter': status_filter,
         'current_interview_filter': interview_filter,
         'current_source_filter': source_filter,  # Add current source filter to context
         'sources': sources,  # Add sources for filtering
+        'skill_names': cache_utils.skill_names(),
+        'current_skills': skills,
+        'current_skill_match': skill_match,
+        'skill_params': skill_filter_params(skills, skill_match),
         'current_date': timezone.now().strftime('%Y-%m-%d %H:%M:%S'),
         'current_user': request.user.username,
     }
@@ -207,6 +122,68 @@ def manager_dashboard(request):
     return render(request, 'core/manager_dashboard.html', context)
 
 
+@login_required
+def manager_dashboard_candidates(request):
+    """
+    API endpoint returning the next page of the dashboard candidate table
+    as rendered rows, for the filters and sort order of the dashboard.
+    """
+    if not request.user.is_hiring_manager:
+        return JsonResponse({"error": "Access denied"}, status=403)
+
+    sort_by = request.GET.get('sort', DEFAULT_SORT)
+    if sort_by not in SORT_ORDERS:
+        return JsonResponse({"error": "Invalid sort order"}, status=400)
+
+    skills, skill_match = skill_filter_from(request.GET)
+    try:
+        candidate_rows, candidate_count, next_cursor = render_candidate_page(
+            request.user.hiring_manager_profile.id,
+            sort_by,
+            request.GET.get('status', ''),
+            request.GET.get('interview_status', ''),
+            request.GET.get('source', ''),
+            cursor=request.GET.get('cursor'),
+            page_size=page_size_from(request.GET.get('limit')),
+            skills=skills,
+            skill_match=skill_match,
+        )
+    except InvalidCursor as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    return JsonResponse({
+        "html": candidate_rows,
+        "count": candidate_count,
+        "next_cursor": next_cursor,
+    })
+
+
+@login_required
+def manager_dashboard_search(request):
+    """
+    API endpoint returning the candidates best matching a search query as
+    rendered table rows, ranked, within the filters of the dashboard.
+    """
+    if not request.user.is_hiring_manager:
+        return JsonResponse({"error": "Access denied"}, status=403)
+
+    skills, skill_match = skill_filter_from(request.GET)
+    candidate_rows, candidate_count = render_search_results(
+        request.user.hiring_manager_profile.id,
+        request.GET.get('q', ''),
+        request.GET.get('status', ''),
+        request.GET.get('interview_status', ''),
+        request.GET.get('source', ''),
+        skills=skills,
+        skill_match=skill_match,
+    )
+
+    return JsonResponse({
+        "html": candidate_rows,
+        "count": candidate_count,
+    })
+
+
 @login_required
 def invite_assessment(request, candidate_id):
     """
@@ -238,7 +215,7 @@ def invite_assessment(request, candidate_id):
         # Check if an assessment already exists for this candidate
         existing_assessment = Assessment.objects.filter(
             candidate=candidate,
-            status__in=['DRAFT', 'SENT', 'ACCEPTED', 'STARTED']
+            status__in=Assessment.OPEN_STATUSES
         ).first()
 
         if existing_assessment:
@@ -307,6 +284,7 @@ def add_candidate(request):
                 is_candidate=True,
                 password=password
             )
+            user.candidate_profile.set_skills(form.cleaned_data['skills'])
 
             # The signal should handle creating the Candidate profile,
             # storing the generated password, and sending the email
@@ -530,7 +508,7 @@ def choose_assessment_question(request, token):
             questions = assessment.available_questions.all()
         else:
             # If no specific questions are assigned, get default questions by type
-            questions = CodingQuestion.objects.all()
+            questions = cache_utils.question_catalogue()
 
         return render(request, 'core/assessment_question_selection.html', {
             'assessment': assessment,
@@ -723,12 +701,18 @@ def check_evaluation_status(request, assessment_id):
     if request.user.is_hiring_manager and assessment.created_by != request.user.hiring_manager_profile:
         return JsonResponse({"error": "Access denied"}, status=403)
 
+    # Partial progress is recorded while the evaluator streams test results
+    results = assessment.evaluation_results or {}
+    tests_completed = results.get('tests_completed', len(results.get('test_results', [])))
+
     # Return the evaluation status
     return JsonResponse({
         "id": assessment.id,
         "status": assessment.status,
         "evaluation_status": assessment.evaluation_status,
         "evaluation_score": assessment.evaluation_score,
+        "tests_completed": tests_completed,
+        "total_tests": results.get('total_tests', results.get('tests_run')),
         "completed_at": assessment.evaluation_completed_at.isoformat() if assessment.evaluation_completed_at else None
     })
 
@@ -813,6 +797,7 @@ def edit_candidate(request, candidate_id):
             candidate = form.save(commit=False)
             candidate.user = user
             candidate.save()
+            candidate.set_skills(form.cleaned_data['skills'])
 
             messages.success(request, f"Candidate {user.email} updated successfully.")
             return redirect('core:manager_dashboard')
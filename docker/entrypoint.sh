@@ -1,6 +1,32 @@
 #!/bin/bash
 set -e
 
+# Pooled containers are started with "idle <language>": bring up any
+# services the language needs once, then wait for jobs via docker exec.
+if [ "$1" = "idle" ]; then
+    if [ "$2" = "sql" ]; then
+        sudo service postgresql start
+    fi
+    exec sleep infinity
+fi
+
+# "serve <language>" runs the long-lived evaluator daemon for the language,
+# reading newline-delimited JSON jobs from stdin and streaming results back.
+if [ "$1" = "serve" ]; then
+    case "$2" in
+        "python"|"sql")
+            exec python3 /evaluators/eval_server.py "$2"
+            ;;
+        "javascript")
+            exec node /evaluators/js_evaluator.js --serve
+            ;;
+        *)
+            echo '{"id": null, "record": {"type": "error", "status": "error", "message": "Unsupported language"}}'
+            exit 1
+            ;;
+    esac
+fi
+
 # Parse arguments
 CODE_FILE=$1
 LANGUAGE=$2
@@ -13,37 +39,36 @@ echo "Starting evaluation with language: $LANGUAGE"
 # Create output directory if it doesn't exist
 mkdir -p $(dirname $OUTPUT_FILE)
 
-# Run the appropriate evaluator based on language
+# Run the appropriate evaluator based on language. The output file holds
+# newline-delimited JSON records; submission output goes to a side log.
+EXIT_CODE=0
 case "$LANGUAGE" in
     "python")
-        timeout $TIMEOUT python3 /evaluators/python_evaluator.py "$CODE_FILE" "$TEST_DATA" > "$OUTPUT_FILE" 2>&1
+        timeout $TIMEOUT python3 /evaluators/python_evaluator.py "$CODE_FILE" "$TEST_DATA" > "$OUTPUT_FILE" 2> "$OUTPUT_FILE.log" || EXIT_CODE=$?
         ;;
     "javascript")
-        timeout $TIMEOUT node /evaluators/js_evaluator.js "$CODE_FILE" "$TEST_DATA" > "$OUTPUT_FILE" 2>&1
+        timeout $TIMEOUT node /evaluators/js_evaluator.js "$CODE_FILE" "$TEST_DATA" > "$OUTPUT_FILE" 2> "$OUTPUT_FILE.log" || EXIT_CODE=$?
         ;;
     "sql")
-        # Start PostgreSQL
-        sudo service postgresql start
-        timeout $TIMEOUT python3 /evaluators/sql_evaluator.py "$CODE_FILE" "$TEST_DATA" > "$OUTPUT_FILE" 2>&1
+        # Start PostgreSQL unless a pooled container already has it running
+        sudo service postgresql status > /dev/null 2>&1 || sudo service postgresql start
+        timeout $TIMEOUT python3 /evaluators/sql_evaluator.py "$CODE_FILE" "$TEST_DATA" > "$OUTPUT_FILE" 2> "$OUTPUT_FILE.log" || EXIT_CODE=$?
         ;;
     *)
-        echo '{"status": "error", "message": "Unsupported language"}' > "$OUTPUT_FILE"
+        echo '{"type": "error", "status": "error", "message": "Unsupported language"}' > "$OUTPUT_FILE"
         exit 1
         ;;
 esac
 
-# Check exit code
-EXIT_CODE=$?
-
-# If timeout occurred
+# If timeout occurred, keep the records streamed so far and close the stream
 if [ $EXIT_CODE -eq 124 ]; then
-    echo '{"status": "timeout", "message": "Evaluation timed out"}' > "$OUTPUT_FILE"
+    echo '{"type": "timeout", "status": "timeout", "message": "Evaluation timed out"}' >> "$OUTPUT_FILE"
     exit 0
 fi
 
-# If output file is empty (error occurred but no output)
-if [ ! -s "$OUTPUT_FILE" ]; then
-    echo '{"status": "error", "message": "Evaluation failed with no output"}' > "$OUTPUT_FILE"
+# If the evaluator died without a terminal record (e.g. killed for memory)
+if ! tail -n 1 "$OUTPUT_FILE" | grep -Eq '"type": "(result|error|timeout)"'; then
+    echo '{"type": "error", "status": "error", "message": "Evaluation failed before finishing"}' >> "$OUTPUT_FILE"
 fi
 
-exit 0
\ No newline at end of file
+exit 0
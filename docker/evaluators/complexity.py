@@ -0,0 +1,185 @@
+"""
+Scaling stage for Python submissions: run the candidate function on
+generated inputs of growing size, time each run and fit the timings to
+common complexity classes.
+
+The stage is configured by a `scaling` entry in the test data:
+
+    {
+        "generator": "int_list",        # int_list | string | int | call_sequence
+        "sizes": [100, 1000, 10000],    # input sizes, smallest first
+        "repeat": 3,                    # runs per size; the fastest is kept
+        "time_budget": 10,              # seconds for the whole stage
+        "args": ["client{i}"]           # call_sequence only, formatted with the call index
+    }
+
+For `call_sequence` the function is called n times and the total time is
+fitted, so an O(1) operation shows up as O(n) growth.
+"""
+import gc
+import math
+import random
+import string
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from harness import TestTimeout, measure
+
+DEFAULT_SIZES = [100, 200, 400, 800, 1600, 3200, 6400]
+
+DEFAULT_TIME_BUDGET = 10
+
+# A more complex class must cut the residual error by this factor to win
+SIMPLER_MODEL_TOLERANCE = 1.5
+
+# Timings that grow less than this across all sizes, or never exceed the
+# noise floor, are treated as constant
+FLAT_GROWTH_RATIO = 1.3
+NOISE_FLOOR_MS = 0.01
+
+# Calls faster than this are repeated in a batch so timer noise does not dominate
+MIN_SAMPLE_MS = 5.0
+
+# Simplest first; ties go to the earlier entry
+COMPLEXITY_CLASSES: List[Tuple[str, Callable[[np.ndarray], np.ndarray]]] = [
+    ('O(1)', lambda n: np.zeros_like(n)),
+    ('O(log n)', lambda n: np.log2(n)),
+    ('O(n)', lambda n: n),
+    ('O(n log n)', lambda n: n * np.log2(n)),
+    ('O(n^2)', lambda n: n ** 2),
+]
+
+
+def generate_call(function: Callable, spec: Dict[str, Any], size: int, seed: int) -> Callable[[], Any]:
+    """Build a zero-argument call running the function on an input of the given size."""
+    rng = random.Random(seed)
+    generator = spec.get('generator', 'int_list')
+
+    if generator == 'int_list':
+        data = [rng.randint(-size, size) for _ in range(size)]
+        return lambda: function(data)
+    if generator == 'string':
+        text = ''.join(rng.choice(string.ascii_lowercase) for _ in range(size))
+        return lambda: function(text)
+    if generator == 'int':
+        return lambda: function(size)
+    if generator == 'call_sequence':
+        templates = spec.get('args', [])
+        calls = [[arg.format(i=i) if isinstance(arg, str) else arg for arg in templates] for i in range(size)]
+
+        def run_sequence():
+            for args in calls:
+                function(*args)
+        return run_sequence
+
+    raise ValueError(f"Unknown scaling generator: {generator}")
+
+
+def fit_complexity(sizes: List[int], timings: List[float]) -> Tuple[Optional[str], Dict[str, float]]:
+    """
+    Least-squares fit of t = a * f(n) + b for each complexity class,
+    weighted by 1/t so every size counts by its relative error rather than
+    the largest sizes dominating.
+
+    Returns the chosen class and the relative residual of every class that
+    fitted with a non-negative slope. The simplest class whose residual is
+    within SIMPLER_MODEL_TOLERANCE of the best one is chosen, and a curve
+    that barely grows is O(1), so noise is not read as growth.
+    """
+    n = np.asarray(sizes, dtype=float)
+    t = np.asarray(timings, dtype=float)
+    flat = t.max() <= max(t.min() * FLAT_GROWTH_RATIO, NOISE_FLOOR_MS)
+    weights = 1 / np.maximum(t, 1e-6)
+
+    residuals = {}
+    for name, transform in COMPLEXITY_CLASSES:
+        x = transform(n)
+        if not np.any(x):
+            design = np.ones((len(n), 1))
+        else:
+            design = np.column_stack([x, np.ones_like(x)])
+        coefficients, _, _, _ = np.linalg.lstsq(design * weights[:, None], t * weights, rcond=None)
+        if design.shape[1] == 2 and coefficients[0] < 0:
+            continue
+        residuals[name] = float(np.mean(((design @ coefficients - t) * weights) ** 2))
+
+    if flat or not residuals:
+        return ('O(1)' if flat else None), residuals
+
+    best = min(residuals.values())
+    for name, _ in COMPLEXITY_CLASSES:
+        if name in residuals and residuals[name] <= best * SIMPLER_MODEL_TOLERANCE + 1e-3:
+            return name, residuals
+    return None, residuals
+
+
+def run_scaling(function: Callable, spec: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Time the function across the configured input sizes and fit a growth curve.
+    Larger sizes are abandoned once the time budget is spent. Returns the
+    scaling record.
+    """
+    sizes = spec.get('sizes') or DEFAULT_SIZES
+    repeat = max(int(spec.get('repeat', 3)), 1)
+    deadline = time.monotonic() + float(spec.get('time_budget', DEFAULT_TIME_BUDGET))
+
+    points = []
+    stopped = None
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for size in sorted(sizes):
+            best = None
+            batch = 1
+            for run in range(repeat + 1):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                call = generate_call(function, spec, size, seed=size * 31 + run)
+
+                def run_batch(call=call, batch=batch):
+                    for _ in range(batch):
+                        call()
+
+                try:
+                    _, usage = measure(run_batch, remaining)
+                except TestTimeout:
+                    best = None
+                    break
+                except Exception as e:
+                    stopped = f"Failed at n={size}: {e}"
+                    break
+
+                elapsed = usage['wall_time_ms'] / batch
+                if run == 0:
+                    # The first run only sizes the batch for the timed runs
+                    batch = max(1, math.ceil(MIN_SAMPLE_MS / max(elapsed, 1e-3)))
+                    continue
+                best = elapsed if best is None else min(best, elapsed)
+
+            if stopped:
+                break
+            if best is None:
+                stopped = f"Time budget exhausted at n={size}"
+                break
+            points.append({'n': size, 'wall_time_ms': round(best, 6)})
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    record = {
+        'type': 'scaling',
+        'generator': spec.get('generator', 'int_list'),
+        'points': points,
+        'estimated_class': None,
+    }
+    if stopped:
+        record['stopped'] = stopped
+
+    if len(points) >= 3:
+        estimated, residuals = fit_complexity([p['n'] for p in points], [p['wall_time_ms'] for p in points])
+        record['estimated_class'] = estimated
+        record['residuals'] = {name: round(value, 4) for name, value in residuals.items()}
+    return record
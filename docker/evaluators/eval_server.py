@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Long-lived evaluator daemon for Python and SQL submissions.
+
+The parent process imports the evaluator (and through it the test runner
+and database driver) once, then forks a child per job, so no submission
+pays interpreter and module startup. Jobs and records are newline-delimited
+JSON, read from stdin and written to stdout, or served over a unix socket:
+
+    eval_server.py <python|sql> [--socket PATH]
+
+Job:    {"id": "...", "code": "...", "test_data": {...}, "timeout": 30}
+Record: {"id": "...", "record": {...}}
+
+A job with a "prepare" list instead of code has the SQL evaluator build
+the template databases of those schemas, before the container takes any
+submission.
+
+Records are relayed as the child produces them (see protocol.py); the
+last record of every job has a terminal type.
+"""
+import json
+import os
+import select
+import signal
+import socket
+import sys
+import tempfile
+import time
+import traceback
+from typing import Any, Dict, IO
+
+import python_evaluator
+import sql_evaluator
+from protocol import TERMINAL_TYPES, compact, make_emitter
+
+EVALUATORS = {
+    'python': python_evaluator,
+    'sql': sql_evaluator,
+}
+
+# Longest record relayed; a child writing more than this without a newline is killed
+MAX_RECORD_BYTES = 1024 * 1024
+
+# Cleanup of what a job leaves behind when it is killed before its own
+CLEANUPS = {
+    'sql': sql_evaluator.drop_job_databases,
+}
+
+SUBMISSION_SUFFIX = {
+    'python': '.py',
+    'sql': '.sql',
+}
+
+
+def run_child(evaluator, language: str, job: Dict[str, Any], result_fd: int) -> None:
+    """Evaluate one job in a forked child, streaming its records to `result_fd`."""
+    # Own process group, so test worker processes die with the job
+    os.setpgid(0, 0)
+    emit = make_emitter(os.fdopen(result_fd, 'w'))
+    try:
+        # Candidate output must not leak into the protocol stream
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(2, 1)
+        sys.stdout = sys.stderr
+
+        workspace = "/workspace" if os.path.isdir("/workspace") else None
+        with tempfile.TemporaryDirectory(prefix="job_", dir=workspace) as job_dir:
+            if 'prepare' in job:
+                evaluator.prepare(job['prepare'], emit)
+            else:
+                code_file = os.path.join(job_dir, f"submission{SUBMISSION_SUFFIX[language]}")
+                with open(code_file, 'w') as f:
+                    f.write(job.get('code', ''))
+                evaluator.evaluate(code_file, job.get('test_data', {}), emit)
+    except Exception as e:
+        emit({
+            'type': 'error',
+            'status': 'error',
+            'message': compact(str(e)),
+            'traceback': compact(traceback.format_exc())
+        })
+
+    os._exit(0)
+
+
+def run_job(evaluator, language: str, job: Dict[str, Any], writer: IO[str]) -> None:
+    """Fork a child for the job and relay its records to `writer`, enforcing the job timeout."""
+    job_id = json.dumps(job.get('id'))
+    timeout = float(job.get('timeout', 10))
+    read_fd, write_fd = os.pipe()
+
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        run_child(evaluator, language, job, write_fd)
+
+    # Also set here, so a kill never races the child's own setpgid
+    try:
+        os.setpgid(pid, pid)
+    except (ProcessLookupError, PermissionError):
+        pass
+    os.close(write_fd)
+    buffer = b''
+    finished = False
+    failure = None
+    deadline = time.monotonic() + timeout
+    timed_out = False
+    with os.fdopen(read_fd, 'rb') as result_pipe:
+        while not finished:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                timed_out = True
+                break
+            ready, _, _ = select.select([result_pipe], [], [], remaining)
+            if not ready:
+                continue
+            chunk = os.read(result_pipe.fileno(), 65536)
+            if not chunk:
+                break
+            buffer += chunk
+
+            # Relay complete records as soon as they arrive
+            *lines, buffer = buffer.split(b'\n')
+            for line in lines:
+                if not line or finished:
+                    continue
+                record = line.decode('utf-8', 'replace')
+                try:
+                    record_type = json.loads(record).get('type')
+                except (ValueError, AttributeError):
+                    failure = 'Evaluation process wrote a malformed record'
+                    break
+                writer.write(f'{{"id": {job_id}, "record": {record}}}\n')
+                if record_type in TERMINAL_TYPES:
+                    finished = True
+            writer.flush()
+
+            if not failure and len(buffer) > MAX_RECORD_BYTES:
+                failure = 'Evaluation process wrote an oversized record'
+            if failure:
+                break
+
+    if timed_out or failure:
+        kill_job(pid)
+    _, status = os.waitpid(pid, 0)
+    # Reap anything the job left behind, such as test worker processes
+    kill_job(pid)
+    if (timed_out or failure or not finished) and language in CLEANUPS:
+        try:
+            CLEANUPS[language]()
+        except Exception:
+            # Left for the next killed job's cleanup, or the container's removal
+            pass
+
+    if timed_out:
+        relay(writer, job.get('id'), {'type': 'timeout', 'status': 'timeout', 'message': 'Evaluation timed out'})
+    elif failure:
+        relay(writer, job.get('id'), {'type': 'error', 'status': 'error', 'message': failure})
+    elif not finished:
+        relay(writer, job.get('id'), {
+            'type': 'error',
+            'status': 'error',
+            'message': f'Evaluation process exited with status {os.waitstatus_to_exitcode(status)} before finishing'
+        })
+
+
+def kill_job(pid: int) -> None:
+    """Kill a job's process group."""
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def relay(writer: IO[str], job_id: Any, record: Dict[str, Any]) -> None:
+    """Write a record generated by the server itself."""
+    writer.write(json.dumps({'id': job_id, 'record': record}) + '\n')
+    writer.flush()
+
+
+def serve(evaluator, language: str, reader: IO[str], writer: IO[str]) -> None:
+    """Handle newline-delimited jobs from `reader` until it is closed."""
+    for line in reader:
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            job = json.loads(line)
+        except ValueError as e:
+            relay(writer, None, {'type': 'error', 'status': 'error', 'message': f'Invalid job: {e}'})
+            continue
+
+        run_job(evaluator, language, job, writer)
+
+
+def serve_socket(evaluator, language: str, path: str) -> None:
+    """Accept connections on a unix socket, serving one connection at a time."""
+    if os.path.exists(path):
+        os.unlink(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen()
+    while True:
+        connection, _ = server.accept()
+        with connection, connection.makefile('r') as reader, connection.makefile('w') as writer:
+            serve(evaluator, language, reader, writer)
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in EVALUATORS:
+        print(json.dumps({
+            'status': 'error',
+            'message': 'Usage: eval_server.py <python|sql> [--socket PATH]'
+        }))
+        sys.exit(1)
+
+    language = sys.argv[1]
+    evaluator = EVALUATORS[language]
+
+    if len(sys.argv) >= 4 and sys.argv[2] == '--socket':
+        serve_socket(evaluator, language, sys.argv[3])
+    else:
+        serve(evaluator, language, sys.stdin, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Per-call harness for Python submissions: runs one call under a wall-clock
+limit and reports its wall time, CPU time and the process's peak resident
+memory, and works out how many CPUs the container may use.
+"""
+import math
+import os
+import resource
+import signal
+import time
+from typing import Any, Callable, Dict, Tuple
+
+
+class TestTimeout(BaseException):
+    """
+    Raised inside a test case that overran its time limit. Derived from
+    BaseException so a bare `except Exception` in the submission cannot
+    swallow it.
+    """
+
+
+def _raise_timeout(signum, frame):
+    raise TestTimeout()
+
+
+def measure(call: Callable[[], Any], timeout: float) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Run `call` under a wall-clock limit, measuring what it costs.
+    Returns (return value, usage); exceptions from the call propagate
+    after the usage has been recorded on them as `usage`.
+    """
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        value = call()
+        error = None
+    except BaseException as e:
+        value, error = None, e
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+    usage = {
+        'wall_time_ms': round((time.perf_counter() - wall_start) * 1000, 3),
+        'cpu_time_ms': round((time.process_time() - cpu_start) * 1000, 3),
+        # The process's resident memory high-water mark once the call is
+        # done, in KB, the figure the JavaScript evaluator reports too. It
+        # costs nothing to read, unlike allocation tracing, which would
+        # slow the very calls being timed.
+        'peak_memory_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+    if error is not None:
+        error.usage = usage
+        raise error
+    return value, usage
+
+
+def available_cpus() -> int:
+    """
+    CPUs this process may use: the CPU affinity, capped by the cgroup CPU
+    quota (`docker run --cpus`), which affinity alone does not reflect.
+    """
+    cpus = len(os.sched_getaffinity(0))
+
+    quota = None
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            limit, period = f.read().split()
+        if limit != 'max':
+            quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            # cgroup v1
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+                limit = int(f.read())
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+                period = int(f.read())
+            if limit > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return max(1, cpus)
@@ -4,6 +4,39 @@ const fs = require('fs');
 const path = require('path');
 const vm = require('vm');
 const assert = require('assert');
+const readline = require('readline');
+const os = require('os');
+const { fork } = require('child_process');
+const { Worker, isMainThread, parentPort, workerData } = require('worker_threads');
+
+// Streaming result protocol (see protocol.py): one JSON record per line,
+// "start", one "test" per test case, then a terminal "result" or "error".
+const MAX_FIELD_LENGTH = 10000;
+const TERMINAL_TYPES = ['result', 'error', 'timeout'];
+const DEFAULT_TEST_TIMEOUT = 5;
+
+function compact(value) {
+    let encoded;
+    try {
+        encoded = JSON.stringify(value);
+    } catch (error) {
+        encoded = undefined;
+    }
+
+    if (encoded !== undefined && encoded.length <= MAX_FIELD_LENGTH) {
+        return value;
+    }
+
+    const text = String(value);
+    if (text.length > MAX_FIELD_LENGTH) {
+        return `${text.slice(0, MAX_FIELD_LENGTH)}... [truncated ${text.length - MAX_FIELD_LENGTH} characters]`;
+    }
+    return text;
+}
+
+function writeRecord(record) {
+    process.stdout.write(JSON.stringify(record) + '\n');
+}
 
 function loadTestData(testDataFile) {
     try {
@@ -14,16 +47,15 @@ function loadTestData(testDataFile) {
     }
 }
 
-function loadSubmission(codeFile) {
+function loadSubmission(code) {
     try {
-        const code = fs.readFileSync(codeFile, 'utf8');
-
         // Create a sandbox context
+        // Submission output goes to stderr so it never mixes with records
         const sandbox = {
             console: {
-                log: console.log,
+                log: console.error,
                 error: console.error,
-                warn: console.warn
+                warn: console.error
             },
             exports: {},
             require: require
@@ -39,105 +71,392 @@ function loadSubmission(codeFile) {
     }
 }
 
-function runTests(sandbox, testData) {
-    const testCases = testData.test_cases || [];
-    const functionName = testData.function_name || '';
+// Call the submitted function inside the sandbox so vm's timeout can
+// interrupt it, and record wall time, CPU time and the process's peak RSS
+// in KB, the same memory figure the Python evaluator reports.
+// Throws the call's error with `usage` attached.
+function measure(sandbox, func, args, timeout) {
+    sandbox.__testFunction = func;
+    sandbox.__testArgs = args;
+
+    const wallStart = process.hrtime.bigint();
+    const cpuStart = process.cpuUsage();
+    let value;
+    let failure = null;
+    try {
+        value = vm.runInContext('__testFunction(...__testArgs)', sandbox, { timeout: timeout * 1000 });
+    } catch (error) {
+        failure = error;
+    }
+
+    const cpu = process.cpuUsage(cpuStart);
+    const usage = {
+        wall_time_ms: Number(process.hrtime.bigint() - wallStart) / 1e6,
+        cpu_time_ms: (cpu.user + cpu.system) / 1000,
+        peak_memory_kb: process.resourceUsage().maxRSS
+    };
+    if (failure) {
+        // Errors from the sandbox come from another realm, so check for an object rather than instanceof Error
+        const error = failure !== null && typeof failure === 'object' ? failure : new Error(String(failure));
+        error.usage = usage;
+        throw error;
+    }
+    return { value: value, usage: usage };
+}
+
+// A flat test_cases list is one ordered group; "independent" groups may
+// run in any order on separate threads.
+function testGroups(testData) {
+    if (testData.test_groups) {
+        return testData.test_groups;
+    }
+    return [{ name: 'default', mode: 'ordered', test_cases: testData.test_cases || [] }];
+}
+
+// CPUs this process may use: the CPU count capped by the cgroup CPU quota
+function availableCpus() {
+    let cpus = os.cpus().length;
+    let quota = null;
+    try {
+        const [limit, period] = fs.readFileSync('/sys/fs/cgroup/cpu.max', 'utf8').trim().split(/\s+/);
+        if (limit !== 'max') {
+            quota = Number(limit) / Number(period);
+        }
+    } catch (error) {
+        try {
+            const limit = Number(fs.readFileSync('/sys/fs/cgroup/cpu/cpu.cfs_quota_us', 'utf8'));
+            const period = Number(fs.readFileSync('/sys/fs/cgroup/cpu/cpu.cfs_period_us', 'utf8'));
+            if (limit > 0) {
+                quota = limit / period;
+            }
+        } catch (ignored) {
+            // No cgroup limits visible
+        }
+    }
+    if (quota) {
+        cpus = Math.min(cpus, Math.max(1, Math.ceil(quota)));
+    }
+    return Math.max(1, cpus);
+}
 
+function findFunction(sandbox, functionName) {
     // Get the function from the sandbox
     if (!sandbox[functionName] && !sandbox.exports[functionName]) {
         throw new Error(`Function '${functionName}' not found in submission`);
     }
+    return sandbox[functionName] || sandbox.exports[functionName];
+}
 
-    const func = sandbox[functionName] || sandbox.exports[functionName];
+function runCase(sandbox, func, number, testCase, testTimeout) {
+    const testInput = testCase.input || [];
+    const expectedOutput = testCase.expected_output;
 
-    let passedTests = 0;
-    const totalTests = testCases.length;
-    const testResults = [];
+    try {
+        // Call the function with the input
+        const args = Array.isArray(testInput) ? testInput : [testInput];
+        const { value: actualOutput, usage } = measure(sandbox, func, args, testTimeout);
 
-    for (let i = 0; i < testCases.length; i++) {
-        const testCase = testCases[i];
-        const testInput = testCase.input || [];
-        const expectedOutput = testCase.expected_output;
+        return {
+            type: 'test',
+            test_case: number,
+            // We use JSON.stringify for deep comparison
+            passed: JSON.stringify(actualOutput) === JSON.stringify(expectedOutput),
+            input: testInput,
+            expected_output: expectedOutput,
+            actual_output: compact(actualOutput),
+            ...usage
+        };
 
-        try {
-            // Call the function with the input
-            let actualOutput;
-            if (Array.isArray(testInput)) {
-                actualOutput = func(...testInput);
-            } else if (typeof testInput === 'object') {
-                actualOutput = func(testInput);
-            } else {
-                actualOutput = func(testInput);
-            }
+    } catch (error) {
+        const record = {
+            type: 'test',
+            test_case: number,
+            passed: false,
+            input: testInput,
+            expected_output: expectedOutput,
+            error: compact(String(error && error.message)),
+            stack: compact(String(error && error.stack)),
+            ...(error && error.usage)
+        };
+        if (error && error.code === 'ERR_SCRIPT_EXECUTION_TIMEOUT') {
+            record.timed_out = true;
+            record.error = `Test case exceeded the ${testTimeout}s time limit`;
+            delete record.stack;
+        }
+        return record;
+    }
+}
 
-            // Check if output matches expected output
-            // We use JSON.stringify for deep comparison
-            const outputMatches = JSON.stringify(actualOutput) === JSON.stringify(expectedOutput);
+// Run cases on a worker thread with its own copy of the submission,
+// reporting each record through onRecord. Cases the thread never reports
+// on (because it crashed or exited) are failed when it stops.
+function runCasesInThread(code, functionName, cases, testTimeout, onRecord) {
+    return new Promise((resolve) => {
+        const pending = new Map(cases.map(([number, testCase]) => [number, testCase]));
+        const thread = new Worker(__filename, {
+            workerData: { code: code, functionName: functionName, cases: cases, testTimeout: testTimeout }
+        });
 
-            if (outputMatches) {
-                passedTests++;
+        let failure = 'Test thread exited before returning a result';
+        thread.on('message', (record) => {
+            pending.delete(record.test_case);
+            onRecord(record);
+        });
+        thread.on('error', (error) => {
+            failure = `Test thread failed: ${error && error.message}`;
+        });
+        thread.on('exit', () => {
+            for (const [number, testCase] of pending) {
+                onRecord({
+                    type: 'test',
+                    test_case: number,
+                    passed: false,
+                    input: testCase.input || [],
+                    expected_output: testCase.expected_output,
+                    error: compact(failure)
+                });
             }
+            resolve();
+        });
+    });
+}
+
+function testThread() {
+    const { code, functionName, cases, testTimeout } = workerData;
+    const sandbox = loadSubmission(code);
+    const func = findFunction(sandbox, functionName);
+    for (const [number, testCase] of cases) {
+        parentPort.postMessage(runCase(sandbox, func, number, testCase, testTimeout));
+    }
+}
+
+// Cases in independent groups are spread over worker threads sized to the
+// container's CPU quota, while ordered groups run on this thread in sequence.
+async function runTests(code, sandbox, testData, emit) {
+    const functionName = testData.function_name || '';
+    const testTimeout = testData.test_timeout || DEFAULT_TEST_TIMEOUT;
+    const func = findFunction(sandbox, functionName);
+
+    // Number cases across groups in the order they are listed
+    let ordered = [];
+    let independent = [];
+    let number = 0;
+    for (const group of testGroups(testData)) {
+        for (const testCase of group.test_cases || []) {
+            number++;
+            (group.mode === 'independent' ? independent : ordered).push([number, testCase]);
+        }
+    }
+
+    let passedTests = 0;
+    const totalTests = number;
+    emit({ type: 'start', total_tests: totalTests });
 
-            testResults.push({
-                test_case: i + 1,
-                passed: outputMatches,
-                input: testInput,
-                expected_output: expectedOutput,
-                actual_output: actualOutput
-            });
-
-        } catch (error) {
-            testResults.push({
-                test_case: i + 1,
-                passed: false,
-                input: testInput,
-                expected_output: expectedOutput,
-                error: error.message,
-                stack: error.stack
-            });
+    const record = (result) => {
+        if (result.passed) {
+            passedTests++;
         }
+        emit(result);
+    };
+
+    const threads = Math.min(availableCpus(), independent.length);
+    if (threads < 2) {
+        // Not worth threads; run everything here
+        ordered = ordered.concat(independent).sort((a, b) => a[0] - b[0]);
+        independent = [];
+    }
+
+    const running = [];
+    for (let t = 0; t < threads && independent.length; t++) {
+        const share = independent.filter((_, index) => index % threads === t);
+        running.push(runCasesInThread(code, functionName, share, testTimeout, record));
     }
 
+    for (const [caseNumber, testCase] of ordered) {
+        record(runCase(sandbox, func, caseNumber, testCase, testTimeout));
+    }
+    await Promise.all(running);
+
     const score = totalTests > 0 ? (passedTests / totalTests) * 100 : 0;
     return {
         passed_all: passedTests === totalTests,
-        test_results: testResults,
+        tests_run: totalTests,
         score: score
     };
 }
 
+async function evaluate(code, testData, emit) {
+    let summary;
+    try {
+        const sandbox = loadSubmission(code);
+        const result = await runTests(code, sandbox, testData, emit);
+
+        summary = {
+            type: 'result',
+            status: 'success',
+            passed_all: result.passed_all,
+            evaluation_score: result.score,
+            tests_run: result.tests_run,
+            max_rss_kb: process.resourceUsage().maxRSS
+        };
+
+    } catch (error) {
+        summary = {
+            type: 'error',
+            status: 'error',
+            message: compact(String(error && error.message)),
+            stack: compact(String(error && error.stack))
+        };
+    }
+
+    emit(summary);
+    return summary;
+}
+
+// Server mode: modules are loaded once and a warm child process is kept
+// ready, so each job only pays for handing its payload to that child.
+// Every job runs in its own child, which exits once its terminal record
+// is sent. Records are relayed as {"id": ..., "record": ...} lines.
+function spawnWorker() {
+    return fork(__filename, ['--worker'], { stdio: ['ignore', 'ignore', 'inherit', 'ipc'] });
+}
+
+function runJob(worker, job) {
+    const timeout = (job.timeout || 10) * 1000;
+    const relay = (record) => {
+        process.stdout.write(JSON.stringify({ id: job.id, record: record }) + '\n');
+    };
+
+    return new Promise((resolve) => {
+        let settled = false;
+        const finish = (record) => {
+            if (settled) {
+                return;
+            }
+            settled = true;
+            clearTimeout(timer);
+            worker.kill('SIGKILL');
+            if (record) {
+                relay(record);
+            }
+            resolve();
+        };
+
+        const timer = setTimeout(() => {
+            finish({ type: 'timeout', status: 'timeout', message: 'Evaluation timed out' });
+        }, timeout);
+
+        worker.on('message', (record) => {
+            if (settled) {
+                return;
+            }
+            relay(record);
+            if (TERMINAL_TYPES.includes(record.type)) {
+                finish(null);
+            }
+        });
+        worker.once('exit', (exitCode) => finish({
+            type: 'error',
+            status: 'error',
+            message: `Evaluation process exited with code ${exitCode} before finishing`
+        }));
+        worker.send({ code: job.code || '', testData: job.test_data || {} });
+    });
+}
+
+function serve() {
+    let worker = spawnWorker();
+    let queue = Promise.resolve();
+
+    const lines = readline.createInterface({ input: process.stdin, terminal: false });
+    lines.on('line', (line) => {
+        if (!line.trim()) {
+            return;
+        }
+
+        queue = queue.then(async () => {
+            let job;
+            try {
+                job = JSON.parse(line);
+            } catch (error) {
+                process.stdout.write(JSON.stringify({
+                    id: null,
+                    record: { type: 'error', status: 'error', message: `Invalid job: ${error.message}` }
+                }) + '\n');
+                return;
+            }
+
+            const current = worker;
+            worker = spawnWorker();
+            await runJob(current, job);
+        });
+    });
+    lines.on('close', () => {
+        queue.then(() => {
+            worker.kill('SIGKILL');
+        });
+    });
+}
+
+function worker() {
+    process.once('message', (job) => {
+        evaluate(job.code, job.testData, (record) => {
+            if (TERMINAL_TYPES.includes(record.type)) {
+                // Exit only once the terminal record has been flushed to the parent
+                process.send(record, () => process.exit(0));
+            } else {
+                process.send(record);
+            }
+        });
+    });
+}
+
 function main() {
+    if (process.argv[2] === '--serve') {
+        serve();
+        return;
+    }
+    if (process.argv[2] === '--worker') {
+        worker();
+        return;
+    }
+
     if (process.argv.length < 4) {
-        console.log(JSON.stringify({
+        writeRecord({
+            type: 'error',
             status: 'error',
-            message: 'Insufficient arguments. Usage: js_evaluator.js <code_file> <test_data_file>'
-        }));
+            message: 'Insufficient arguments. Usage: js_evaluator.js <code_file> <test_data_file> | --serve'
+        });
         process.exit(1);
     }
 
     const codeFile = process.argv[2];
     const testDataFile = process.argv[3];
 
+    let testData;
+    let code;
     try {
-        const testData = loadTestData(testDataFile);
-        const sandbox = loadSubmission(codeFile);
-        const result = runTests(sandbox, testData);
-
-        console.log(JSON.stringify({
-            status: 'success',
-            passed_all: result.passed_all,
-            evaluation_score: result.score,
-            test_results: result.test_results
-        }));
-
+        testData = loadTestData(testDataFile);
+        code = fs.readFileSync(codeFile, 'utf8');
     } catch (error) {
-        console.log(JSON.stringify({
+        writeRecord({
+            type: 'error',
             status: 'error',
             message: error.message,
             stack: error.stack
-        }));
+        });
         process.exit(1);
     }
+
+    evaluate(code, testData, writeRecord).then((summary) => {
+        if (summary.status !== 'success') {
+            process.exit(1);
+        }
+    });
 }
 
-main();
\ No newline at end of file
+if (isMainThread) {
+    main();
+} else {
+    testThread();
+}
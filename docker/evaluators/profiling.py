@@ -0,0 +1,126 @@
+"""
+Profiling pass for Python submissions.
+
+The slowest test case of the timed pass is replayed once under cProfile
+for a per-function table, while a sampling thread records which lines of
+the submission are on the stack, giving an estimate of cumulative time
+per line. Both are trimmed to the top entries so the record stays small.
+"""
+import cProfile
+import linecache
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List
+
+from harness import TestTimeout, measure
+
+TOP_FUNCTIONS = 15
+TOP_LINES = 15
+
+# Seconds between stack samples
+SAMPLE_INTERVAL = 0.001
+
+EVALUATOR_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class LineSampler(threading.Thread):
+    """Periodically samples a thread's stack, counting each submission line on it once per sample."""
+
+    def __init__(self, target_thread_id: int, filename: str, interval: float = SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        self.target_thread_id = target_thread_id
+        self.filename = filename
+        self.interval = interval
+        self.samples = 0
+        self.line_counts = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_thread_id)
+            self.samples += 1
+            lines = set()
+            while frame is not None:
+                if frame.f_code.co_filename == self.filename:
+                    lines.add(frame.f_lineno)
+                frame = frame.f_back
+            self.line_counts.update(lines)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def describe_file(filename: str, code_file: str) -> str:
+    """Short label for where a profiled function lives."""
+    if filename == code_file:
+        return 'submission'
+    if filename.startswith('<') or filename == '~':
+        return 'built-in'
+    return os.path.basename(filename)
+
+
+def profile_calls(calls: List[Callable[[], Any]], code_file: str, timeout: float) -> Dict[str, Any]:
+    """
+    Run the calls under cProfile and the line sampler and return the profile record.
+    Failures and timeouts of individual calls are ignored; they were already
+    reported by the test pass.
+    """
+    code_file = os.path.abspath(code_file)
+    profiler = cProfile.Profile()
+    sampler = LineSampler(threading.get_ident(), code_file)
+
+    switch_interval = sys.getswitchinterval()
+    # Let the sampler get the GIL often enough to keep its interval
+    sys.setswitchinterval(SAMPLE_INTERVAL / 2)
+    sampler.start()
+    started = time.perf_counter()
+    try:
+        for call in calls:
+            try:
+                measure(lambda: profiler.runcall(call), timeout)
+            except (TestTimeout, Exception):
+                pass
+    finally:
+        elapsed = time.perf_counter() - started
+        sampler.stop()
+        sys.setswitchinterval(switch_interval)
+
+    functions = []
+    for (filename, line, name), (_, calls_made, total, cumulative, _) in pstats.Stats(profiler).stats.items():
+        if filename.startswith(EVALUATOR_DIR) or name.startswith('<method \'disable\''):
+            continue
+        functions.append({
+            'function': name,
+            'file': describe_file(filename, code_file),
+            'line': line,
+            'calls': calls_made,
+            'total_time_ms': round(total * 1000, 3),
+            'cumulative_time_ms': round(cumulative * 1000, 3),
+        })
+    functions.sort(key=lambda entry: entry['cumulative_time_ms'], reverse=True)
+
+    # Each sample stands for an equal share of the elapsed time
+    per_sample_ms = elapsed * 1000 / sampler.samples if sampler.samples else 0
+    lines = [
+        {
+            'line': line,
+            'source': linecache.getline(code_file, line).strip(),
+            'samples': count,
+            'cumulative_time_ms': round(count * per_sample_ms, 3),
+        }
+        for line, count in sampler.line_counts.most_common(TOP_LINES)
+    ]
+    lines.sort(key=lambda entry: entry['line'])
+
+    return {
+        'type': 'profile',
+        'functions': functions[:TOP_FUNCTIONS],
+        'lines': lines,
+        'samples': sampler.samples,
+        'profiled_time_ms': round(elapsed * 1000, 3),
+    }
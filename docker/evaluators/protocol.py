@@ -0,0 +1,73 @@
+"""
+Streaming result protocol shared by the Python-based evaluators.
+
+Evaluators write newline-delimited JSON records as they go:
+
+    {"type": "start", "total_tests": 5}
+    {"type": "test", "test_case": 1, "passed": true, ...}    one per test case
+    {"type": "profile", "functions": [...], "lines": [...]}  optional, see profiling.py
+    {"type": "scaling", "estimated_class": "O(n)", ...}      optional, see complexity.py
+    {"type": "result", "status": "success", ...}             terminal summary
+    {"type": "error", "status": "error", "message": ...}     terminal fatal error
+
+Test records also carry what the test case cost: `wall_time_ms`,
+`cpu_time_ms` and `peak_memory_kb`, plus `timed_out` when it overran its
+per-test limit (`test_timeout` in the test data, in seconds). The memory
+figure is the evaluating process's resident memory high-water mark when
+the test finished, in KB, as the JavaScript evaluator reports it too: it
+only grows, so the test that raised it is the one that needed the most.
+
+Every record is kept under a bounded size so a huge return value or
+traceback cannot flood the stream or the platform reading it.
+"""
+import json
+import os
+import sys
+from typing import Any, Callable, Dict, IO
+
+MAX_FIELD_LENGTH = 10000
+
+TERMINAL_TYPES = ('result', 'error', 'timeout')
+
+# Seconds a single test case may run when the test data does not say
+DEFAULT_TEST_TIMEOUT = 5
+
+Emitter = Callable[[Dict[str, Any]], None]
+
+
+def compact(value: Any) -> Any:
+    """Return the value if it serializes within the field limit, else a truncated repr."""
+    try:
+        encoded = json.dumps(value)
+    except (TypeError, ValueError):
+        encoded = None
+
+    if encoded is not None and len(encoded) <= MAX_FIELD_LENGTH:
+        return value
+
+    text = repr(value)
+    if len(text) > MAX_FIELD_LENGTH:
+        text = text[:MAX_FIELD_LENGTH] + f'... [truncated {len(text) - MAX_FIELD_LENGTH} characters]'
+    return text
+
+
+def make_emitter(stream: IO[str]) -> Emitter:
+    """Build an emitter that writes one record per line to the stream."""
+    def emit(record: Dict[str, Any]) -> None:
+        stream.write(json.dumps(record, default=str) + '\n')
+        stream.flush()
+
+    return emit
+
+
+def protocol_stream() -> IO[str]:
+    """
+    Claim the process's stdout for protocol records.
+
+    File descriptor 1 is pointed at stderr afterwards, so anything the
+    submission prints cannot be mistaken for a record.
+    """
+    sys.stdout.flush()
+    protocol_fd = os.dup(1)
+    os.dup2(2, 1)
+    return os.fdopen(protocol_fd, 'w')
@@ -1,10 +1,20 @@
 #!/usr/bin/env python3
 import json
+import multiprocessing
+import resource
 import sys
 import traceback
+import importlib.machinery
 import importlib.util
 import time
-from typing import Dict, List, Any, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Any, Tuple
+
+from complexity import run_scaling
+from harness import TestTimeout, available_cpus, measure
+from profiling import profile_calls
+from protocol import DEFAULT_TEST_TIMEOUT, Emitter, compact, make_emitter, protocol_stream
 
 
 def load_test_data(test_data_file: str) -> Dict[str, Any]:
@@ -22,8 +32,10 @@ def load_submission(code_file: str) -> object:
         # Create a unique module name
         module_name = f"user_submission_{int(time.time())}"
 
-        # Create module spec
-        spec = importlib.util.spec_from_file_location(module_name, code_file)
+        # Create module spec; the loader is explicit because submissions
+        # are not necessarily saved with a .py suffix
+        loader = importlib.machinery.SourceFileLoader(module_name, code_file)
+        spec = importlib.util.spec_from_loader(module_name, loader)
         module = importlib.util.module_from_spec(spec)
 
         # Execute the module
@@ -33,70 +45,240 @@ def load_submission(code_file: str) -> object:
         raise ImportError(f"Failed to import submission: {str(e)}")
 
 
-def run_tests(module: object, test_data: Dict[str, Any]) -> Tuple[bool, List[Dict[str, Any]], float]:
+def build_call(function: Callable, test_input: Any) -> Callable[[], Any]:
+    """Bind a test case's input to the function as a zero-argument call."""
+    # Convert input to actual parameters
+    if isinstance(test_input, list):
+        return lambda: function(*test_input)
+    elif isinstance(test_input, dict):
+        return lambda: function(**test_input)
+    else:
+        return lambda: function(test_input)
+
+
+def test_groups(test_data: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
-    Run test cases against the submitted code.
-    Returns: (success, test_results, score)
+    The test data's groups of test cases. A group's mode is "independent"
+    (cases may run in any order, in separate processes) or "ordered" (cases
+    share state and run in sequence); a flat `test_cases` list is one
+    ordered group.
     """
-    test_cases = test_data.get('test_cases', [])
+    if 'test_groups' in test_data:
+        return test_data['test_groups']
+    return [{'name': 'default', 'mode': 'ordered', 'test_cases': test_data.get('test_cases', [])}]
+
+
+def run_case(function: Callable, number: int, test_case: Dict[str, Any], test_timeout: float) -> Dict[str, Any]:
+    """Run one test case and return its record."""
+    test_input = test_case.get('input', [])
+    expected_output = test_case.get('expected_output')
+
+    try:
+        actual_output, usage = measure(build_call(function, test_input), test_timeout)
+
+        return {
+            'type': 'test',
+            'test_case': number,
+            # Check if output matches expected output
+            'passed': actual_output == expected_output,
+            'input': test_input,
+            'expected_output': expected_output,
+            'actual_output': compact(actual_output),
+            **usage
+        }
+
+    except TestTimeout as e:
+        return {
+            'type': 'test',
+            'test_case': number,
+            'passed': False,
+            'input': test_input,
+            'expected_output': expected_output,
+            'timed_out': True,
+            'error': f'Test case exceeded the {test_timeout:g}s time limit',
+            **e.usage
+        }
+
+    except Exception as e:
+        return {
+            'type': 'test',
+            'test_case': number,
+            'passed': False,
+            'input': test_input,
+            'expected_output': expected_output,
+            'error': compact(str(e)),
+            'traceback': compact(traceback.format_exc()),
+            **getattr(e, 'usage', {})
+        }
+
+
+# Set in the parent before the pool forks, so workers inherit the loaded submission
+_pool_function = None
+
+
+def _run_pooled_case(number: int, test_case: Dict[str, Any], test_timeout: float) -> Dict[str, Any]:
+    return run_case(_pool_function, number, test_case, test_timeout)
+
+
+def run_tests(module: object, test_data: Dict[str, Any], emit: Emitter) -> Tuple[bool, int, float]:
+    """
+    Run test cases against the submitted code, emitting a record per test case as it completes.
+
+    Cases in independent groups are spread over a pool of forked worker
+    processes sized to the container's CPU quota, while ordered groups run
+    in this process, in sequence, at the same time.
+    Returns: (success, tests_run, score)
+    """
+    global _pool_function
+
     function_name = test_data.get('function_name', '')
+    test_timeout = float(test_data.get('test_timeout', DEFAULT_TEST_TIMEOUT))
 
     if not hasattr(module, function_name):
         raise AttributeError(f"Function '{function_name}' not found in submission")
 
     function = getattr(module, function_name)
 
+    # Number cases across groups in the order they are listed
+    ordered, independent = [], []
+    number = 0
+    for group in test_groups(test_data):
+        for test_case in group.get('test_cases', []):
+            number += 1
+            (independent if group.get('mode') == 'independent' else ordered).append((number, test_case))
+
     passed_tests = 0
-    total_tests = len(test_cases)
-    test_results = []
-
-    for i, test_case in enumerate(test_cases):
-        test_input = test_case.get('input', [])
-        expected_output = test_case.get('expected_output')
-
-        try:
-            # Convert input to actual parameters
-            if isinstance(test_input, list):
-                actual_output = function(*test_input)
-            elif isinstance(test_input, dict):
-                actual_output = function(**test_input)
-            else:
-                actual_output = function(test_input)
+    total_tests = number
+    emit({'type': 'start', 'total_tests': total_tests})
 
-            # Check if output matches expected output
-            output_matches = actual_output == expected_output
-
-            if output_matches:
-                passed_tests += 1
-
-            test_results.append({
-                'test_case': i + 1,
-                'passed': output_matches,
-                'input': test_input,
-                'expected_output': expected_output,
-                'actual_output': actual_output
-            })
-
-        except Exception as e:
-            test_results.append({
-                'test_case': i + 1,
-                'passed': False,
-                'input': test_input,
-                'expected_output': expected_output,
-                'error': str(e),
-                'traceback': traceback.format_exc()
-            })
+    def record(result: Dict[str, Any]) -> None:
+        nonlocal passed_tests
+        if result['passed']:
+            passed_tests += 1
+        emit(result)
+
+    workers = min(available_cpus(), len(independent))
+    if workers < 2:
+        # Not worth a pool; run everything here
+        ordered = sorted(ordered + independent, key=lambda case: case[0])
+        independent = []
+
+    pool = None
+    futures = {}
+    if independent:
+        _pool_function = function
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'))
+        futures = {
+            pool.submit(_run_pooled_case, case_number, test_case, test_timeout): (case_number, test_case)
+            for case_number, test_case in independent
+        }
+
+    try:
+        for case_number, test_case in ordered:
+            record(run_case(function, case_number, test_case, test_timeout))
+
+        broken = []
+        for future in as_completed(futures):
+            try:
+                record(future.result())
+            except BrokenProcessPool:
+                broken.append(futures[future])
+
+        # A case that kills its worker breaks the whole pool; rerun the
+        # affected cases one process each so only the culprit fails
+        for case_number, test_case in sorted(broken, key=lambda case: case[0]):
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('fork')) as isolated:
+                try:
+                    record(isolated.submit(_run_pooled_case, case_number, test_case, test_timeout).result())
+                except BrokenProcessPool:
+                    record({
+                        'type': 'test',
+                        'test_case': case_number,
+                        'passed': False,
+                        'input': test_case.get('input', []),
+                        'expected_output': test_case.get('expected_output'),
+                        'error': 'Test process exited before returning a result',
+                    })
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
 
     score = (passed_tests / total_tests) * 100 if total_tests > 0 else 0
-    return passed_tests == total_tests, test_results, score
+    return passed_tests == total_tests, total_tests, score
+
+
+def evaluate(code_file: str, test_data: Dict[str, Any], emit: Emitter) -> Dict[str, Any]:
+    """
+    Evaluate a submission against the test data, streaming records through `emit`.
+    Returns the terminal record; errors are reported in it rather than raised.
+    """
+    # Wall time of each test case, to pick the one worth profiling
+    wall_times = {}
+
+    def record(result: Dict[str, Any]) -> None:
+        if result.get('type') == 'test' and result.get('wall_time_ms') is not None and not result.get('timed_out'):
+            wall_times[result['test_case']] = result['wall_time_ms']
+        emit(result)
+
+    try:
+        module = load_submission(code_file)
+        success, tests_run, score = run_tests(module, test_data, record)
+        # Independent test cases ran in worker processes
+        max_rss_kb = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                         resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+
+        if test_data.get('profile') and wall_times:
+            try:
+                # Only the slowest test case is replayed, so the report costs
+                # at most one more run of a test rather than of the suite
+                slowest = max(wall_times, key=wall_times.get)
+                test_cases = [test_case for group in test_groups(test_data)
+                              for test_case in group.get('test_cases', [])]
+                # A fresh copy of the module, so the replay starts from the
+                # state the tests started from, not the one they left behind
+                function = getattr(load_submission(code_file), test_data['function_name'])
+                call = build_call(function, test_cases[slowest - 1].get('input', []))
+                profile = profile_calls([call], code_file, float(test_data.get('test_timeout', DEFAULT_TEST_TIMEOUT)))
+                emit(dict(profile, test_case=slowest))
+            except Exception as e:
+                emit({'type': 'profile', 'functions': [], 'lines': [], 'error': compact(str(e))})
+
+        if test_data.get('scaling'):
+            try:
+                emit(run_scaling(getattr(module, test_data['function_name']), test_data['scaling']))
+            except Exception as e:
+                emit({'type': 'scaling', 'points': [], 'estimated_class': None, 'stopped': compact(str(e))})
+
+        summary = {
+            'type': 'result',
+            'status': 'success',
+            'passed_all': success,
+            'evaluation_score': score,
+            'tests_run': tests_run,
+            'max_rss_kb': max_rss_kb
+        }
+
+    except Exception as e:
+        summary = {
+            'type': 'error',
+            'status': 'error',
+            'message': compact(str(e)),
+            'traceback': compact(traceback.format_exc())
+        }
+
+    emit(summary)
+    return summary
 
 
 def main():
+    emit = make_emitter(protocol_stream())
+
     if len(sys.argv) < 3:
-        print(json.dumps({
+        emit({
+            'type': 'error',
             'status': 'error',
             'message': 'Insufficient arguments. Usage: python_evaluator.py <code_file> <test_data_file>'
-        }))
+        })
         sys.exit(1)
 
     code_file = sys.argv[1]
@@ -104,24 +286,19 @@ def main():
 
     try:
         test_data = load_test_data(test_data_file)
-        module = load_submission(code_file)
-        success, test_results, score = run_tests(module, test_data)
-
-        print(json.dumps({
-            'status': 'success',
-            'passed_all': success,
-            'evaluation_score': score,
-            'test_results': test_results
-        }))
-
     except Exception as e:
-        print(json.dumps({
+        emit({
+            'type': 'error',
             'status': 'error',
             'message': str(e),
             'traceback': traceback.format_exc()
-        }))
+        })
+        sys.exit(1)
+
+    summary = evaluate(code_file, test_data, emit)
+    if summary['status'] != 'success':
         sys.exit(1)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,12 +1,27 @@
 #!/usr/bin/env python3
+import hashlib
 import json
+import os
 import sys
 import traceback
+import uuid
 import psycopg2
+from psycopg2 import errors, sql
 import re
 import time
 from typing import Dict, List, Any, Tuple
 
+from protocol import DEFAULT_TEST_TIMEOUT, Emitter, compact, make_emitter, protocol_stream
+
+# Rows fetched per query; larger results are cut off rather than held in memory
+MAX_RESULT_ROWS = 1000
+
+# Databases a job creates for itself: template builds and evaluation clones
+JOB_DATABASE_PATTERNS = ['build\\_%', 'eval\\_%']
+
+# Seconds to wait for the container's PostgreSQL to accept connections
+SERVER_START_TIMEOUT = 30
+
 
 def load_test_data(test_data_file: str) -> Dict[str, Any]:
     """Load test data from a JSON file."""
@@ -20,11 +35,146 @@ def load_submission(code_file: str) -> str:
         return f.read()
 
 
-def setup_database(connection, schema_file: str) -> None:
-    """Set up the database with the schema and test data."""
-    with open(schema_file, 'r') as f:
-        schema_sql = f.read()
+def template_name(schema_sql: str) -> str:
+    """Name of the template database holding the given schema."""
+    return f"tmpl_{hashlib.sha256(schema_sql.encode('utf-8')).hexdigest()[:24]}"
+
+
+def ensure_template_database(schema_sql: str) -> str:
+    """
+    Make sure a template database with the schema and its data loaded exists.
+
+    Templates are keyed by a hash of the schema. The pool has a container
+    build the templates of the known question schemas before it hands the
+    container out (see prepare), so a submission only clones one; a schema
+    no template was prepared for is built here on first use. The schema is
+    loaded into a scratch database which is then renamed into place, so a
+    concurrent evaluation never clones a half-built template.
+    Returns the template database name.
+    """
+    template = template_name(schema_sql)
+
+    admin = connect()
+    admin.autocommit = True
+    try:
+        with admin.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", [template])
+            if cursor.fetchone():
+                return template
+
+            build = f"build_{uuid.uuid4().hex}"
+            cursor.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(build)))
+
+        try:
+            connection = connect(build)
+            try:
+                setup_database(connection, schema_sql)
+            finally:
+                connection.close()
+
+            with admin.cursor() as cursor:
+                cursor.execute(sql.SQL("ALTER DATABASE {} RENAME TO {}").format(
+                    sql.Identifier(build), sql.Identifier(template)))
+                cursor.execute(sql.SQL("ALTER DATABASE {} WITH IS_TEMPLATE true").format(
+                    sql.Identifier(template)))
+        except errors.DuplicateDatabase:
+            # Another evaluation published the same template first
+            with admin.cursor() as cursor:
+                cursor.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(build)))
+        except Exception:
+            with admin.cursor() as cursor:
+                cursor.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(build)))
+            raise
+
+        return template
+    finally:
+        admin.close()
+
+
+def wait_for_server(timeout: float = SERVER_START_TIMEOUT) -> None:
+    """Wait until PostgreSQL accepts connections, which it may not yet in a freshly started container."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            connect().close()
+            return
+        except psycopg2.OperationalError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.2)
+
+
+def prepare(schemas: List[str], emit: Emitter) -> Dict[str, Any]:
+    """
+    Build the template databases of the given schemas ahead of any job, so
+    the jobs of a warm container only clone them. A schema that fails to
+    load is left to fail the evaluations that use it.
+    Returns the terminal record; errors are reported in it rather than raised.
+    """
+    failed = 0
+    try:
+        wait_for_server()
+        for schema_sql in schemas:
+            try:
+                ensure_template_database(schema_sql)
+            except Exception:
+                failed += 1
+        summary = {'type': 'result', 'status': 'success', 'templates': len(schemas) - failed, 'failed': failed}
+    except Exception as e:
+        summary = {
+            'type': 'error',
+            'status': 'error',
+            'message': compact(str(e)),
+            'traceback': compact(traceback.format_exc())
+        }
+
+    emit(summary)
+    return summary
+
 
+def clone_database(template: str) -> str:
+    """Create a throwaway database from a template and return its name."""
+    database = f"eval_{uuid.uuid4().hex}"
+    admin = connect()
+    admin.autocommit = True
+    try:
+        with admin.cursor() as cursor:
+            cursor.execute(sql.SQL("CREATE DATABASE {} TEMPLATE {}").format(
+                sql.Identifier(database), sql.Identifier(template)))
+    finally:
+        admin.close()
+    return database
+
+
+def drop_database(database: str) -> None:
+    """Drop a throwaway evaluation database."""
+    admin = connect()
+    admin.autocommit = True
+    try:
+        with admin.cursor() as cursor:
+            cursor.execute(sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(sql.Identifier(database)))
+    finally:
+        admin.close()
+
+
+def drop_job_databases() -> None:
+    """
+    Drop the scratch and throwaway databases of jobs that were killed
+    before they could drop their own. Only call it when no job is running.
+    """
+    admin = connect()
+    admin.autocommit = True
+    try:
+        with admin.cursor() as cursor:
+            cursor.execute("SELECT datname FROM pg_database WHERE datname LIKE ANY(%s)", [JOB_DATABASE_PATTERNS])
+            for (database,) in cursor.fetchall():
+                cursor.execute(sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(sql.Identifier(database)))
+    finally:
+        admin.close()
+
+
+def setup_database(connection, schema_sql: str) -> None:
+    """Set up the database with the schema and test data."""
     with connection.cursor() as cursor:
         cursor.execute(schema_sql)
     connection.commit()
@@ -39,8 +189,8 @@ def execute_query(connection, query: str) -> List[Dict[str, Any]]:
             # Get column names
             columns = [desc[0] for desc in cursor.description] if cursor.description else []
 
-            # Fetch all rows
-            rows = cursor.fetchall() if cursor.description else []
+            # Fetch rows up to the cap
+            rows = cursor.fetchmany(MAX_RESULT_ROWS + 1) if cursor.description else []
 
             # Convert rows to list of dictionaries
             results = []
@@ -49,15 +199,26 @@ def execute_query(connection, query: str) -> List[Dict[str, Any]]:
 
             return results
     except Exception as e:
-        raise Exception(f"Error executing query: {str(e)}")
+        raise Exception(f"Error executing query: {str(e)}") from e
 
 
-def run_tests(connection, submission: str, test_data: Dict[str, Any]) -> Tuple[bool, List[Dict[str, Any]], float]:
+def run_tests(connection, submission: str, test_data: Dict[str, Any], emit: Emitter) -> Tuple[bool, int, float]:
     """
-    Run test cases against the submitted SQL code.
-    Returns: (success, test_results, score)
+    Run test cases against the submitted SQL code, emitting a record per test case as it completes.
+    Returns: (success, tests_run, score)
     """
-    test_cases = test_data.get('test_cases', [])
+    # Queries share one database, so grouped test cases always run in order
+    if 'test_groups' in test_data:
+        test_cases = [test_case for group in test_data['test_groups'] for test_case in group.get('test_cases', [])]
+    else:
+        test_cases = test_data.get('test_cases', [])
+    test_timeout = float(test_data.get('test_timeout', DEFAULT_TEST_TIMEOUT))
+    emit({'type': 'start', 'total_tests': len(test_cases)})
+
+    # Each query is cut off by the server once it overruns the per-test limit
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT set_config('statement_timeout', %s, false)", [f"{int(test_timeout * 1000)}ms"])
+    connection.commit()
 
     # Extract CREATE TABLE statements to ignore during testing
     create_table_statements = re.finditer(r"CREATE\s+TABLE.*?;", submission, re.DOTALL | re.IGNORECASE)
@@ -71,12 +232,14 @@ def run_tests(connection, submission: str, test_data: Dict[str, Any]) -> Tuple[b
             connection.commit()
         except Exception as e:
             # Return immediately if schema setup fails
-            return False, [{
+            emit({
+                'type': 'test',
                 'test_case': 'schema_setup',
                 'passed': False,
-                'error': str(e),
-                'traceback': traceback.format_exc()
-            }], 0
+                'error': compact(str(e)),
+                'traceback': compact(traceback.format_exc())
+            })
+            return False, 1, 0
 
     # Extract test queries - queries that don't create tables
     test_queries = []
@@ -87,7 +250,6 @@ def run_tests(connection, submission: str, test_data: Dict[str, Any]) -> Tuple[b
 
     passed_tests = 0
     total_tests = len(test_cases)
-    test_results = []
 
     for i, test_case in enumerate(test_cases):
         test_query = test_case.get('query', '')
@@ -98,97 +260,163 @@ def run_tests(connection, submission: str, test_data: Dict[str, Any]) -> Tuple[b
             test_query = test_queries[i]
 
         if not test_query:
-            test_results.append({
+            emit({
+                'type': 'test',
                 'test_case': i + 1,
                 'passed': False,
                 'error': 'No query found for this test case',
             })
             continue
 
+        with connection.cursor() as cursor:
+            cursor.execute("SAVEPOINT test_case")
+
+        wall_start = time.perf_counter()
         try:
             # Execute the query
             actual_result = execute_query(connection, test_query)
+            wall_time_ms = round((time.perf_counter() - wall_start) * 1000, 3)
 
             # Compare results
             # Simplifying comparison by converting to strings
             expected_json = json.dumps(expected_result, sort_keys=True)
-            actual_json = json.dumps(actual_result, sort_keys=True)
+            actual_json = json.dumps(actual_result, sort_keys=True, default=str)
 
             result_matches = expected_json == actual_json
 
             if result_matches:
                 passed_tests += 1
 
-            test_results.append({
+            emit({
+                'type': 'test',
                 'test_case': i + 1,
                 'passed': result_matches,
-                'query': test_query,
+                'query': compact(test_query),
                 'expected_result': expected_result,
-                'actual_result': actual_result
+                'actual_result': compact(actual_result[:MAX_RESULT_ROWS]),
+                'result_truncated': len(actual_result) > MAX_RESULT_ROWS,
+                'wall_time_ms': wall_time_ms
             })
 
         except Exception as e:
-            test_results.append({
+            # A failed statement aborts the transaction; undo just this test case
+            with connection.cursor() as cursor:
+                cursor.execute("ROLLBACK TO SAVEPOINT test_case")
+            record = {
+                'type': 'test',
                 'test_case': i + 1,
                 'passed': False,
-                'query': test_query,
+                'query': compact(test_query),
                 'expected_result': expected_result,
-                'error': str(e),
-                'traceback': traceback.format_exc()
-            })
+                'error': compact(str(e)),
+                'traceback': compact(traceback.format_exc()),
+                'wall_time_ms': round((time.perf_counter() - wall_start) * 1000, 3)
+            }
+            if isinstance(e.__cause__, errors.QueryCanceled):
+                record['timed_out'] = True
+                record['error'] = f'Test case exceeded the {test_timeout:g}s time limit'
+                del record['traceback']
+            emit(record)
 
     score = (passed_tests / total_tests) * 100 if total_tests > 0 else 0
-    return passed_tests == total_tests, test_results, score
+    return passed_tests == total_tests, total_tests, score
 
 
-def main():
-    if len(sys.argv) < 3:
-        print(json.dumps({
-            'status': 'error',
-            'message': 'Insufficient arguments. Usage: sql_evaluator.py <code_file> <test_data_file>'
-        }))
-        sys.exit(1)
+def connect(dbname: str = "evaluation_db"):
+    """Connect to the evaluation database, or to another database on the same server."""
+    return psycopg2.connect(
+        dbname=dbname,
+        user="evaluator",
+        password="secure_password",
+        host="localhost"
+    )
 
-    code_file = sys.argv[1]
-    test_data_file = sys.argv[2]
 
+def evaluate(code_file: str, test_data: Dict[str, Any], emit: Emitter) -> Dict[str, Any]:
+    """
+    Evaluate a SQL submission against the test data, streaming records through `emit`.
+    The schema is taken from `schema_sql`, or read from `schema_file`, and
+    the submission runs against a fresh clone of that schema's template.
+    Returns the terminal record; errors are reported in it rather than raised.
+    """
+    database = None
     try:
-        test_data = load_test_data(test_data_file)
         submission = load_submission(code_file)
 
+        # Setup database if a schema is provided
+        schema_sql = test_data.get('schema_sql')
+        if not schema_sql and test_data.get('schema_file'):
+            with open(test_data['schema_file'], 'r') as f:
+                schema_sql = f.read()
+        if schema_sql:
+            database = clone_database(ensure_template_database(schema_sql))
+
         # Connect to the database
-        connection = psycopg2.connect(
-            dbname="evaluation_db",
-            user="evaluator",
-            password="secure_password",
-            host="localhost"
-        )
+        connection = connect(database) if database else connect()
 
-        # Setup database if a schema file is provided
-        schema_file = test_data.get('schema_file')
-        if schema_file:
-            setup_database(connection, schema_file)
+        success, tests_run, score = run_tests(connection, submission, test_data, emit)
 
-        success, test_results, score = run_tests(connection, submission, test_data)
+        # Close the connection
+        connection.close()
 
-        print(json.dumps({
+        summary = {
+            'type': 'result',
             'status': 'success',
             'passed_all': success,
             'evaluation_score': score,
-            'test_results': test_results
-        }))
+            'tests_run': tests_run
+        }
 
-        # Close the connection
-        connection.close()
+    except Exception as e:
+        summary = {
+            'type': 'error',
+            'status': 'error',
+            'message': compact(str(e)),
+            'traceback': compact(traceback.format_exc())
+        }
+
+    finally:
+        if database:
+            drop_database(database)
+
+    emit(summary)
+    return summary
+
+
+def main():
+    emit = make_emitter(protocol_stream())
 
+    if len(sys.argv) < 3:
+        emit({
+            'type': 'error',
+            'status': 'error',
+            'message': 'Insufficient arguments. Usage: sql_evaluator.py <code_file> <test_data_file>'
+        })
+        sys.exit(1)
+
+    code_file = sys.argv[1]
+    test_data_file = sys.argv[2]
+
+    try:
+        test_data = load_test_data(test_data_file)
     except Exception as e:
-        print(json.dumps({
+        emit({
+            'type': 'error',
             'status': 'error',
             'message': str(e),
             'traceback': traceback.format_exc()
-        }))
+        })
+        sys.exit(1)
+
+    schema_file = test_data.get('schema_file')
+    if schema_file and not os.path.isabs(schema_file):
+        # Relative paths are shipped alongside the test data file
+        test_data['schema_file'] = os.path.join(os.path.dirname(os.path.abspath(test_data_file)), schema_file)
+
+    summary = evaluate(code_file, test_data, emit)
+    if summary['status'] != 'success':
         sys.exit(1)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
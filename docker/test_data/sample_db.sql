@@ -0,0 +1,53 @@
+DROP TABLE IF EXISTS users CASCADE;
+DROP TABLE IF EXISTS posts CASCADE;
+DROP TABLE IF EXISTS comments CASCADE;
+DROP TABLE IF EXISTS likes CASCADE;
+
+CREATE TABLE users (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100),
+    email VARCHAR(100) UNIQUE
+);
+
+CREATE TABLE posts (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER REFERENCES users(id),
+    content TEXT,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE TABLE comments (
+    id SERIAL PRIMARY KEY,
+    post_id INTEGER REFERENCES posts(id),
+    user_id INTEGER REFERENCES users(id),
+    content TEXT,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE TABLE likes (
+    id SERIAL PRIMARY KEY,
+    post_id INTEGER REFERENCES posts(id),
+    user_id INTEGER REFERENCES users(id),
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Insert sample data
+INSERT INTO users (name, email) VALUES
+    ('User 1', 'user1@example.com'),
+    ('User 2', 'user2@example.com'),
+    ('User 3', 'user3@example.com');
+
+INSERT INTO posts (user_id, content, created_at) VALUES
+    (1, 'Post 1 content', NOW() - INTERVAL '5 days'),
+    (2, 'Post 2 content', NOW() - INTERVAL '3 days'),
+    (3, 'Post 3 content', NOW() - INTERVAL '1 day');
+
+INSERT INTO comments (post_id, user_id, content, created_at) VALUES
+    (1, 2, 'Comment on post 1', NOW() - INTERVAL '4 days'),
+    (1, 3, 'Another comment on post 1', NOW() - INTERVAL '3 days'),
+    (2, 1, 'Comment on post 2', NOW() - INTERVAL '2 days');
+
+INSERT INTO likes (post_id, user_id, created_at) VALUES
+    (1, 2, NOW() - INTERVAL '4 days'),
+    (1, 3, NOW() - INTERVAL '3 days'),
+    (2, 3, NOW() - INTERVAL '2 days');
@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'core',
 ]
 
@@ -156,6 +157,17 @@ EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@recruiterplatform.com')
 
+# Outbox of emails sent by the Celery dispatcher rather than in requests
+EMAIL_OUTBOX_BATCH_SIZE = int(os.environ.get('EMAIL_OUTBOX_BATCH_SIZE', 50))  # Emails per SMTP connection
+EMAIL_OUTBOX_DISPATCH_TIME = float(os.environ.get('EMAIL_OUTBOX_DISPATCH_TIME', 120))  # Seconds per dispatch run
+EMAIL_OUTBOX_DISPATCH_INTERVAL = float(os.environ.get('EMAIL_OUTBOX_DISPATCH_INTERVAL', 60))  # Seconds
+EMAIL_OUTBOX_CLAIM_TIMEOUT = int(os.environ.get('EMAIL_OUTBOX_CLAIM_TIMEOUT', 900))  # Seconds
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 6))
+EMAIL_OUTBOX_RETRY_DELAY = int(os.environ.get('EMAIL_OUTBOX_RETRY_DELAY', 60))  # Seconds, doubled per attempt
+EMAIL_OUTBOX_RETENTION_DAYS = int(os.environ.get('EMAIL_OUTBOX_RETENTION_DAYS', 30))
+EMAIL_DOMAIN_RATE_LIMIT = int(os.environ.get('EMAIL_DOMAIN_RATE_LIMIT', 60))  # Emails per domain and window, 0 for none
+EMAIL_DOMAIN_RATE_WINDOW = int(os.environ.get('EMAIL_DOMAIN_RATE_WINDOW', 60))  # Seconds
+
 # Add these lines to your settings.py if not already there
 
 # Celery settings
@@ -165,3 +177,58 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Europe/Berlin'
+CELERY_BEAT_SCHEDULE = {
+    # Correct drift in the incrementally maintained dashboard counters
+    'reconcile-dashboard-stats': {
+        'task': 'core.tasks.reconcile_dashboard_stats',
+        'schedule': float(os.environ.get('DASHBOARD_STATS_RECONCILE_INTERVAL', 3600)),  # Seconds
+    },
+    # Recompute the source percentiles any per-save refresh missed
+    'refresh-normalized-scores': {
+        'task': 'core.tasks.refresh_normalized_scores',
+        'schedule': float(os.environ.get('NORMALIZED_SCORE_REFRESH_INTERVAL', 3600)),  # Seconds
+    },
+    # Send the emails whose retry is due and any a request could not hand over
+    'dispatch-outbound-emails': {
+        'task': 'core.tasks.dispatch_outbound_emails',
+        'schedule': EMAIL_OUTBOX_DISPATCH_INTERVAL,
+    },
+    'purge-sent-emails': {
+        'task': 'core.tasks.purge_sent_emails',
+        'schedule': 24 * 3600,
+    },
+}
+
+# Cache for dashboard fragments, the question catalogue and company lists,
+# on the Redis server Celery uses but in a separate database
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/1'),
+        'TIMEOUT': int(os.environ.get('CACHE_TIMEOUT', 300)),  # Seconds
+        'KEY_PREFIX': 'recruiter',
+    }
+}
+
+# Code evaluation container pool
+EVALUATOR_IMAGE = os.environ.get('EVALUATOR_IMAGE', 'hushhushevaluator:latest')
+EVALUATOR_POOL_SIZE = int(os.environ.get('EVALUATOR_POOL_SIZE', 2))  # Warm single-use containers per language
+EVALUATOR_CONTAINER_MAX_AGE = int(os.environ.get('EVALUATOR_CONTAINER_MAX_AGE', 1800))  # Seconds idle before replaced
+# CPU quota per container; independent test groups run in parallel up to this
+# many CPUs, so below 2 every test runs in sequence. The quota is a cap, not a
+# reservation: idle pooled containers use no CPU.
+EVALUATOR_CONTAINER_CPUS = os.environ.get('EVALUATOR_CONTAINER_CPUS', '2')
+EVALUATOR_CONTAINER_MEMORY = os.environ.get('EVALUATOR_CONTAINER_MEMORY', '512m')
+EVALUATOR_TEST_TIMEOUT = float(os.environ.get('EVALUATOR_TEST_TIMEOUT', 5))  # Seconds per test case
+# Replays the slowest Python test case under a profiler for a hotspot report,
+# which costs one more run of that test per submission
+EVALUATOR_PROFILE_SUBMISSIONS = os.environ.get('EVALUATOR_PROFILE_SUBMISSIONS', 'True') == 'True'
+
+# Test suites: relative schema files are read from TEST_SUITE_DATA_DIR, and
+# compiled test plans are written to TEST_PLAN_DIR
+TEST_SUITE_DATA_DIR = os.environ.get('TEST_SUITE_DATA_DIR', os.path.join(BASE_DIR, 'docker', 'test_data'))
+TEST_PLAN_DIR = os.environ.get('TEST_PLAN_DIR', os.path.join(BASE_DIR, 'var', 'test_plans'))
+
+# Evaluation result cache
+EVALUATION_CACHE_MAX_ENTRIES = int(os.environ.get('EVALUATION_CACHE_MAX_ENTRIES', 10000))
+EVALUATION_CACHE_TTL_DAYS = int(os.environ.get('EVALUATION_CACHE_TTL_DAYS', 30))